@@ -8,13 +8,18 @@ Managing the queue of purchases and the status of the purchases.
 It was developed as a challenge project for the FIAP Software Architecture Post Graduation 9th class.
 """
 
+from contextlib import asynccontextmanager
 import os
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.security import HTTPBearer
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from src.adapters.driver.API import (
+    batch_router,
     cliente_router,
+    diagnostics_router,
     payment_router,
     pedido_router,
     produto_router,
@@ -22,6 +27,15 @@ from src.adapters.driver.API import (
     maintenance_router,
     web_hook_example_router,
 )
+from src.adapters.driver.API.json_response import (
+    GatewayJSONResponse,
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from src.adapters.driver.API.middleware.compression_middleware import (
+    CompressionMiddleware,
+)
+from src.adapters.driver.API.proxy.proxy_engine import proxy_engine
 
 auth_scheme = HTTPBearer()
 
@@ -32,8 +46,17 @@ def get_token(token: str = Depends(auth_scheme)):
     return token
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await proxy_engine.start()
+    yield
+    await proxy_engine.close()
+
+
 STAGE_PREFIX = os.getenv("STAGE_PREFIX", "dev")
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=GatewayJSONResponse,
     title="FastFood API - FIAP-9SOAT 🚀",
     description=__doc__,
     summary="Challenge project for FIAP Software Architecture Post Graduation 9th class.",
@@ -50,6 +73,11 @@ app = FastAPI(
     },
 )
 
+app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+app.add_exception_handler(RequestValidationError, request_validation_exception_handler)
+if proxy_engine.compression is not None:
+    app.add_middleware(CompressionMiddleware, compression=proxy_engine.compression)
+
 
 @app.get(f"/{STAGE_PREFIX}/new_docs", include_in_schema=False)
 async def swagger_ui():
@@ -61,15 +89,24 @@ async def swagger_ui():
 
 @app.get(f"/{STAGE_PREFIX}/openapijson", include_in_schema=False)
 async def openapijson():
-    return app.openapi()
+    return GatewayJSONResponse(app.openapi())
 
 
 @app.get(f"/{STAGE_PREFIX}/health_check", dependencies=[Depends(get_token)])
-def health_check():
+def health_check(response: Response):
     """
-    Request this to check on the server health.
+    Request this to check on the server health and on each upstream replica.
     """
-    return "Healthy"
+    upstreams = proxy_engine.upstreams.health()
+    available = [upstream["available"] for upstream in upstreams.values()]
+    if all(available):
+        status = "Healthy"
+    elif any(available):
+        status = "Degraded"
+    else:
+        status = "Unhealthy"
+        response.status_code = 503
+    return {"status": status, "upstreams": upstreams}
 
 
 app.include_router(
@@ -92,6 +129,16 @@ app.include_router(
     prefix=f"/{STAGE_PREFIX}",
     dependencies=[Depends(get_token)],
 )
+app.include_router(
+    diagnostics_router.router,
+    prefix=f"/{STAGE_PREFIX}",
+    dependencies=[Depends(get_token)],
+)
+app.include_router(
+    batch_router.router,
+    prefix=f"/{STAGE_PREFIX}",
+    dependencies=[Depends(get_token)],
+)
 app.include_router(
     web_hook_example_router.router,
     prefix=f"/{STAGE_PREFIX}",
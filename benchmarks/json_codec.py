@@ -0,0 +1,80 @@
+"""
+Time spent encoding and decoding a gateway-produced JSON body.
+
+Compares FastAPI's default path (``jsonable_encoder`` followed by the
+standard library ``json``, as ``JSONResponse`` renders) with the gateway
+JSON codecs, on a listing of orders carrying decimals, datetimes and the
+status enums.
+
+Run from the project root with ``poetry run python -m benchmarks.json_codec``.
+"""
+
+import json
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from src.core.helpers.enums.compra_status import CompraStatus
+from src.core.helpers.enums.pagamento_status import PagamentoStatus
+from src.core.helpers.services.json_codec import OrjsonCodec, StdlibJsonCodec, orjson
+
+ORDERS = 500
+REPEAT = 5
+NUMBER = 20
+
+
+def build_payload() -> list[dict]:
+    created_at = datetime(2024, 10, 1, 12, 0, 0)
+    return [
+        {
+            "id": index,
+            "status": list(CompraStatus)[index % len(CompraStatus)],
+            "pagamento": {
+                "status": list(PagamentoStatus)[index % len(PagamentoStatus)],
+                "value": Decimal("25.90") + index,
+            },
+            "created_at": created_at + timedelta(minutes=index),
+            "produtos": [
+                {"id": item, "name": f"Lanche {item}", "price": Decimal("12.50")}
+                for item in range(5)
+            ],
+        }
+        for index in range(ORDERS)
+    ]
+
+
+def fastapi_dumps(value) -> bytes:
+    return json.dumps(
+        jsonable_encoder(value),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode()
+
+
+def best_of(function) -> float:
+    """Milliseconds of the fastest call."""
+    return min(timeit.repeat(function, repeat=REPEAT, number=NUMBER)) / NUMBER * 1000
+
+
+def main():
+    payload = build_payload()
+    body = fastapi_dumps(payload)
+    candidates = [("jsonable_encoder + json", fastapi_dumps, json.loads)]
+    candidates.append(("StdlibJsonCodec", StdlibJsonCodec().dumps, json.loads))
+    if orjson is not None:
+        codec = OrjsonCodec()
+        candidates.append(("OrjsonCodec", codec.dumps, codec.loads))
+    print(f"{ORDERS} orders, {len(body) / 1024:.0f}KB")
+    print(f"{'path':>25} {'encode':>10} {'decode':>10}")
+    for name, dumps, loads in candidates:
+        encode = best_of(lambda: dumps(payload))
+        decode = best_of(lambda: loads(body))
+        print(f"{name:>25} {encode:>8.2f}ms {decode:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
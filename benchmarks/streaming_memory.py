@@ -0,0 +1,144 @@
+"""
+Peak memory allocated by the gateway while proxying one upstream listing.
+
+Compares a buffered route against a streamed route, and a streamed route
+that is also coalesced and cached, for increasing payload sizes. The last
+one buffers bodies up to the shared body limit only. The upstream is an in-memory stub that produces the body lazily, so
+the numbers only reflect what the gateway itself holds per request.
+
+Run from the project root with ``poetry run python -m benchmarks.streaming_memory``.
+"""
+
+import asyncio
+import tracemalloc
+
+import httpx
+from fastapi import FastAPI
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
+from src.core.helpers.options.cache_options import CacheOptions
+
+CHUNK_SIZE = 64 * 1024
+PAYLOAD_SIZES_MB = (1, 8, 32, 64)
+
+
+class LazyBody(httpx.AsyncByteStream):
+    def __init__(self, size: int):
+        self.size = size
+        self.chunk = b"x" * CHUNK_SIZE
+
+    async def __aiter__(self):
+        sent = 0
+        while sent < self.size:
+            chunk = self.chunk[: self.size - sent]
+            sent += len(chunk)
+            yield chunk
+
+
+def build_app(payload_size: int) -> tuple[FastAPI, ProxyEngine]:
+    def handler(request: httpx.Request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            stream=LazyBody(payload_size),
+        )
+
+    engine = ProxyEngine(
+        UpstreamClients(
+            [
+                UpstreamOptions(
+                    name="produto", base_urls=["http://produto.local/produto"]
+                )
+            ],
+            transport=httpx.MockTransport(handler),
+        )
+    )
+    routes = [
+        ProxyRoute(name="buffered", method="GET", path="/buffered", upstream="produto"),
+        ProxyRoute(
+            name="streamed",
+            method="GET",
+            path="/streamed",
+            upstream="produto",
+            stream=True,
+        ),
+        ProxyRoute(
+            name="shared",
+            method="GET",
+            path="/shared",
+            upstream="produto",
+            stream=True,
+            coalesce=True,
+            cache=CacheOptions(ttl=60),
+        ),
+    ]
+    app = FastAPI()
+    app.include_router(engine.build_router(routes))
+    return app, engine
+
+
+async def measure(app: FastAPI, path: str) -> tuple[int, int]:
+    """Returns the bytes received by the client and the peak bytes allocated."""
+    received = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 1234),
+        "server": ("gateway", 80),
+    }
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Like a server, block until the client disconnects, which never happens.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    await app(scope, receive, send)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return received, peak
+
+
+async def main():
+    print(
+        f"{'payload':>10} {'buffered peak':>15} {'streamed peak':>15}"
+        f" {'shared peak':>15}"
+    )
+    for size_mb in PAYLOAD_SIZES_MB:
+        app, engine = build_app(size_mb * 1024 * 1024)
+        await engine.start()
+        try:
+            _, buffered_peak = await measure(app, "/buffered")
+            _, streamed_peak = await measure(app, "/streamed")
+            _, shared_peak = await measure(app, "/shared")
+        finally:
+            await engine.close()
+        print(
+            f"{size_mb:>8}MB {buffered_peak / 1024:>13.0f}KB"
+            f" {streamed_peak / 1024:>13.0f}KB"
+            f" {shared_peak / 1024:>13.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
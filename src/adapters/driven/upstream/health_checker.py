@@ -0,0 +1,73 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from src.adapters.driven.upstream.upstream_options import HealthCheckOptions
+
+
+class UpstreamHealthChecker:
+    """Background task probing every replica of every upstream.
+
+    Each round also runs the latency outlier check of each upstream and
+    lets replicas that stayed in service forget their past ejections.
+    """
+
+    def __init__(self, clients: list, options: HealthCheckOptions):
+        self.clients = clients
+        self.options = options
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(client) for client in self.clients))
+
+    async def check(self, client) -> None:
+        results = await asyncio.gather(
+            *(
+                instance.probe(self.options.path, self.options.timeout)
+                for instance in client.instances
+            )
+        )
+        for instance, healthy in zip(client.instances, results):
+            self._update(client.name, instance, healthy)
+        client.outliers.check_latency(client.instances)
+        client.outliers.decay(client.instances)
+
+    def _update(self, upstream_name: str, instance, healthy: bool) -> None:
+        if healthy:
+            instance.probe_failures = 0
+            instance.probe_successes += 1
+            if (
+                not instance.healthy
+                and instance.probe_successes >= self.options.healthy_threshold
+            ):
+                instance.healthy = True
+                logger.info(f"{instance.base_url} ({upstream_name}) is healthy")
+        else:
+            instance.probe_successes = 0
+            instance.probe_failures += 1
+            if (
+                instance.healthy
+                and instance.probe_failures >= self.options.unhealthy_threshold
+            ):
+                instance.healthy = False
+                logger.warning(f"{instance.base_url} ({upstream_name}) is unhealthy")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.exception(e)
+            await asyncio.sleep(self.options.interval)
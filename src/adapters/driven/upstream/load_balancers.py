@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from itertools import count
+import random
+from typing import Sequence
+
+from src.core.helpers.enums.balancing_algorithm import BalancingAlgorithm
+
+
+class LoadBalancer(ABC):
+    @abstractmethod
+    def pick(self, candidates: Sequence):
+        """Chooses one of the candidate upstream instances."""
+        pass
+
+
+class RoundRobinBalancer(LoadBalancer):
+    def __init__(self):
+        self._counter = count()
+
+    def pick(self, candidates: Sequence):
+        return candidates[next(self._counter) % len(candidates)]
+
+
+class LeastOutstandingBalancer(LoadBalancer):
+    def pick(self, candidates: Sequence):
+        return min(candidates, key=lambda instance: instance.outstanding)
+
+
+class PowerOfTwoChoicesBalancer(LoadBalancer):
+    """Samples two instances and keeps the one with the lowest expected cost.
+
+    The cost is the EWMA latency of the instance weighted by the requests
+    already waiting on it, so a slow replica stops receiving traffic as soon
+    as its latency rises, without scanning the whole pool.
+    """
+
+    def __init__(self, rng: random.Random = None):
+        self._rng = rng or random.Random()
+
+    def pick(self, candidates: Sequence):
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self._rng.sample(candidates, 2)
+        return first if first.cost() <= second.cost() else second
+
+
+def build_load_balancer(algorithm: BalancingAlgorithm) -> LoadBalancer:
+    if algorithm == BalancingAlgorithm.LEAST_OUTSTANDING:
+        return LeastOutstandingBalancer()
+    if algorithm == BalancingAlgorithm.P2C_EWMA:
+        return PowerOfTwoChoicesBalancer()
+    return RoundRobinBalancer()
@@ -0,0 +1,80 @@
+from statistics import median
+from time import monotonic
+
+from loguru import logger
+
+from src.adapters.driven.upstream.upstream_options import OutlierDetectionOptions
+from src.core.helpers.interfaces.metrics_service import MetricsService
+
+
+class OutlierDetector:
+    """Ejects the replicas of one upstream that misbehave on live traffic."""
+
+    def __init__(
+        self,
+        upstream_name: str,
+        options: OutlierDetectionOptions,
+        metrics: MetricsService,
+    ):
+        self.upstream_name = upstream_name
+        self.options = options
+        self.metrics = metrics
+
+    def record_success(self, instance) -> None:
+        instance.consecutive_failures = 0
+
+    def record_failure(self, instance, instances: list) -> None:
+        instance.consecutive_failures += 1
+        if instance.consecutive_failures >= self.options.consecutive_failures:
+            self.eject(instance, instances, reason="failures")
+
+    def check_latency(self, instances: list) -> None:
+        """Ejects replicas whose latency is far above the pool median."""
+        available = [
+            instance
+            for instance in instances
+            if instance.available() and instance.ewma_latency > 0
+        ]
+        # The median of two samples can't tell which one is the outlier.
+        if len(available) < 3:
+            return
+        threshold = max(
+            self.options.min_outlier_latency,
+            self.options.latency_factor
+            * median(instance.ewma_latency for instance in available),
+        )
+        for instance in available:
+            if instance.ewma_latency > threshold:
+                self.eject(instance, instances, reason="latency")
+
+    def decay(self, instances: list) -> None:
+        """Forgets one past ejection of each replica that is back in service."""
+        for instance in instances:
+            if instance.ejection_count and instance.available():
+                instance.ejection_count -= 1
+
+    def eject(self, instance, instances: list, reason: str) -> None:
+        if not instance.available() or len(instances) < 2:
+            return
+        ejected = sum(1 for other in instances if other.is_ejected())
+        max_ejected = max(
+            1, int(len(instances) * self.options.max_ejection_percent / 100)
+        )
+        if ejected >= max_ejected:
+            return
+        instance.ejection_count += 1
+        duration = min(
+            self.options.base_ejection_time * 2 ** (instance.ejection_count - 1),
+            self.options.max_ejection_time,
+        )
+        instance.ejected_until = monotonic() + duration
+        instance.consecutive_failures = 0
+        # Start over once readmitted, so old samples don't eject it right away.
+        instance.ewma_latency = 0.0
+        self.metrics.increment(
+            "upstream_ejections", upstream=self.upstream_name, reason=reason
+        )
+        logger.warning(
+            f"Ejected {instance.base_url} from {self.upstream_name} "
+            f"for {duration:.0f}s ({reason})"
+        )
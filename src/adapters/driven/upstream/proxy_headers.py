@@ -0,0 +1,77 @@
+import hashlib
+from typing import Mapping
+
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+
+# Milliseconds left before the caller gives up, received and forwarded.
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+# Headers recomputed by the HTTP client for the outgoing request.
+REQUEST_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {
+    "host",
+    "content-length",
+    DEADLINE_HEADER,
+}
+
+# Buffered bodies are decoded by the HTTP client, which then asks only for
+# the encodings it can decode.
+BUFFERED_REQUEST_EXCLUDED_HEADERS = REQUEST_EXCLUDED_HEADERS | {"accept-encoding"}
+
+# Encodings the HTTP client always decodes, asked for when the body of a
+# streamed route has to be buffered.
+DECODABLE_ACCEPT_ENCODING = "gzip, deflate"
+
+# Validators of the caller, answered by the gateway itself for responses
+# that are shared between callers.
+CONDITIONAL_REQUEST_HEADERS = frozenset(
+    {"if-none-match", "if-modified-since", "if-match", "if-unmodified-since"}
+)
+SHARED_REQUEST_EXCLUDED_HEADERS = (
+    BUFFERED_REQUEST_EXCLUDED_HEADERS | CONDITIONAL_REQUEST_HEADERS
+)
+
+# The upstream body is decoded by the HTTP client before being returned.
+RESPONSE_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {"content-length", "content-encoding"}
+
+
+def filter_raw_response_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    """Headers for a response whose body is forwarded undecoded."""
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+
+
+def authorization_scope(headers: Mapping[str, str]) -> str:
+    """Digest of the Authorization header, to key data per caller without
+    keeping the token itself. Empty for anonymous requests."""
+    authorization = headers.get("authorization")
+    if not authorization:
+        return ""
+    return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+
+def forward_request_headers(
+    headers: Mapping[str, str], excluded: frozenset[str] = REQUEST_EXCLUDED_HEADERS
+) -> dict[str, str]:
+    return {key: value for key, value in headers.items() if key.lower() not in excluded}
+
+
+def filter_response_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in RESPONSE_EXCLUDED_HEADERS
+    }
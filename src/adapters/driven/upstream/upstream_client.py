@@ -0,0 +1,401 @@
+import math
+import os
+from time import monotonic
+from typing import Optional
+
+import httpx
+
+from src.adapters.driven.upstream.health_checker import UpstreamHealthChecker
+from src.adapters.driven.upstream.load_balancers import build_load_balancer
+from src.adapters.driven.upstream.outlier_detector import OutlierDetector
+from src.adapters.driven.upstream.upstream_options import (
+    HealthCheckOptions,
+    OutlierDetectionOptions,
+    UpstreamOptions,
+)
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.options.timeout_options import TimeoutOptions
+from src.core.helpers.services.adaptive_limiter import AdaptiveLimiter
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.services.bulkhead import Bulkhead
+from src.core.helpers.services.circuit_breaker import CircuitBreaker
+from src.core.helpers.services.load_shedder import LoadShedder
+from src.core.helpers.services.in_memory_metrics import InMemoryMetricsService
+
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+# Seconds for an old latency sample to lose ~63% of its weight in the EWMA.
+UPSTREAM_EWMA_DECAY = float(os.getenv("UPSTREAM_EWMA_DECAY", "10"))
+# Answers telling that the upstream is overloaded, for the adaptive limiter.
+OVERLOAD_STATUS_CODES = frozenset({503, 504})
+# Default for calls that don't set their own, so none can hang forever.
+UPSTREAM_TIMEOUTS = TimeoutOptions.from_env()
+
+
+class UpstreamInstance:
+    """Keep-alive connection pool to one replica of an upstream service."""
+
+    def __init__(
+        self,
+        base_url: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.ewma_latency = 0.0
+        self._last_sample = monotonic()
+        # Set by the active health checker.
+        self.healthy = True
+        self.probe_successes = 0
+        self.probe_failures = 0
+        # Set by the outlier detector from live traffic.
+        self.consecutive_failures = 0
+        self.ejection_count = 0
+        self.ejected_until = 0.0
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                UPSTREAM_TIMEOUTS.read, connect=UPSTREAM_TIMEOUTS.connect
+            ),
+            follow_redirects=True,
+            transport=self._transport,
+        )
+
+    async def close(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def send(
+        self, method: str, path: str, stream: bool = False, **kwargs
+    ) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError(f"Upstream client for {self.base_url} is not started")
+        upstream_request = self._client.build_request(
+            method, f"{self.base_url}{path}", **kwargs
+        )
+        # Streamed responses count as answered once their headers arrive.
+        self.outstanding += 1
+        started_at = monotonic()
+        try:
+            return await self._client.send(upstream_request, stream=stream)
+        finally:
+            self.outstanding -= 1
+            self.record_latency(monotonic() - started_at)
+
+    async def probe(self, path: str, timeout: float) -> bool:
+        if self._client is None:
+            return False
+        try:
+            response = await self._client.get(f"{self.base_url}{path}", timeout=timeout)
+        except httpx.HTTPError:
+            return False
+        return response.status_code < 500
+
+    def is_ejected(self) -> bool:
+        return monotonic() < self.ejected_until
+
+    def available(self) -> bool:
+        return self.healthy and not self.is_ejected()
+
+    def health(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "ejected": self.is_ejected(),
+            "outstanding": self.outstanding,
+            "ewma_latency": round(self.ewma_latency, 6),
+        }
+
+    def record_latency(self, latency: float) -> None:
+        now = monotonic()
+        weight = math.exp(-(now - self._last_sample) / UPSTREAM_EWMA_DECAY)
+        self._last_sample = now
+        # Peak sensitive: a slower sample is taken as is, faster ones decay in.
+        if latency > self.ewma_latency:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.ewma_latency * weight + latency * (1 - weight)
+
+    def cost(self) -> float:
+        return self.ewma_latency * (self.outstanding + 1)
+
+
+class UpstreamClient:
+    """An upstream service, balancing its requests across the replicas."""
+
+    def __init__(
+        self,
+        options: UpstreamOptions,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        outlier_detection: Optional[OutlierDetectionOptions] = None,
+        metrics: Optional[MetricsService] = None,
+    ):
+        self.name = options.name
+        self.instances = [
+            UpstreamInstance(base_url, transport=transport)
+            for base_url in options.base_urls
+        ]
+        self.balancer = build_load_balancer(options.balancing)
+        metrics = metrics or InMemoryMetricsService()
+        self.outliers = OutlierDetector(
+            self.name, outlier_detection or OutlierDetectionOptions(), metrics
+        )
+        self.breaker = (
+            CircuitBreaker(self.name, options.circuit_breaker, metrics)
+            if options.circuit_breaker is not None
+            else None
+        )
+        bulkhead = options.bulkhead
+        if bulkhead is None and options.adaptive_limit is not None:
+            bulkhead = BulkheadOptions(
+                max_concurrent=options.adaptive_limit.initial_limit
+            )
+        self.bulkhead = (
+            Bulkhead(
+                self.name,
+                bulkhead,
+                metrics,
+                shedder=(
+                    LoadShedder(self.name, options.load_shedding, metrics)
+                    if options.load_shedding is not None
+                    else None
+                ),
+            )
+            if bulkhead is not None
+            else None
+        )
+        self.limiter = (
+            AdaptiveLimiter(self.name, options.adaptive_limit, self.bulkhead, metrics)
+            if options.adaptive_limit is not None
+            else None
+        )
+
+    async def start(self) -> None:
+        for instance in self.instances:
+            await instance.start()
+
+    async def close(self) -> None:
+        for instance in self.instances:
+            await instance.close()
+
+    async def request(
+        self,
+        method: str,
+        path: str = "",
+        stream: bool = False,
+        instance: Optional[UpstreamInstance] = None,
+        priority: PriorityClass = PriorityClass.STANDARD,
+        **kwargs,
+    ) -> httpx.Response:
+        """Sends a request to one of the upstream replicas, or to ``instance``.
+
+        With ``stream=True`` the body is not read; the caller must iterate it
+        and close the response to release the pooled connection. Raises
+        CircuitOpenError without any I/O while the circuit is open,
+        BulkheadFull when the upstream is saturated and LoadShed when the
+        ``priority`` class is being shed.
+        """
+        params = kwargs.get("params")
+        if isinstance(params, dict):
+            # Same semantics as requests: None valued params are not sent.
+            kwargs["params"] = {
+                key: value for key, value in params.items() if value is not None
+            }
+        if self.breaker is not None:
+            self.breaker.acquire()
+        try:
+            if self.bulkhead is not None:
+                await self.bulkhead.acquire(priority)
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        if self.bulkhead is None:
+            return await self._send(instance, method, path, stream, **kwargs)
+        in_flight = self.bulkhead.in_flight
+        started_at = monotonic()
+        dropped = None
+        try:
+            response = await self._send(instance, method, path, stream, **kwargs)
+            dropped = response.status_code in OVERLOAD_STATUS_CODES
+            return response
+        except httpx.TransportError:
+            dropped = True
+            raise
+        finally:
+            self.bulkhead.release()
+            # Cancelled calls tell nothing about the upstream.
+            if self.limiter is not None and dropped is not None:
+                self.limiter.on_sample(monotonic() - started_at, in_flight, dropped)
+
+    async def _send(
+        self,
+        instance: Optional[UpstreamInstance],
+        method: str,
+        path: str,
+        stream: bool,
+        **kwargs,
+    ) -> httpx.Response:
+        instance = instance or self.balancer.pick(self.available_instances())
+        started_at = monotonic()
+        try:
+            response = await instance.send(method, path, stream=stream, **kwargs)
+        except httpx.TransportError:
+            self._record(instance, False, monotonic() - started_at)
+            raise
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        self._record(instance, response.status_code < 500, monotonic() - started_at)
+        return response
+
+    def pick(self, exclude: tuple = ()) -> Optional[UpstreamInstance]:
+        """Chooses a replica outside ``exclude``, or None when there is none."""
+        candidates = [
+            instance
+            for instance in self.available_instances()
+            if instance not in exclude
+        ]
+        return self.balancer.pick(candidates) if candidates else None
+
+    def _record(self, instance: UpstreamInstance, success: bool, latency: float):
+        if success:
+            self.outliers.record_success(instance)
+        else:
+            self.outliers.record_failure(instance, self.instances)
+        if self.breaker is None:
+            return
+        if success:
+            self.breaker.record_success(latency)
+        else:
+            self.breaker.record_failure(latency)
+
+    def available_instances(self) -> list[UpstreamInstance]:
+        available = [instance for instance in self.instances if instance.available()]
+        # With every replica out, spreading the load beats failing everything.
+        return available or self.instances
+
+    def is_available(self) -> bool:
+        return any(instance.available() for instance in self.instances)
+
+    def health(self) -> dict:
+        return {
+            "available": self.is_available(),
+            "instances": [instance.health() for instance in self.instances],
+        }
+
+    async def get(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def patch(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+
+class UpstreamClients:
+    """Registry of the upstream services, started and closed with the app."""
+
+    def __init__(
+        self,
+        upstreams: list[UpstreamOptions],
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        outlier_detection: Optional[OutlierDetectionOptions] = None,
+        health_check: Optional[HealthCheckOptions] = None,
+        metrics: Optional[MetricsService] = None,
+    ):
+        self.metrics = metrics or InMemoryMetricsService()
+        self._clients = {
+            options.name: UpstreamClient(
+                options,
+                transport=transport,
+                outlier_detection=outlier_detection,
+                metrics=self.metrics,
+            )
+            for options in upstreams
+        }
+        self.health_checker = (
+            UpstreamHealthChecker(list(self._clients.values()), health_check)
+            if health_check is not None
+            else None
+        )
+
+    def get(self, name: str) -> UpstreamClient:
+        return self._clients[name]
+
+    def names(self) -> list[str]:
+        return list(self._clients)
+
+    async def start(self) -> None:
+        for client in self._clients.values():
+            await client.start()
+        if self.health_checker is not None:
+            await self.health_checker.start()
+
+    async def close(self) -> None:
+        if self.health_checker is not None:
+            await self.health_checker.close()
+        for client in self._clients.values():
+            await client.close()
+
+    def health(self) -> dict[str, dict]:
+        return {name: client.health() for name, client in self._clients.items()}
+
+    def circuit_breakers(self) -> dict[str, dict]:
+        return {
+            name: client.breaker.snapshot()
+            for name, client in self._clients.items()
+            if client.breaker is not None
+        }
+
+
+upstream_clients = UpstreamClients(
+    [
+        UpstreamOptions.from_env("cliente", "CLIENT", "http://localhost:8001/cliente"),
+        UpstreamOptions.from_env("pedido", "PEDIDO", "http://localhost:8001/pedido"),
+        UpstreamOptions.from_env("produto", "PRODUTO", "http://localhost:8003/produto"),
+        UpstreamOptions.from_env("payment", "PAYMENT", "http://localhost:8002/payment"),
+        UpstreamOptions.from_env("queue", "QUEUE", "http://localhost:8001/queue"),
+        UpstreamOptions.from_env(
+            "payment_maintenance",
+            "PAYMENT_MAINTENANCE",
+            "http://localhost:8002/payment/maintenance",
+        ),
+        UpstreamOptions.from_env(
+            "produto_maintenance",
+            "PRODUTO_MAINTENANCE",
+            "http://localhost:8003/produto/maintenance",
+        ),
+        UpstreamOptions.from_env(
+            "pedido_maintenance",
+            "PEDIDO_MAINTENANCE",
+            "http://localhost:8001/pedido/maintenance",
+        ),
+    ],
+    outlier_detection=OutlierDetectionOptions.from_env(),
+    health_check=HealthCheckOptions.from_env(),
+)
@@ -0,0 +1,96 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from src.core.helpers.enums.balancing_algorithm import BalancingAlgorithm
+from src.core.helpers.options.adaptive_limit_options import AdaptiveLimitOptions
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.options.circuit_breaker_options import CircuitBreakerOptions
+from src.core.helpers.options.load_shedding_options import LoadSheddingOptions
+
+
+class UpstreamOptions(BaseModel):
+    name: str
+    base_urls: list[str] = Field(..., min_length=1)
+    balancing: BalancingAlgorithm = BalancingAlgorithm.ROUND_ROBIN
+    circuit_breaker: Optional[CircuitBreakerOptions] = None
+    bulkhead: Optional[BulkheadOptions] = None
+    adaptive_limit: Optional[AdaptiveLimitOptions] = None
+    load_shedding: Optional[LoadSheddingOptions] = None
+
+    @classmethod
+    def from_env(
+        cls, name: str, env_prefix: str, default_base_url: str
+    ) -> "UpstreamOptions":
+        """Reads ``<PREFIX>_BASE_URL``, a comma separated list of replicas,
+        ``<PREFIX>_LB_ALGORITHM``, falling back to ``UPSTREAM_LB_ALGORITHM``,
+        the ``<PREFIX>_CB_*`` circuit breaker thresholds, the bulkhead limits
+        and the adaptive limit, which then drives the bulkhead. Load shedding
+        is configured for every upstream at once."""
+        base_urls = os.getenv(f"{env_prefix}_BASE_URL", default_base_url)
+        balancing = os.getenv(
+            f"{env_prefix}_LB_ALGORITHM",
+            os.getenv("UPSTREAM_LB_ALGORITHM", BalancingAlgorithm.ROUND_ROBIN.value),
+        )
+        return cls(
+            name=name,
+            base_urls=[url.strip() for url in base_urls.split(",") if url.strip()],
+            balancing=BalancingAlgorithm(balancing),
+            circuit_breaker=CircuitBreakerOptions.from_env(env_prefix),
+            bulkhead=BulkheadOptions.from_env(env_prefix),
+            adaptive_limit=AdaptiveLimitOptions.from_env(env_prefix),
+            load_shedding=LoadSheddingOptions.from_env(),
+        )
+
+
+class OutlierDetectionOptions(BaseModel):
+    """Passive ejection of replicas, based on the traffic they already serve.
+
+    A replica is ejected after ``consecutive_failures`` 5xx answers or
+    connection errors in a row, or when its latency is ``latency_factor``
+    times the pool median. Each new ejection of the same replica doubles its
+    duration, up to ``max_ejection_time``. At most ``max_ejection_percent``
+    of a pool is ejected at once, and a single replica is never ejected.
+    """
+
+    consecutive_failures: int = Field(default=5, gt=0)
+    latency_factor: float = Field(default=3.0, gt=1)
+    min_outlier_latency: float = Field(default=0.05, ge=0)
+    base_ejection_time: float = Field(default=30.0, gt=0)
+    max_ejection_time: float = Field(default=300.0, gt=0)
+    max_ejection_percent: float = Field(default=50.0, gt=0, le=100)
+
+    @classmethod
+    def from_env(cls) -> "OutlierDetectionOptions":
+        return cls(
+            consecutive_failures=int(os.getenv("UPSTREAM_OUTLIER_FAILURES", "5")),
+            latency_factor=float(os.getenv("UPSTREAM_OUTLIER_LATENCY_FACTOR", "3")),
+            base_ejection_time=float(os.getenv("UPSTREAM_EJECTION_TIME", "30")),
+            max_ejection_time=float(os.getenv("UPSTREAM_MAX_EJECTION_TIME", "300")),
+        )
+
+
+class HealthCheckOptions(BaseModel):
+    """Active probing of every replica, ``GET <base url><path>``.
+
+    Any answer below 500 counts as healthy.
+    """
+
+    interval: float = Field(default=10.0, gt=0)
+    timeout: float = Field(default=2.0, gt=0)
+    path: str = "/health_check"
+    unhealthy_threshold: int = Field(default=2, gt=0)
+    healthy_threshold: int = Field(default=1, gt=0)
+
+    @classmethod
+    def from_env(cls) -> Optional["HealthCheckOptions"]:
+        """Returns None when ``UPSTREAM_HEALTH_CHECK_INTERVAL`` is 0."""
+        interval = float(os.getenv("UPSTREAM_HEALTH_CHECK_INTERVAL", "10"))
+        if interval <= 0:
+            return None
+        return cls(
+            interval=interval,
+            timeout=float(os.getenv("UPSTREAM_HEALTH_CHECK_TIMEOUT", "2")),
+            path=os.getenv("UPSTREAM_HEALTH_PATH", "/health_check"),
+        )
@@ -0,0 +1,63 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Request
+
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.proxy.batch import SUB_REQUEST_SCOPE_KEY, Batch
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine, proxy_engine
+from src.adapters.driver.API.schemas.batch_schema import (
+    BatchResponseSchema,
+    BatchSchema,
+)
+from src.core.helpers.options.batch_options import BatchOptions
+
+router = APIRouter(
+    tags=["Batch"],
+)
+
+BATCH = BatchOptions.from_env()
+
+# Headers of the batch applied to each of its sub-requests.
+BATCH_FORWARDED_HEADERS = ("authorization",)
+
+
+async def run_batch(
+    engine: ProxyEngine, request: Request, batch: BatchSchema, options: BatchOptions
+) -> list[dict[str, Any]]:
+    """The responses of the sub-requests of ``batch``, whose paths are
+    relative to the prefix the batch endpoint is mounted on. Batches sent
+    by another batch are refused."""
+    if request.scope.get(SUB_REQUEST_SCOPE_KEY):
+        raise HTTPException(status_code=400, detail="Nested batches are refused")
+    if len(batch.requests) > options.max_requests:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch carries at most {options.max_requests} requests",
+        )
+    batch_path = request.url.path
+    headers = {"accept-encoding": "identity"}
+    for header in BATCH_FORWARDED_HEADERS:
+        if header in request.headers:
+            headers[header] = request.headers[header]
+    runner = Batch(
+        request.app,
+        str(request.base_url),
+        batch_path.rstrip("/").removesuffix("/batch"),
+        headers,
+        engine.request_deadline(request, options.timeout),
+        options.concurrency,
+        engine.metrics,
+    )
+    return await runner.run(batch.requests, batch_path)
+
+
+@router.post("/batch", name="batch", response_model=BatchResponseSchema)
+async def batch(request: Request, batch: BatchSchema):
+    """
+    Runs several requests to the gateway in one round trip. Paths are
+    relative to the gateway prefix, like `/produto/1`. Responses come back
+    in the order of the requests; identical GETs are sent only once.
+    """
+    return GatewayJSONResponse(
+        {"responses": await run_batch(proxy_engine, request, batch, BATCH)}
+    )
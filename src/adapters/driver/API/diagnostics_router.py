@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.proxy.proxy_engine import proxy_engine
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> dict:
+    return GatewayJSONResponse(proxy_engine.metrics.snapshot())
+
+
+@router.get("/circuit_breakers", include_in_schema=False)
+async def get_circuit_breakers() -> dict:
+    return GatewayJSONResponse(proxy_engine.circuit_breakers())
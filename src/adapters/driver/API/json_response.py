@@ -0,0 +1,35 @@
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException
+
+from src.core.helpers.services.json_codec import json_codec
+
+# Statuses whose response must not have a body.
+BODYLESS_STATUS_CODES = frozenset({204, 304})
+
+
+class GatewayJSONResponse(JSONResponse):
+    """JSON response rendered with the gateway JSON codec."""
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps(content)
+
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+    """FastAPI's handler, with the body rendered by the gateway codec."""
+    headers = getattr(exc, "headers", None)
+    if exc.status_code < 200 or exc.status_code in BODYLESS_STATUS_CODES:
+        return Response(status_code=exc.status_code, headers=headers)
+    return GatewayJSONResponse(
+        {"detail": exc.detail}, status_code=exc.status_code, headers=headers
+    )
+
+
+async def request_validation_exception_handler(
+    request: Request, exc: RequestValidationError
+) -> Response:
+    """FastAPI's handler, with the body rendered by the gateway codec."""
+    return GatewayJSONResponse({"detail": exc.errors()}, status_code=422)
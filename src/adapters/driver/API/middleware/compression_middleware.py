@@ -0,0 +1,96 @@
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.helpers.enums.content_encoding import ContentEncoding
+from src.core.helpers.functions.etag import variant_etag
+from src.core.helpers.services.compression import Compression
+
+UNCOMPRESSED_STATUS_CODES = frozenset({204, 304})
+
+
+class CompressionMiddleware:
+    """Compresses responses on the fly in the encoding negotiated with the
+    client, chunk by chunk for streamed ones.
+
+    Responses that already have a Content-Encoding, such as the buffered
+    ones the proxy engine compresses itself or upstream bodies streamed
+    through undecoded, are left untouched.
+    """
+
+    def __init__(self, app: ASGIApp, compression: Compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.compression.negotiate(
+            Headers(scope=scope).get("accept-encoding")
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, self.compression, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, compression: Compression, encoding: ContentEncoding):
+        self._send = send
+        self.compression = compression
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held until the first body message tells whether it is streamed.
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not self._compressible(None if more_body else len(body)):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.compressor = self.compression.compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["content-encoding"] = self.encoding.value
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["etag"] = variant_etag(headers["etag"], self.encoding.value)
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self.compressor.compress(body) + self.compressor.flush()
+                headers["content-length"] = str(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start)
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.flush()
+        if body or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+    def _compressible(self, size: Optional[int]) -> bool:
+        if self.start["status"] in UNCOMPRESSED_STATUS_CODES:
+            return False
+        headers = Headers(raw=self.start["headers"])
+        if "content-encoding" in headers:
+            return False
+        if size is None and "content-length" in headers:
+            size = int(headers["content-length"])
+        return self.compression.compressible(headers.get("content-type"), size)
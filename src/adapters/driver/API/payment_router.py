@@ -1,88 +1,46 @@
-import json
-import os
-from fastapi import APIRouter, HTTPException, Request, Response
-from loguru import logger
-from peewee import DoesNotExist
-import requests
+from src.adapters.driver.API.proxy.proxy_engine import proxy_engine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
 from src.adapters.driver.API.schemas.create_payment_schema import CreatePaymentSchema
+from src.core.helpers.enums.body_validation import BodyValidation
+from src.core.helpers.enums.priority_class import PriorityClass
 from src.core.domain.aggregates.pagamento_aggregate import PagamentoAggregate
 from src.core.domain.entities.meio_de_pagamento_entity import MeioDePagamentoEntity
-
-router = APIRouter(
+from src.core.helpers.options.cache_options import CacheOptions
+from src.core.helpers.options.hedge_options import HedgeOptions
+
+PAYMENT_ROUTES = [
+    ProxyRoute(
+        name="initiate_payment",
+        method="POST",
+        path="/pay",
+        upstream="payment",
+        body=CreatePaymentSchema,
+        body_validation=BodyValidation.STRUCTURAL,
+        response_model=PagamentoAggregate,
+        priority=PriorityClass.CRITICAL,
+    ),
+    ProxyRoute(
+        name="list_payment_methods",
+        method="GET",
+        path="/methods",
+        upstream="payment",
+        response_model=list[MeioDePagamentoEntity],
+        hedge=HedgeOptions.from_env(),
+        coalesce=True,
+        cache=CacheOptions.from_env("PAYMENT_METHODS", ttl=300),
+    ),
+    ProxyRoute(
+        name="get_payment",
+        method="GET",
+        path="/{payment_id}",
+        upstream="payment",
+        path_params={"payment_id": str},
+        response_model=PagamentoAggregate | None,
+    ),
+]
+
+router = proxy_engine.build_router(
+    PAYMENT_ROUTES,
     prefix="/payment",
     tags=["Pagamentos"],
 )
-
-PAYMENT_BASE_URL = os.getenv("PAYMENT_BASE_URL", "http://localhost:8002/payment")
-
-
-@router.post("/pay")
-async def initiate_payment(
-    request: Request, payment: CreatePaymentSchema
-) -> PagamentoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.post(
-            f"{PAYMENT_BASE_URL}/pay",
-            json=payment.model_dump(),
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/methods")
-async def list_payment_methods(
-    request: Request,
-) -> list[MeioDePagamentoEntity]:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PAYMENT_BASE_URL}/methods",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/{payment_id}")
-async def get_payment(request: Request, payment_id: str) -> PagamentoAggregate | None:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PAYMENT_BASE_URL}/{payment_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except DoesNotExist as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail="Item não localizado")
-    except (ValueError, AttributeError, DoesNotExist) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        print(type(e))
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
@@ -1,179 +1,164 @@
-import os
-from typing import Annotated, List, Optional, Union
-from loguru import logger
-from fastapi import APIRouter, HTTPException, Query, Request, Response
-import requests
+import asyncio
+from typing import Any, List, Optional, Union
 
+from fastapi import Request
+
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.proxy.composition import Composition
+from src.adapters.driver.API.proxy.proxied_response import UpstreamPayloadError
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine, proxy_engine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
 from src.adapters.driver.API.schemas.create_purchase_schema import CreatePurchaseSchema
+from src.adapters.driver.API.schemas.pedido_full_schema import PedidoFullSchema
+from src.core.helpers.enums.body_validation import BodyValidation
+from src.core.helpers.enums.priority_class import PriorityClass
 from src.core.domain.aggregates.pedido_aggregate import PedidoAggregate
 from src.core.domain.entities.compra_entity import CompraEntity
-
-router = APIRouter(
+from src.core.helpers.options.composition_options import CompositionOptions
+from src.core.helpers.options.hedge_options import HedgeOptions
+
+PEDIDO_ROUTES = [
+    ProxyRoute(
+        name="list_pedidos",
+        method="GET",
+        path="/index",
+        upstream="pedido",
+        query_params={
+            "status": (Optional[int], None),
+            "min_value": (Optional[float], None),
+            "max_value": (Optional[float], None),
+        },
+        response_model=Union[List[PedidoAggregate], None],
+        stream=True,
+        priority=PriorityClass.SHEDDABLE,
+        normalize=True,
+    ),
+    ProxyRoute(
+        name="create_pedido",
+        method="POST",
+        path="/make",
+        upstream="pedido",
+        body=CreatePurchaseSchema,
+        body_validation=BodyValidation.STRUCTURAL,
+        response_model=CompraEntity,
+        priority=PriorityClass.CRITICAL,
+    ),
+    ProxyRoute(
+        name="get_pedido",
+        method="GET",
+        path="/{pedido_id}",
+        upstream="pedido",
+        path_params={"pedido_id": int},
+        response_model=PedidoAggregate,
+        hedge=HedgeOptions.from_env(),
+        fields=True,
+        normalize=True,
+    ),
+    ProxyRoute(
+        name="add_new_product_to_pedido",
+        method="PATCH",
+        path="/{pedido_id}/add_product/{product_id}",
+        upstream="pedido",
+        path_params={"pedido_id": int, "product_id": int},
+        response_model=CompraEntity,
+    ),
+    ProxyRoute(
+        name="add_new_component_to_product_in_pedido",
+        method="PATCH",
+        path="/{pedido_id}/{product_id}/add_component/{component_id}",
+        upstream="pedido",
+        path_params={"pedido_id": int, "product_id": int, "component_id": int},
+        response_model=CompraEntity,
+    ),
+    ProxyRoute(
+        name="concludes_pedido",
+        method="PATCH",
+        path="/conclude/{pedido_id}",
+        upstream="pedido",
+        path_params={"pedido_id": int},
+        response_model=PedidoAggregate,
+    ),
+    ProxyRoute(
+        name="cancel_pedido",
+        method="PATCH",
+        path="/cancel/{pedido_id}",
+        upstream="pedido",
+        path_params={"pedido_id": int},
+        response_model=PedidoAggregate,
+    ),
+]
+
+router = proxy_engine.build_router(
+    PEDIDO_ROUTES,
     prefix="/pedido",
     tags=["Pedidos"],
 )
 
-PEDIDO_BASE_URL = os.getenv("PEDIDO_BASE_URL", "http://localhost:8001/pedido")
-
-
-@router.get("/index")
-async def list_pedidos(
-    request: Request,
-    status: Optional[int] = None,
-    min_value: Optional[float] = None,
-    max_value: Optional[float] = None,
-) -> Union[List[PedidoAggregate], None]:
-
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PEDIDO_BASE_URL}/index",
-            params={
-                "status": status,
-                "min_value": min_value,
-                "max_value": max_value,
-            },
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.post("/make")
-async def create_pedido(request: Request, pedido: CreatePurchaseSchema) -> CompraEntity:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.post(
-            f"{PEDIDO_BASE_URL}/make",
-            json=pedido.model_dump(),
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/{pedido_id}")
-async def get_pedido(request: Request, pedido_id: int) -> PedidoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PEDIDO_BASE_URL}/{pedido_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.patch("/{pedido_id}/add_product/{product_id}")
-async def add_new_product_to_pedido(
-    request: Request, pedido_id: int, product_id: int
-) -> CompraEntity:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PEDIDO_BASE_URL}/{pedido_id}/add_product/{product_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
 
-@router.patch("/{pedido_id}/{product_id}/add_component/{component_id}")
-async def add_new_component_to_product_in_pedido(
-    request: Request, pedido_id: int, product_id: int, component_id: int
-) -> CompraEntity:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PEDIDO_BASE_URL}/{pedido_id}/{product_id}/add_component/{component_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
+COMPOSITION = CompositionOptions.from_env()
 
 
-@router.patch("/conclude/{pedido_id}")
-async def concludes_pedido(request: Request, pedido_id: int) -> PedidoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PEDIDO_BASE_URL}/conclude/{pedido_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
+def _entities(document: Any, field: str) -> list[dict[str, Any]]:
+    """The objects listed in ``field`` of ``document``, skipping anything
+    else the upstream may have sent there."""
+    if not isinstance(document, dict):
+        return []
+    return [entity for entity in document.get(field) or [] if isinstance(entity, dict)]
 
 
-@router.patch("/cancel/{pedido_id}")
-async def cancel_pedido(request: Request, pedido_id: int) -> PedidoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PEDIDO_BASE_URL}/cancel/{pedido_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
+async def compose_pedido(
+    engine: ProxyEngine,
+    request: Request,
+    pedido_id: int,
+    options: CompositionOptions,
+) -> dict[str, Any]:
+    """The order with its payments and the products it selected, fetched
+    concurrently once the order is known."""
+    composition = Composition(
+        engine,
+        request,
+        "get_pedido_full",
+        engine.request_deadline(request, options.timeout),
+        options.part_timeout,
+    )
+    pedido = await composition.root("get_pedido", {"pedido_id": pedido_id})
+    if not isinstance(pedido, dict):
+        raise engine.http_error(
+            engine.routes["get_pedido"], UpstreamPayloadError("Order is not an object")
         )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
+    product_ids = {}
+    for selected in _entities(pedido.get("purchase"), "selected_products"):
+        for product in [
+            selected.get("product"),
+            *_entities(selected, "added_components"),
+        ]:
+            if isinstance(product, dict) and product.get("id") is not None:
+                product_ids[product["id"]] = None
+    payment_ids = [
+        payment["id"]
+        for payment in _entities(pedido, "payments")
+        if payment.get("id") is not None
+    ]
+    payments, products = await asyncio.gather(
+        composition.parts("payment", "get_payment", "payment_id", payment_ids),
+        composition.parts("product", "get_item", "item_id", product_ids),
+    )
+    return {
+        "pedido": pedido,
+        "payments": payments,
+        "products": products,
+        "degraded": composition.degraded,
+    }
+
+
+@router.get(
+    "/{pedido_id}/full", name="get_pedido_full", response_model=PedidoFullSchema
+)
+async def get_pedido_full(request: Request, pedido_id: int):
+    """
+    The order with its payments and products in one document. Payments and
+    products that could not be fetched in time are listed in `degraded`.
+    """
+    return GatewayJSONResponse(
+        await compose_pedido(proxy_engine, request, pedido_id, COMPOSITION)
+    )
@@ -1,202 +1,198 @@
-import os
-from typing import List, Optional, Union
-from fastapi import APIRouter, HTTPException, Request, Response
-from loguru import logger
-import requests
+import asyncio
+from typing import Any, List, Optional, Union
 
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.proxy.composition import failure_reason
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine, proxy_engine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
 from src.adapters.driver.API.schemas.create_product_schema import CreateProductSchema
+from src.adapters.driver.API.schemas.produto_batch_schema import ProdutoBatchSchema
 from src.adapters.driver.API.schemas.update_product_schema import UpdateProductSchema
+from src.core.helpers.enums.body_validation import BodyValidation
+from src.core.helpers.enums.cache_scope import CacheScope
+from src.core.helpers.enums.priority_class import PriorityClass
 from src.core.domain.aggregates.produto_aggregate import ProdutoAggregate
 from src.core.domain.entities.categoria_entity import (
     CategoriaEntity,
 )
-
-router = APIRouter(
-    prefix="/produto",
-    tags=["Produtos"],
-)
-
-PRODUTO_BASE_URL = os.getenv("PRODUTO_BASE_URL", "http://localhost:8003/produto")
-
-
-@router.get("/categories")
-async def list_categories(
-    request: Request,
-) -> Union[List[CategoriaEntity], None]:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PRODUTO_BASE_URL}/categories",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=forwarded_headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/index")
-async def list_itens(
-    request: Request,
-    name: Optional[str] = None,
-    category: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-) -> Union[List[ProdutoAggregate], None]:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PRODUTO_BASE_URL}/index",
-            params={
-                "name": name,
-                "category": category,
-                "min_price": min_price,
-                "max_price": max_price,
-            },
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/{item_id}")
-async def get_item(request: Request, item_id: int) -> Union[ProdutoAggregate, None]:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{PRODUTO_BASE_URL}/{item_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
+from src.core.helpers.options.batch_options import BatchOptions
+from src.core.helpers.options.cache_options import CacheOptions
+from src.core.helpers.options.hedge_options import HedgeOptions
+from src.core.helpers.services.json_codec import json_codec
+
+PRODUTO_ROUTES = [
+    ProxyRoute(
+        name="list_categories",
+        method="GET",
+        path="/categories",
+        upstream="produto",
+        response_model=Union[List[CategoriaEntity], None],
+        hedge=HedgeOptions.from_env(),
+        priority=PriorityClass.SHEDDABLE,
+        coalesce=True,
+        cache=CacheOptions.from_env("PRODUTO_CATEGORIES", ttl=300),
+        fields=True,
+    ),
+    ProxyRoute(
+        name="list_itens",
+        method="GET",
+        path="/index",
+        upstream="produto",
+        query_params={
+            "name": (Optional[str], None),
+            "category": (Optional[str], None),
+            "min_price": (Optional[float], None),
+            "max_price": (Optional[float], None),
+        },
+        response_model=Union[List[ProdutoAggregate], None],
+        stream=True,
+        priority=PriorityClass.SHEDDABLE,
+        coalesce=True,
+        cache=CacheOptions.from_env("PRODUTO_INDEX", ttl=60, scope=CacheScope.PRIVATE),
+        fields=True,
+        normalize=True,
+    ),
+    ProxyRoute(
+        name="get_item",
+        method="GET",
+        path="/{item_id}",
+        upstream="produto",
+        path_params={"item_id": int},
+        response_model=Union[ProdutoAggregate, None],
+        hedge=HedgeOptions.from_env(),
+        priority=PriorityClass.SHEDDABLE,
+        cache=CacheOptions.from_env("PRODUTO_ITEM", ttl=60, scope=CacheScope.PRIVATE),
+        fields=True,
+    ),
+    ProxyRoute(
+        name="create_item",
+        method="POST",
+        path="/",
+        upstream="produto",
+        body=CreateProductSchema,
+        body_validation=BodyValidation.STRUCTURAL,
+        response_model=ProdutoAggregate,
+        status_code=201,
+    ),
+    ProxyRoute(
+        name="update_item",
+        method="PUT",
+        path="/",
+        upstream="produto",
+        body=UpdateProductSchema,
+        body_validation=BodyValidation.STRUCTURAL,
+        response_model=ProdutoAggregate,
+    ),
+    ProxyRoute(
+        name="delete_item",
+        method="DELETE",
+        path="/{item_id}",
+        upstream="produto",
+        path_params={"item_id": int},
+    ),
+    ProxyRoute(
+        name="activate_item",
+        method="PATCH",
+        path="/activate/{item_id}",
+        upstream="produto",
+        path_params={"item_id": int},
+        response_model=ProdutoAggregate,
+    ),
+    ProxyRoute(
+        name="deactivate_item",
+        method="PATCH",
+        path="/deactivate/{item_id}",
+        upstream="produto",
+        path_params={"item_id": int},
+        response_model=ProdutoAggregate,
+    ),
+]
+
+
+async def get_items(
+    engine: ProxyEngine, request: Request, ids: list[int], options: BatchOptions
+) -> list[dict[str, Any]]:
+    """The products of ``ids``, in order. Cached products are answered
+    locally and only the misses are fetched, at most ``options.concurrency``
+    at a time, filling the cache of ``get_item``."""
+    if len(ids) > options.max_requests:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {options.max_requests} products per request",
         )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.post("/", status_code=201)
-async def create_item(
-    request: Request, produto: CreateProductSchema
-) -> ProdutoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.post(
-            f"{PRODUTO_BASE_URL}/",
-            json=produto.model_dump(),
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.put("/")
-async def update_item(
-    request: Request, produto: UpdateProductSchema
-) -> ProdutoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.put(
-            f"{PRODUTO_BASE_URL}/",
-            json=produto.model_dump(),
-            headers=forwarded_headers,
+    deadline = engine.request_deadline(request, options.timeout)
+    semaphore = asyncio.Semaphore(options.concurrency)
+    found = {}
+    for item_id in ids:
+        if item_id not in found:
+            found[item_id] = engine.cached("get_item", request, {"item_id": item_id})
+
+    async def fetch(item_id: int):
+        async with semaphore:
+            return await engine.fetch(
+                "get_item", request, {"item_id": item_id}, deadline
+            )
+
+    misses = [item_id for item_id, shared in found.items() if shared is None]
+    results = await asyncio.gather(
+        *(fetch(item_id) for item_id in misses), return_exceptions=True
+    )
+    found.update(zip(misses, results))
+
+    items = []
+    for item_id in ids:
+        shared = found[item_id]
+        if isinstance(shared, Exception):
+            items.append(
+                {"id": item_id, "found": False, "error": failure_reason(shared)}
+            )
+        elif shared.status_code == 404:
+            items.append({"id": item_id, "found": False})
+        elif shared.status_code != 200:
+            items.append({"id": item_id, "found": False, "error": "error"})
+        else:
+            try:
+                item = json_codec.loads(shared.content)
+            except ValueError:
+                items.append(
+                    {"id": item_id, "found": False, "error": "invalid_payload"}
+                )
+                continue
+            items.append({"id": item_id, "found": True, "item": item})
+    return items
+
+
+def build_router(engine: ProxyEngine, batch: BatchOptions) -> APIRouter:
+    """The products router, proxying ``PRODUTO_ROUTES`` through ``engine``."""
+    router = APIRouter(
+        prefix="/produto",
+        tags=["Produtos"],
+    )
+
+    @router.get("/batch", name="get_items", response_model=ProdutoBatchSchema)
+    async def get_items_batch(
+        request: Request,
+        ids: List[str] = Query(
+            ..., description="Ids dos produtos, separados por vírgula ou repetidos"
+        ),
+    ):
+        """
+        Several products in one request, in the order of `ids`. Products that
+        do not exist come back with `found` false.
+        """
+        try:
+            item_ids = [int(item_id) for value in ids for item_id in value.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Ids must be integers")
+        return GatewayJSONResponse(
+            {"items": await get_items(engine, request, item_ids, batch)}
         )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
 
+    # Registered after the batch endpoint, which /{item_id} would shadow.
+    router.include_router(engine.build_router(PRODUTO_ROUTES))
+    return router
 
-@router.delete("/{item_id}")
-async def delete_item(request: Request, item_id: int):
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        requests.delete(
-            f"{PRODUTO_BASE_URL}/{item_id}",
-            headers=forwarded_headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
 
-
-@router.patch("/activate/{item_id}")
-async def activate_item(request: Request, item_id: int) -> ProdutoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PRODUTO_BASE_URL}/activate/{item_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.patch("/deactivate/{item_id}")
-async def deactivate_item(request: Request, item_id: int) -> ProdutoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.patch(
-            f"{PRODUTO_BASE_URL}/deactivate/{item_id}",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
+router = build_router(proxy_engine, BatchOptions.from_env())
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, Mapping, Optional
+from urllib.parse import urlencode
+
+import httpx
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.adapters.driven.upstream.proxy_headers import (
+    DEADLINE_HEADER,
+    filter_response_headers,
+)
+from src.adapters.driver.API.schemas.batch_schema import BatchSubRequestSchema
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.services.deadline import Deadline
+from src.core.helpers.services.json_codec import json_codec
+
+# Methods whose identical sub-requests read the same resource.
+DEDUPLICATED_METHODS = frozenset({"GET"})
+# ASGI scope key marking the requests a batch sends to the app.
+SUB_REQUEST_SCOPE_KEY = "gateway.batch_sub_request"
+
+
+class Batch:
+    """Runs the sub-requests of a batch against the gateway app itself.
+
+    Sub-requests go through routing, validation, cache and the resilience
+    of their routes without leaving the process. At most ``concurrency`` of
+    them run at a time, all within ``deadline``, and identical reads are
+    sent once. ``headers`` are applied to every sub-request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        base_url: str,
+        base_path: str,
+        headers: Mapping[str, str],
+        deadline: Deadline,
+        concurrency: int,
+        metrics: MetricsService,
+    ):
+        self.app = app
+        self.base_url = base_url
+        self.base_path = base_path
+        self.headers = dict(headers)
+        self.deadline = deadline
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.metrics = metrics
+
+    async def run(
+        self, requests: list[BatchSubRequestSchema], batch_path: str
+    ) -> list[dict[str, Any]]:
+        """The responses of ``requests``, in order. Sub-requests to
+        ``batch_path`` itself are refused, and are marked in their scope so
+        the batch endpoint refuses them however their path is spelled."""
+        transport = httpx.ASGITransport(
+            app=self._sub_request, raise_app_exceptions=False
+        )
+        base_url = httpx.URL(self.base_url)
+        async with httpx.AsyncClient(
+            transport=transport, base_url=self.base_url
+        ) as client:
+            calls: dict[str, asyncio.Task] = {}
+            pending = []
+            for sub_request in requests:
+                path = self.base_path + sub_request.path
+                # Joined to resolve dot segments, as the request will be.
+                target = base_url.join(path).path
+                if target.rstrip("/") == batch_path.rstrip("/"):
+                    pending.append(_done(_error(400, "Nested batches are refused")))
+                    continue
+                key = _read_key(sub_request, path)
+                if key is not None and key in calls:
+                    self.metrics.increment("batch_deduplicated")
+                    pending.append(calls[key])
+                    continue
+                call = asyncio.create_task(self._send(client, sub_request, path))
+                if key is not None:
+                    calls[key] = call
+                pending.append(call)
+            results = await asyncio.gather(*pending)
+        return [
+            {"id": sub_request.id, **result}
+            for sub_request, result in zip(requests, results)
+        ]
+
+    async def _sub_request(self, scope: Scope, receive: Receive, send: Send):
+        await self.app({**scope, SUB_REQUEST_SCOPE_KEY: True}, receive, send)
+
+    async def _send(
+        self, client: httpx.AsyncClient, sub_request: BatchSubRequestSchema, path: str
+    ) -> dict[str, Any]:
+        try:
+            async with asyncio.timeout(self.deadline.remaining()):
+                async with self.semaphore:
+                    headers = {
+                        **self.headers,
+                        DEADLINE_HEADER: str(int(self.deadline.remaining() * 1000)),
+                    }
+                    response = await client.request(
+                        sub_request.method,
+                        path,
+                        params=sub_request.query,
+                        json=sub_request.body,
+                        headers=headers,
+                    )
+        except TimeoutError:
+            self.metrics.increment("batch_timeouts")
+            return _error(504, "Deadline exceeded")
+        return {
+            "status": response.status_code,
+            "headers": filter_response_headers(response.headers),
+            "body": _decode(response),
+        }
+
+
+def _read_key(sub_request: BatchSubRequestSchema, path: str) -> Optional[str]:
+    if sub_request.method not in DEDUPLICATED_METHODS:
+        return None
+    query = urlencode(sorted(sub_request.query.items()), doseq=True)
+    return f"{sub_request.method} {path}?{query}"
+
+
+def _decode(response: httpx.Response) -> Any:
+    if not response.content:
+        return None
+    if "json" in response.headers.get("content-type", ""):
+        return json_codec.loads(response.content)
+    return response.text
+
+
+def _error(status: int, detail: str) -> dict[str, Any]:
+    return {"status": status, "headers": {}, "body": {"detail": detail}}
+
+
+def _done(result: dict[str, Any]) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
@@ -0,0 +1,72 @@
+from typing import Callable, Optional
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from src.core.helpers.enums.body_validation import BodyValidation
+from src.core.helpers.services.json_codec import json_codec
+
+BodyValidator = Callable[[bytes], None]
+
+
+def compile_body_validator(
+    model: type[BaseModel], mode: BodyValidation
+) -> Optional[BodyValidator]:
+    """Builds the check run on a raw request body before it is forwarded.
+
+    ``STRUCTURAL`` only makes sure the body is a JSON object carrying the
+    required fields of the model, leaving type checks to the upstream.
+    ``FULL`` validates the body against the model. Either way the original
+    bytes are forwarded, never a re-serialized copy.
+    """
+    if mode == BodyValidation.OFF:
+        return None
+    if mode == BodyValidation.FULL:
+        return lambda body: _validate_model(model, body)
+    required_fields = tuple(
+        field.alias or name
+        for name, field in model.model_fields.items()
+        if field.is_required()
+    )
+    return lambda body: _validate_structure(required_fields, body)
+
+
+def _validate_model(model: type[BaseModel], body: bytes) -> None:
+    try:
+        model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False, include_context=False)
+            ],
+            body=body,
+        )
+
+
+def _validate_structure(required_fields: tuple[str, ...], body: bytes) -> None:
+    try:
+        payload = json_codec.loads(body)
+    except ValueError:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body",), "msg": "Invalid JSON"}],
+            body=body,
+        )
+    if not isinstance(payload, dict):
+        raise RequestValidationError(
+            [
+                {
+                    "type": "model_attributes_type",
+                    "loc": ("body",),
+                    "msg": "Input should be a JSON object",
+                }
+            ],
+            body=body,
+        )
+    missing = [
+        {"type": "missing", "loc": ("body", field), "msg": "Field required"}
+        for field in required_fields
+        if field not in payload
+    ]
+    if missing:
+        raise RequestValidationError(missing, body=body)
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Returns once the client closes the connection.
+
+    Must only be used after the request body was read, otherwise the body
+    messages would be consumed here.
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Awaits ``awaitable``, cancelling it if the client goes away first.
+
+    Raises ClientDisconnected when the client disconnected, after the
+    cancellation of the pending work was delivered.
+    """
+    work = asyncio.ensure_future(awaitable)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait((work, disconnect), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+    if work.cancelled():
+        raise ClientDisconnected()
+    return work.result()
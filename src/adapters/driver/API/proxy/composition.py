@@ -0,0 +1,109 @@
+import asyncio
+from typing import Any, Iterable, Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from loguru import logger
+
+from src.adapters.driver.API.proxy.proxied_response import (
+    ProxiedResponse,
+    UpstreamPayloadError,
+)
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.core.helpers.services.bulkhead import BulkheadFull
+from src.core.helpers.services.circuit_breaker import CircuitOpenError
+from src.core.helpers.services.deadline import Deadline, DeadlineExceeded
+from src.core.helpers.services.json_codec import json_codec
+from src.core.helpers.services.load_shedder import LoadShed
+
+
+def failure_reason(error: Exception) -> str:
+    if isinstance(error, (TimeoutError, httpx.TimeoutException, DeadlineExceeded)):
+        return "timeout"
+    if isinstance(error, (CircuitOpenError, BulkheadFull, LoadShed)):
+        return "unavailable"
+    return "error"
+
+
+class Composition:
+    """Fetches the parts of a document composed from several routes.
+
+    The root part is required and its failures fail the request. Secondary
+    parts are fetched concurrently, each within ``part_timeout`` and the
+    request deadline; those that fail are left out and listed in
+    ``degraded`` instead.
+    """
+
+    def __init__(
+        self,
+        engine: ProxyEngine,
+        request: Request,
+        name: str,
+        deadline: Deadline,
+        part_timeout: float,
+    ):
+        self.engine = engine
+        self.request = request
+        self.name = name
+        self.deadline = deadline
+        self.part_timeout = part_timeout
+        self.degraded: list[dict[str, Any]] = []
+
+    async def root(self, route: str, params: dict[str, Any]) -> Any:
+        try:
+            shared = await self.engine.fetch(route, self.request, params, self.deadline)
+            if shared.status_code == 200:
+                return _decode(shared)
+        except Exception as e:
+            raise self.engine.http_error(self.engine.routes[route], e)
+        raise HTTPException(
+            status_code=shared.status_code, detail=_error_detail(shared)
+        )
+
+    async def part(
+        self, kind: str, route: str, params: dict[str, Any], part_id: Any
+    ) -> Optional[Any]:
+        """The decoded part, or None when it is degraded."""
+        deadline = Deadline(min(self.part_timeout, self.deadline.remaining()))
+        try:
+            shared = await self.engine.fetch(route, self.request, params, deadline)
+            if shared.status_code == 200:
+                return _decode(shared)
+        except Exception as e:
+            reason = failure_reason(e)
+            if reason == "error":
+                logger.warning(f"{self.name} part {kind} {part_id} failed: {e!r}")
+            self._degrade(kind, part_id, reason)
+            return None
+        reason = "not_found" if shared.status_code == 404 else "error"
+        self._degrade(kind, part_id, reason)
+        return None
+
+    async def parts(
+        self, kind: str, route: str, param: str, ids: Iterable[Any]
+    ) -> list[Any]:
+        """The parts fetched for each id, in order, without the degraded."""
+        results = await asyncio.gather(
+            *(self.part(kind, route, {param: part_id}, part_id) for part_id in ids)
+        )
+        return [result for result in results if result is not None]
+
+    def _degrade(self, kind: str, part_id: Any, reason: str) -> None:
+        self.engine.metrics.increment(
+            "composition_degraded_parts", route=self.name, part=kind, reason=reason
+        )
+        self.degraded.append({"part": kind, "id": part_id, "reason": reason})
+
+
+def _decode(shared: ProxiedResponse) -> Any:
+    try:
+        return json_codec.loads(shared.content)
+    except ValueError as e:
+        raise UpstreamPayloadError(f"Invalid JSON from upstream: {e}") from e
+
+
+def _error_detail(shared: ProxiedResponse) -> Any:
+    try:
+        return json_codec.loads(shared.content).get("detail")
+    except (ValueError, AttributeError):
+        return None
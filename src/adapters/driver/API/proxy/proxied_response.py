@@ -0,0 +1,213 @@
+import sys
+from typing import Any, Callable, Mapping, Optional
+
+import httpx
+from fastapi import Response
+
+from src.adapters.driven.upstream.proxy_headers import filter_response_headers
+from src.core.helpers.enums.cache_scope import CacheScope
+from src.core.helpers.enums.content_encoding import ContentEncoding
+from src.core.helpers.functions.etag import etag_matches, strong_etag, variant_etag
+from src.core.helpers.services.compression import Compression
+from src.core.helpers.services.json_codec import json_codec
+from src.core.helpers.services.normalization import Normalizer
+from src.core.helpers.services.projection import Projection
+
+# Headers that still describe the body in a 304 answer.
+NOT_MODIFIED_HEADERS = (
+    "cache-control",
+    "content-location",
+    "etag",
+    "expires",
+    "last-modified",
+    "vary",
+)
+# Transformed variants kept along a response, beyond which they are
+# recomputed on each use.
+MAX_VARIANTS = 16
+# Media type of the normalized representation of JSON documents.
+NORMALIZED_MEDIA_TYPE = "application/vnd.fastfood.normalized+json"
+
+
+class UpstreamPayloadError(Exception):
+    """The upstream answered with a JSON body that could not be decoded."""
+
+
+class ProxiedResponse:
+    """Immutable copy of a buffered upstream response, safe to share
+    between several gateway requests.
+
+    ``validators`` keeps the ETag and Last-Modified sent by the upstream
+    itself, which can be used to revalidate the response with it. Each
+    compressed, projected or normalized variant of the body is computed
+    once and kept along.
+    """
+
+    __slots__ = (
+        "status_code",
+        "headers",
+        "content",
+        "validators",
+        "_encoded",
+        "_variants",
+    )
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: dict[str, str],
+        content: bytes,
+        validators: Optional[dict[str, str]] = None,
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.validators = validators or {}
+        self._encoded: dict[ContentEncoding, bytes] = {}
+        self._variants: dict[str, ProxiedResponse] = {}
+
+    @classmethod
+    def from_upstream(
+        cls,
+        result: httpx.Response,
+        etag: bool = False,
+        content: Optional[bytes] = None,
+    ) -> "ProxiedResponse":
+        """Copies the upstream response, whose body is ``content`` when it
+        was streamed. With ``etag``, successful responses without an upstream
+        ETag get one computed from their body."""
+        if content is None:
+            content = result.content
+        headers = filter_response_headers(result.headers)
+        validators = {}
+        if "etag" in headers:
+            validators["if-none-match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["if-modified-since"] = headers["last-modified"]
+        if etag and result.status_code == 200 and "etag" not in headers:
+            headers["etag"] = strong_etag(content)
+        return cls(result.status_code, headers, content, validators)
+
+    def __sizeof__(self) -> int:
+        """Bytes held by the response, counting the encodings and variants
+        kept along."""
+        return (
+            object.__sizeof__(self)
+            + len(self.content)
+            + sum(len(name) + len(value) for name, value in self.headers.items())
+            + sum(len(body) for body in self._encoded.values())
+            + sum(sys.getsizeof(variant) for variant in self._variants.values())
+        )
+
+    def encoded(self, encoding: ContentEncoding, compression: Compression) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compression.compress(
+                self.content, encoding
+            )
+        return body
+
+    def projected(self, projection: Projection) -> "ProxiedResponse":
+        """The response with only the fields of ``projection`` left in its
+        JSON body. Other responses are returned as they are."""
+        return self._variant(f"fields:{projection.fields}", projection)
+
+    def normalized(self, normalizer: Normalizer) -> "ProxiedResponse":
+        """The response with the entities of its JSON body moved to an
+        ``included`` section. Other responses are returned as they are."""
+        return self._variant("normalized", normalizer, NORMALIZED_MEDIA_TYPE)
+
+    def _variant(
+        self,
+        key: str,
+        transform: Callable[[Any], Any],
+        content_type: Optional[str] = None,
+    ) -> "ProxiedResponse":
+        if self.status_code != 200 or "json" not in self.headers.get(
+            "content-type", ""
+        ):
+            return self
+        variant = self._variants.get(key)
+        if variant is None:
+            try:
+                document = json_codec.loads(self.content)
+            except ValueError as e:
+                raise UpstreamPayloadError(f"Invalid JSON from upstream: {e}") from e
+            content = json_codec.dumps(transform(document))
+            headers = dict(self.headers)
+            if "etag" in headers:
+                headers["etag"] = strong_etag(content)
+            if content_type is not None:
+                headers["content-type"] = content_type
+            variant = ProxiedResponse(self.status_code, headers, content)
+            if len(self._variants) < MAX_VARIANTS:
+                self._variants[key] = variant
+        return variant
+
+    def to_response(
+        self,
+        request_headers: Mapping[str, str],
+        headers: Optional[dict[str, str]] = None,
+        compression: Optional[Compression] = None,
+        vary: Optional[str] = None,
+    ) -> Response:
+        """Answers in the encoding negotiated with ``compression``, or with
+        304 and no body when the If-None-Match of the request matches.
+        ``vary`` names the request headers the answer also depends on."""
+        response_headers = dict(self.headers)
+        content = self.content
+        if vary is not None:
+            _add_vary(response_headers, vary)
+        if compression is not None and compression.compressible(
+            self.headers.get("content-type"), len(content)
+        ):
+            _add_vary(response_headers, "Accept-Encoding")
+            encoding = compression.negotiate(request_headers.get("accept-encoding"))
+            if encoding is not None:
+                content = self.encoded(encoding, compression)
+                response_headers["content-encoding"] = encoding.value
+                if "etag" in response_headers:
+                    response_headers["etag"] = variant_etag(
+                        response_headers["etag"], encoding.value
+                    )
+        if headers:
+            response_headers.update(headers)
+        if_none_match = request_headers.get("if-none-match")
+        if self.status_code == 200 and (
+            etag_matches(if_none_match, response_headers.get("etag"))
+            or etag_matches(if_none_match, self.headers.get("etag"))
+        ):
+            not_modified = {
+                key: response_headers[key]
+                for key in NOT_MODIFIED_HEADERS
+                if key in response_headers
+            }
+            return Response(
+                status_code=304, headers={**not_modified, **(headers or {})}
+            )
+        return Response(
+            content=content, status_code=self.status_code, headers=response_headers
+        )
+
+    def storable(self, scope: CacheScope) -> bool:
+        """Whether the response may be kept in the gateway cache. Responses
+        the upstream marks as private, or as varying with the caller, are
+        only kept per caller."""
+        cache_control = self.headers.get("cache-control", "").lower()
+        if (
+            self.status_code != 200
+            or "no-store" in cache_control
+            or "set-cookie" in self.headers
+        ):
+            return False
+        if scope is CacheScope.PRIVATE:
+            return True
+        vary = {
+            header.strip().lower() for header in self.headers.get("vary", "").split(",")
+        }
+        return "private" not in cache_control and not vary & {"authorization", "*"}
+
+
+def _add_vary(headers: dict[str, str], header: str) -> None:
+    vary = headers.get("vary")
+    headers["vary"] = f"{vary}, {header}" if vary else header
@@ -0,0 +1,1172 @@
+import asyncio
+import inspect
+import math
+import os
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlencode
+
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response, params
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import create_model_field
+from loguru import logger
+from starlette.background import BackgroundTask
+
+from src.adapters.driven.upstream.proxy_headers import (
+    DEADLINE_HEADER,
+    DECODABLE_ACCEPT_ENCODING,
+    REQUEST_EXCLUDED_HEADERS,
+    SHARED_REQUEST_EXCLUDED_HEADERS,
+    authorization_scope,
+    filter_raw_response_headers,
+    filter_response_headers,
+    forward_request_headers,
+)
+from src.adapters.driven.upstream.upstream_client import (
+    UpstreamClient,
+    UpstreamClients,
+    upstream_clients,
+)
+from src.adapters.driver.API.proxy.body_validators import compile_body_validator
+from src.adapters.driver.API.proxy.client_disconnect import (
+    ClientDisconnected,
+    cancel_on_disconnect,
+)
+from src.adapters.driver.API.proxy.proxied_response import (
+    NORMALIZED_MEDIA_TYPE,
+    ProxiedResponse,
+    UpstreamPayloadError,
+)
+from src.adapters.driver.API.proxy.proxy_route import SHARED_BODY_LIMIT, ProxyRoute
+from src.core.helpers.enums.cache_scope import CacheScope
+from src.core.helpers.functions.decorrelated_jitter import decorrelated_jitter
+from src.core.helpers.interfaces.chace_service import CacheService
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.compression_options import CompressionOptions
+from src.core.helpers.options.retry_options import RetryOptions
+from src.core.helpers.options.timeout_options import TimeoutOptions
+from src.core.helpers.services.bulkhead import Bulkhead, BulkheadFull
+from src.core.helpers.services.cache_entry import CacheEntry
+from src.core.helpers.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.core.helpers.services.compression import Compression
+from src.core.helpers.services.deadline import Deadline, DeadlineExceeded
+from src.core.helpers.services.in_memory_cache import InMemoryCacheService
+from src.core.helpers.services.load_shedder import LoadShed
+from src.core.helpers.services.latency_tracker import LatencyTracker
+from src.core.helpers.services.normalization import Normalizer, compile_normalizer
+from src.core.helpers.services.projection import Projection, compile_projection
+from src.core.helpers.services.retry_budget import RetryBudget
+from src.core.helpers.services.singleflight import SingleFlight
+
+# Non standard status, logged when the client went away before the response.
+CLIENT_CLOSED_REQUEST = 499
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+# Tells whether the response came from the gateway cache.
+CACHE_STATUS_HEADER = "x-cache"
+# Query parameter of the fields to keep in the response of ``fields`` routes.
+FIELDS_PARAM = "fields"
+# Query flag asking ``normalize`` routes for the normalized representation.
+NORMALIZE_PARAM = "normalize"
+
+
+class SharedBodyTooLarge(Exception):
+    """The upstream body is over the size a shared route buffers."""
+
+
+async def _read_raw(result: httpx.Response) -> Optional[bytes]:
+    """The upstream body as it was sent, or None when the transport handed
+    the response over already read, and so decoded."""
+    if result.is_stream_consumed:
+        return None
+    return b"".join([chunk async for chunk in result.aiter_raw()])
+
+
+def _encoded(result: httpx.Response) -> bool:
+    """Whether the upstream body is in a content encoding."""
+    return result.headers.get("content-encoding", "identity").lower() != "identity"
+
+
+async def _stream_body(result: httpx.Response, decoded: bool = False):
+    """Yields the upstream body, undecoded unless ``decoded``, one chunk at
+    a time.
+
+    Each chunk is only pulled from the upstream after the previous one was
+    handed to the client, so a slow client slows the upstream read down
+    instead of piling chunks up in memory.
+    """
+    try:
+        if result.is_stream_consumed:
+            # In-memory transports hand over responses that were already read.
+            yield result.content
+            return
+        chunks = result.aiter_bytes() if decoded else result.aiter_raw()
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await result.aclose()
+
+
+class ProxyAPIRoute(APIRoute):
+    """Route that documents the body model of a proxy endpoint.
+
+    Proxy endpoints read the request body as raw bytes, so FastAPI must not
+    parse it. The body field is attached after the request handler is built,
+    which keeps the OpenAPI document as if the model was a regular body.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        body_model = getattr(endpoint, "raw_body_model", None)
+        if body_model is not None:
+            self.body_field = create_model_field(
+                name="body",
+                type_=body_model,
+                field_info=params.Body(annotation=body_model),
+            )
+
+
+class CompiledRoute:
+    """A ProxyRoute resolved once at startup into what the hot path needs."""
+
+    __slots__ = (
+        "route",
+        "name",
+        "method",
+        "upstream",
+        "upstream_path",
+        "path_names",
+        "query_names",
+        "body_names",
+        "defaults",
+        "timeout",
+        "stream",
+        "shared_body_limit",
+        "upstream_stream",
+        "coalesce",
+        "cache",
+        "shared",
+        "fields",
+        "fields_hint",
+        "normalizer",
+        "etag",
+        "excluded_headers",
+        "has_body",
+        "body_validator",
+        "breaker",
+        "bulkhead",
+        "priority",
+        "retry",
+        "hedge",
+        "latency",
+    )
+
+    def __init__(
+        self,
+        route: ProxyRoute,
+        upstream: UpstreamClient,
+        metrics: Optional[MetricsService] = None,
+        timeout: Optional[TimeoutOptions] = None,
+    ):
+        self.route = route
+        self.name = route.name
+        self.method = route.method.upper()
+        self.upstream = upstream
+        self.upstream_path = (
+            route.path if route.upstream_path is None else route.upstream_path
+        )
+        self.path_names = tuple(route.path_params)
+        self.query_names = tuple(
+            name for name in route.query_params if name not in route.body_from_query
+        )
+        self.body_names = route.body_from_query
+        self.defaults = {
+            name: default
+            for name, (_, default) in route.query_params.items()
+            if default is not ...
+        }
+        self.timeout = route.timeout or timeout or TimeoutOptions()
+        self.coalesce = route.coalesce and self.method == "GET"
+        self.cache = route.cache if self.method == "GET" else None
+        # Shared and cached responses are buffered once for every request.
+        self.shared = self.coalesce or self.cache is not None
+        self.fields = route.fields and self.method == "GET"
+        self.fields_hint = route.fields_hint if self.fields else None
+        self.normalizer = (
+            compile_normalizer(route.response_model)
+            if route.normalize and self.method == "GET"
+            else None
+        )
+        # Shared routes still read a streamed body chunk by chunk, to stop
+        # buffering it past ``shared_body_limit``.
+        self.stream = route.stream
+        self.shared_body_limit = route.shared_body_limit
+        self.etag = self.method == "GET"
+        if self.shared:
+            # Bodies too large to be shared are streamed decoded.
+            self.excluded_headers = SHARED_REQUEST_EXCLUDED_HEADERS
+        else:
+            # Unshared bodies are forwarded in the encoding the caller
+            # accepts, read raw from a stream even when buffered.
+            self.excluded_headers = REQUEST_EXCLUDED_HEADERS
+        self.upstream_stream = self.stream or not self.shared
+        self.has_body = route.body is not None
+        self.body_validator = (
+            compile_body_validator(route.body, route.body_validation)
+            if self.has_body
+            else None
+        )
+        self.breaker = (
+            CircuitBreaker(route.name, route.circuit_breaker, metrics)
+            if route.circuit_breaker is not None
+            else None
+        )
+        self.bulkhead = (
+            Bulkhead(route.name, route.bulkhead, metrics)
+            if route.bulkhead is not None
+            else None
+        )
+        self.priority = route.priority
+        self.retry = (
+            self.method in IDEMPOTENT_METHODS if route.retry is None else route.retry
+        )
+        self.hedge = route.hedge
+        self.latency = LatencyTracker(route.hedge.window) if route.hedge else None
+
+    def hedge_delay(self) -> float:
+        if len(self.latency) < self.hedge.min_samples:
+            return self.hedge.initial_delay
+        return min(
+            self.hedge.max_delay,
+            max(self.hedge.min_delay, self.latency.percentile(self.hedge.percentile)),
+        )
+
+    def build_timeout(self, remaining: float) -> httpx.Timeout:
+        connect = min(self.timeout.connect, remaining)
+        read = min(self.timeout.read, remaining)
+        return httpx.Timeout(read, connect=connect, pool=connect)
+
+    def build_upstream_path(self, params: dict[str, Any]) -> str:
+        if not self.path_names:
+            return self.upstream_path
+        return self.upstream_path.format_map(params)
+
+    def projection(self, params: dict[str, Any]) -> Optional[Projection]:
+        """The projection asked for by the request, if any."""
+        if not self.fields or params.get(FIELDS_PARAM) is None:
+            return None
+        return compile_projection(params[FIELDS_PARAM])
+
+    def requested_normalizer(
+        self, request: Request, params: dict[str, Any]
+    ) -> Optional[Normalizer]:
+        """The normalizer, when the request asks for the normalized
+        representation with the query flag or its media type."""
+        if self.normalizer is None:
+            return None
+        accept = request.headers.get("accept", "")
+        if params.get(NORMALIZE_PARAM) or NORMALIZED_MEDIA_TYPE in accept:
+            return self.normalizer
+        return None
+
+    def transformed(self, request: Request, params: dict[str, Any]) -> bool:
+        """Whether the response is projected or normalized, which buffers
+        the body of ``stream`` routes."""
+        return (
+            self.projection(params) is not None
+            or self.requested_normalizer(request, params) is not None
+        )
+
+    def upstream_query(self, params: dict[str, Any]) -> dict[str, Any]:
+        query = {name: params[name] for name in self.query_names}
+        if self.fields_hint is not None:
+            projection = self.projection(params)
+            if projection is not None:
+                query[self.fields_hint] = projection.fields
+        return query
+
+    def normalized_query(self, params: dict[str, Any]) -> tuple:
+        """Query as sent upstream: None values dropped, sorted by name."""
+        return tuple(
+            sorted(
+                (name, str(value))
+                for name, value in self.upstream_query(params).items()
+                if value is not None
+            )
+        )
+
+    def request_key(self, params: dict[str, Any], request: Request) -> tuple:
+        """Identifies requests that get the same upstream answer."""
+        return (
+            self.name,
+            self.build_upstream_path(params),
+            self.normalized_query(params),
+            authorization_scope(request.headers),
+        )
+
+    def cache_key(self, params: dict[str, Any], request: Request) -> str:
+        """Cache entry of the request, per caller for PRIVATE routes."""
+        scope = (
+            authorization_scope(request.headers)
+            if self.cache.scope is CacheScope.PRIVATE
+            else ""
+        )
+        path = self.build_upstream_path(params)
+        query = urlencode(self.normalized_query(params))
+        return f"{self.name}:{path}?{query}#{scope}"
+
+    def build_request(
+        self, params: dict[str, Any], body: Optional[bytes] = None
+    ) -> dict[str, Any]:
+        options = {}
+        query = self.upstream_query(params)
+        if query:
+            options["params"] = query
+        if self.body_names:
+            options["json"] = {name: params[name] for name in self.body_names}
+        elif body is not None:
+            options["content"] = body
+        return options
+
+
+class ProxyEngine:
+    """Compiles route tables into FastAPI routers that forward to upstreams."""
+
+    def __init__(
+        self,
+        upstreams: UpstreamClients,
+        metrics: Optional[MetricsService] = None,
+        retry: Optional[RetryOptions] = None,
+        timeout: Optional[TimeoutOptions] = None,
+        cache: Optional[CacheService] = None,
+        compression: Optional[CompressionOptions] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.upstreams = upstreams
+        self.metrics = metrics or upstreams.metrics
+        self.cache = (
+            cache
+            if cache is not None
+            else InMemoryCacheService(start_cleaner_deamon=False)
+        )
+        self.compression = Compression(compression) if compression else None
+        self.clock = clock
+        self.timeout = timeout or TimeoutOptions()
+        self.retry = retry or RetryOptions()
+        self.retry_budget = RetryBudget(self.retry)
+        self.singleflight = SingleFlight()
+        self.routes: dict[str, CompiledRoute] = {}
+        self._revalidations: dict[str, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        await self.upstreams.start()
+
+    async def close(self) -> None:
+        revalidations = list(self._revalidations.values())
+        for task in revalidations:
+            task.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+        await self.upstreams.close()
+
+    def compile(self, route: ProxyRoute) -> CompiledRoute:
+        compiled = CompiledRoute(
+            route, self.upstreams.get(route.upstream), self.metrics, self.timeout
+        )
+        self.routes[route.name] = compiled
+        return compiled
+
+    def build_router(self, routes: list[ProxyRoute], **router_options) -> APIRouter:
+        router = APIRouter(route_class=ProxyAPIRoute, **router_options)
+        for route in routes:
+            compiled = self.compile(route)
+            router.add_api_route(
+                route.path,
+                self._build_endpoint(compiled),
+                methods=[compiled.method],
+                name=route.name,
+                response_model=route.response_model,
+                status_code=route.status_code,
+            )
+        return router
+
+    def circuit_breakers(self) -> dict[str, dict]:
+        return {
+            "upstreams": self.upstreams.circuit_breakers(),
+            "routes": {
+                name: compiled.breaker.snapshot()
+                for name, compiled in self.routes.items()
+                if compiled.breaker is not None
+            },
+        }
+
+    async def dispatch(
+        self, compiled: CompiledRoute, request: Request, params: dict[str, Any]
+    ) -> Response:
+        deadline = self.request_deadline(request, compiled.timeout.total)
+        try:
+            compiled.projection(params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        body = None
+        if compiled.has_body:
+            body = await request.body()
+            if compiled.body_validator is not None:
+                compiled.body_validator(body)
+        if deadline.expired():
+            self.metrics.increment("deadline_exceeded", route=compiled.name)
+            raise HTTPException(status_code=504, detail="Deadline exceeded")
+        try:
+            return await cancel_on_disconnect(
+                request, self.forward(compiled, request, params, body, deadline)
+            )
+        except ClientDisconnected:
+            self.metrics.increment("client_disconnects", route=compiled.name)
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+    async def forward(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        body: Optional[bytes],
+        deadline: Deadline,
+    ) -> Response:
+        """Answers with the upstream response, which is streamed for
+        ``stream`` routes unless it is projected or normalized. The deadline
+        bounds the wait for the response headers, not the time spent
+        streaming the body.
+
+        Other unshared routes forward the caller's Accept-Encoding and pass
+        an encoded upstream body through as is; only identity bodies are
+        compressed by the gateway, and only projected or normalized ones are
+        decoded.
+
+        Shared ``stream`` routes answer each request with its own streamed
+        call when the upstream body is over ``shared_body_limit``."""
+        try:
+            if compiled.shared:
+                try:
+                    return await self._forward_shared(
+                        compiled, request, params, deadline
+                    )
+                except SharedBodyTooLarge:
+                    return await self._forward_unshared(
+                        compiled, request, params, deadline
+                    )
+            async with asyncio.timeout(deadline.remaining()):
+                transformed = compiled.transformed(request, params)
+                result = await self.send(
+                    compiled,
+                    request,
+                    params,
+                    body,
+                    deadline,
+                    (
+                        {"accept-encoding": DECODABLE_ACCEPT_ENCODING}
+                        if transformed
+                        else None
+                    ),
+                )
+                if transformed or not compiled.stream:
+                    try:
+                        if transformed:
+                            await result.aread()
+                        else:
+                            content = await _read_raw(result)
+                    finally:
+                        await result.aclose()
+            if transformed:
+                shared = ProxiedResponse.from_upstream(result, etag=compiled.etag)
+                return self._respond(compiled, shared, request, params)
+            if compiled.stream:
+                return StreamingResponse(
+                    _stream_body(result),
+                    status_code=result.status_code,
+                    headers=filter_raw_response_headers(result.headers),
+                    background=BackgroundTask(result.aclose),
+                )
+            if content is not None and _encoded(result):
+                # Passed through as the upstream encoded it, ETag included.
+                return Response(
+                    content=content,
+                    status_code=result.status_code,
+                    headers=filter_raw_response_headers(result.headers),
+                )
+            shared = ProxiedResponse.from_upstream(
+                result, etag=compiled.etag, content=content
+            )
+            return self._respond(compiled, shared, request, params)
+        except Exception as e:
+            raise self.http_error(compiled, e)
+
+    async def _forward_shared(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+    ) -> Response:
+        if compiled.cache is not None:
+            shared, headers = await self._cached(compiled, request, params, deadline)
+            return self._respond(compiled, shared, request, params, headers)
+        async with asyncio.timeout(deadline.remaining()):
+            shared = await self._coalesced(
+                compiled,
+                request,
+                params,
+                lambda shared_deadline: self._fetch(
+                    compiled, request, params, shared_deadline
+                ),
+            )
+        return self._respond(compiled, shared, request, params)
+
+    async def _forward_unshared(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+    ) -> Response:
+        """Streams the decoded body of a call of the request alone, buffered
+        only when it is projected or normalized."""
+        async with asyncio.timeout(deadline.remaining()):
+            result = await self.send(compiled, request, params, None, deadline)
+            if compiled.transformed(request, params):
+                try:
+                    await result.aread()
+                finally:
+                    await result.aclose()
+                shared = ProxiedResponse.from_upstream(result, etag=compiled.etag)
+                return self._respond(compiled, shared, request, params)
+        return StreamingResponse(
+            _stream_body(result, decoded=True),
+            status_code=result.status_code,
+            headers=filter_response_headers(result.headers),
+            background=BackgroundTask(result.aclose),
+        )
+
+    def http_error(self, compiled: CompiledRoute, error: Exception) -> HTTPException:
+        """The answer to give when calling the route failed with ``error``."""
+        if isinstance(error, DeadlineExceeded):
+            self.metrics.increment("deadline_exceeded", route=compiled.name)
+            return HTTPException(status_code=504, detail=str(error))
+        if isinstance(error, (TimeoutError, httpx.TimeoutException)):
+            self.metrics.increment(
+                "upstream_timeouts",
+                route=compiled.name,
+                upstream=compiled.upstream.name,
+            )
+            logger.warning(f"{compiled.name} timed out: {error!r}")
+            return HTTPException(status_code=504, detail="Upstream timed out")
+        if isinstance(error, LoadShed):
+            return HTTPException(
+                status_code=503,
+                detail=str(error),
+                headers={"Retry-After": str(error.retry_after)},
+            )
+        if isinstance(error, BulkheadFull):
+            return HTTPException(
+                status_code=503, detail=str(error), headers={"Retry-After": "1"}
+            )
+        if isinstance(error, CircuitOpenError):
+            self.metrics.increment("circuit_breaker_rejections", breaker=error.name)
+            return HTTPException(
+                status_code=503,
+                detail=str(error),
+                headers={"Retry-After": str(math.ceil(error.retry_after))},
+            )
+        if isinstance(error, UpstreamPayloadError):
+            self.metrics.increment(
+                "upstream_invalid_payloads",
+                route=compiled.name,
+                upstream=compiled.upstream.name,
+            )
+            logger.warning(f"{compiled.name} got an invalid payload: {error!r}")
+            return HTTPException(status_code=502, detail="Invalid upstream response")
+        logger.exception(error)
+        if isinstance(error, (ValueError, AttributeError)):
+            return HTTPException(status_code=400, detail=str(error))
+        return HTTPException(status_code=500, detail=str(error))
+
+    async def _cached(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+    ) -> tuple[ProxiedResponse, dict[str, str]]:
+        """Answers from the cache, or from the upstream on a miss while
+        storing the response for the next requests, along with the headers
+        telling how the cache was used.
+
+        Expired entries are still served while they are refreshed in the
+        background during the stale-while-revalidate window, and instead of
+        upstream failures during the stale-if-error window."""
+        options = compiled.cache
+        key = compiled.cache_key(params, request)
+        entry: Optional[CacheEntry] = self.cache.get(key)
+        now = self.clock()
+        hit = self._lookup(compiled, request, params, key, entry, now)
+        if hit is not None:
+            return hit
+        self.metrics.increment("cache_lookups", route=compiled.name, result="miss")
+        stale = (
+            entry
+            if entry is not None and entry.is_usable(now, options.stale_if_error)
+            else None
+        )
+        try:
+            async with asyncio.timeout(deadline.remaining()):
+                fresh = await self._refresh(
+                    compiled, request, params, deadline, key, entry
+                )
+        except SharedBodyTooLarge:
+            raise
+        except Exception as e:
+            if stale is None:
+                raise
+            logger.warning(f"{compiled.name} served stale after: {e!r}")
+            return self._stale_on_error(compiled, stale, now)
+        if fresh.status_code >= 500 and stale is not None:
+            return self._stale_on_error(compiled, stale, now)
+        return fresh, {CACHE_STATUS_HEADER: "MISS"}
+
+    def cached(
+        self, name: str, request: Request, params: dict[str, Any]
+    ) -> Optional[ProxiedResponse]:
+        """The response of a cached GET route when the cache can answer it
+        without calling the upstream, None otherwise."""
+        compiled = self.routes[name]
+        if compiled.cache is None:
+            return None
+        params = {**compiled.defaults, **params}
+        key = compiled.cache_key(params, request)
+        hit = self._lookup(
+            compiled, request, params, key, self.cache.get(key), self.clock()
+        )
+        return None if hit is None else hit[0]
+
+    def _lookup(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        key: str,
+        entry: Optional[CacheEntry],
+        now: float,
+    ) -> Optional[tuple[ProxiedResponse, dict[str, str]]]:
+        """Answers from ``entry`` while it is fresh or may be served while
+        revalidated, None on a miss."""
+        if entry is None:
+            return None
+        options = compiled.cache
+        if entry.is_fresh(now, options.early_expiration):
+            return self._from_cache(compiled, entry, now, "hit")
+        if entry.is_usable(now, options.stale_while_revalidate):
+            self._revalidate(compiled, request, params, key, entry)
+            # Entries refreshed early are not stale yet.
+            result = "hit" if entry.is_fresh(now) else "stale"
+            return self._from_cache(compiled, entry, now, result)
+        return None
+
+    def _respond(
+        self,
+        compiled: CompiledRoute,
+        shared: ProxiedResponse,
+        request: Request,
+        params: dict[str, Any],
+        headers: Optional[dict[str, str]] = None,
+    ) -> Response:
+        """Answers with ``shared`` in the representation asked for."""
+        projection = compiled.projection(params)
+        if projection is not None:
+            shared = shared.projected(projection)
+        normalizer = compiled.requested_normalizer(request, params)
+        if normalizer is not None:
+            shared = shared.normalized(normalizer)
+        return shared.to_response(
+            request.headers,
+            headers,
+            self.compression,
+            vary="Accept" if compiled.normalizer is not None else None,
+        )
+
+    def _from_cache(
+        self, compiled: CompiledRoute, entry: CacheEntry, now: float, result: str
+    ) -> tuple[ProxiedResponse, dict[str, str]]:
+        self.metrics.increment("cache_lookups", route=compiled.name, result=result)
+        return entry.value, {
+            CACHE_STATUS_HEADER: result.upper(),
+            "age": str(int(entry.age(now))),
+        }
+
+    def _stale_on_error(
+        self, compiled: CompiledRoute, entry: CacheEntry, now: float
+    ) -> tuple[ProxiedResponse, dict[str, str]]:
+        self.metrics.increment("cache_stale_on_error", route=compiled.name)
+        return entry.value, {
+            CACHE_STATUS_HEADER: "STALE",
+            "age": str(int(entry.age(now))),
+        }
+
+    async def _refresh(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+        key: str,
+        entry: Optional[CacheEntry],
+    ) -> ProxiedResponse:
+        """Fetches the response from the upstream and caches it if allowed.
+
+        A previous entry carrying upstream validators is revalidated with a
+        conditional GET, and kept as is when the upstream answers 304."""
+
+        async def refresh(deadline: Deadline) -> ProxiedResponse:
+            started_at = self.clock()
+            if entry is not None and entry.value.validators:
+                result = await self.send(
+                    compiled,
+                    request,
+                    params,
+                    None,
+                    deadline,
+                    headers=entry.value.validators,
+                )
+                not_modified = result.status_code == 304
+                if not_modified:
+                    await result.aclose()
+                self.metrics.increment(
+                    "cache_revalidations",
+                    route=compiled.name,
+                    result="not_modified" if not_modified else "modified",
+                )
+                fresh = (
+                    entry.value
+                    if not_modified
+                    else await self._buffer(compiled, result)
+                )
+            else:
+                fresh = await self._fetch(compiled, request, params, deadline)
+            if fresh.storable(compiled.cache.scope):
+                now = self.clock()
+                self.cache.set(
+                    key,
+                    CacheEntry(fresh, now, compiled.cache.ttl, now - started_at),
+                    compiled.cache.retention,
+                )
+            return fresh
+
+        if compiled.coalesce:
+            return await self._coalesced(compiled, request, params, refresh)
+        return await refresh(deadline)
+
+    def _revalidate(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        key: str,
+        entry: CacheEntry,
+    ) -> None:
+        """Refreshes the entry in the background, once at a time per key."""
+        if key in self._revalidations:
+            return
+
+        async def revalidate():
+            deadline = Deadline(compiled.timeout.total)
+            try:
+                async with asyncio.timeout(deadline.remaining()):
+                    await self._refresh(compiled, request, params, deadline, key, entry)
+            except Exception as e:
+                self.metrics.increment(
+                    "cache_revalidation_failures", route=compiled.name
+                )
+                logger.warning(f"{compiled.name} revalidation failed: {e!r}")
+            finally:
+                self._revalidations.pop(key, None)
+
+        self._revalidations[key] = asyncio.ensure_future(revalidate())
+
+    async def fetch(
+        self,
+        name: str,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+    ) -> ProxiedResponse:
+        """Calls a GET route from within the gateway, going through its cache,
+        coalescing and resilience policies like a client request would.
+
+        ``params`` only needs the values differing from the route defaults.
+        Failures are raised, to be turned into answers with ``http_error``.
+        """
+        compiled = self.routes[name]
+        params = {**compiled.defaults, **params}
+        if compiled.cache is not None:
+            shared, _ = await self._cached(compiled, request, params, deadline)
+            return shared
+        async with asyncio.timeout(deadline.remaining()):
+            if compiled.coalesce:
+                return await self._coalesced(
+                    compiled,
+                    request,
+                    params,
+                    lambda shared_deadline: self._fetch(
+                        compiled, request, params, shared_deadline
+                    ),
+                )
+            return await self._fetch(compiled, request, params, deadline)
+
+    async def _fetch(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        deadline: Deadline,
+    ) -> ProxiedResponse:
+        # Unshared routes forward the caller's encodings, which the gateway
+        # may not be able to decode.
+        headers = (
+            None if compiled.shared else {"accept-encoding": DECODABLE_ACCEPT_ENCODING}
+        )
+        result = await self.send(compiled, request, params, None, deadline, headers)
+        return await self._buffer(compiled, result)
+
+    async def _buffer(
+        self, compiled: CompiledRoute, result: httpx.Response
+    ) -> ProxiedResponse:
+        """Copies the upstream response to share it. Streamed bodies are read
+        up to ``shared_body_limit``, past which SharedBodyTooLarge is raised
+        to every request sharing the call."""
+        if not compiled.upstream_stream:
+            return ProxiedResponse.from_upstream(result, etag=compiled.etag)
+        if not compiled.stream:
+            try:
+                await result.aread()
+            finally:
+                await result.aclose()
+            return ProxiedResponse.from_upstream(result, etag=compiled.etag)
+        content = bytearray()
+        try:
+            async for chunk in result.aiter_bytes():
+                content += chunk
+                if len(content) > compiled.shared_body_limit:
+                    self.metrics.increment("shared_body_too_large", route=compiled.name)
+                    raise SharedBodyTooLarge(
+                        f"{compiled.name} body over {compiled.shared_body_limit} bytes"
+                    )
+        finally:
+            await result.aclose()
+        return ProxiedResponse.from_upstream(
+            result, etag=compiled.etag, content=bytes(content)
+        )
+
+    async def _coalesced(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        fetch: Callable[[Deadline], Awaitable[ProxiedResponse]],
+    ) -> ProxiedResponse:
+        """Joins the identical request already in flight, if any, or runs
+        ``fetch`` for it.
+
+        The call gets the route's own deadline rather than the one of the
+        request starting it: each request waits within its own deadline, and
+        the call is only cancelled once all of them gave up."""
+        shared, followed = await self.singleflight.do(
+            compiled.request_key(params, request),
+            lambda: fetch(Deadline(compiled.timeout.total)),
+        )
+        self.metrics.increment(
+            "coalescing_requests",
+            route=compiled.name,
+            role="follower" if followed else "leader",
+        )
+        followers = self.metrics.get(
+            "coalescing_requests", route=compiled.name, role="follower"
+        )
+        leaders = self.metrics.get(
+            "coalescing_requests", route=compiled.name, role="leader"
+        )
+        self.metrics.set_gauge(
+            "coalescing_ratio", followers / (followers + leaders), route=compiled.name
+        )
+        return shared
+
+    async def send(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        body: Optional[bytes],
+        deadline: Deadline,
+        headers: Optional[dict[str, str]] = None,
+    ) -> httpx.Response:
+        """Calls the upstream, retrying transport errors and 502/503/504
+        answers of idempotent requests while the retry budget and the
+        deadline allow."""
+        if compiled.bulkhead is None:
+            return await self._send_with_retries(
+                compiled, request, params, body, deadline, headers
+            )
+        await compiled.bulkhead.acquire(compiled.priority)
+        try:
+            return await self._send_with_retries(
+                compiled, request, params, body, deadline, headers
+            )
+        finally:
+            compiled.bulkhead.release()
+
+    async def _send_with_retries(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        body: Optional[bytes],
+        deadline: Deadline,
+        headers: Optional[dict[str, str]] = None,
+    ) -> httpx.Response:
+        retry = compiled.retry or IDEMPOTENCY_KEY_HEADER in request.headers
+        self.retry_budget.record_request()
+        attempt = 1
+        delay = 0.0
+        while True:
+            error = result = None
+            try:
+                result = await self._attempt(
+                    compiled, request, params, body, deadline, headers
+                )
+            except httpx.TransportError as e:
+                if not retry:
+                    raise
+                error = e
+            else:
+                if not retry or result.status_code not in RETRYABLE_STATUS_CODES:
+                    return result
+            delay = decorrelated_jitter(
+                delay, self.retry.base_delay, self.retry.max_delay
+            )
+            if not self._can_retry(compiled, attempt, deadline.remaining() - delay):
+                if error is not None:
+                    raise error
+                return result
+            if result is not None:
+                await result.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _can_retry(
+        self, compiled: CompiledRoute, attempt: int, time_left: float
+    ) -> bool:
+        if attempt >= self.retry.max_attempts or time_left <= 0:
+            return False
+        if not self.retry_budget.try_acquire():
+            self.metrics.increment("retry_budget_exhausted", route=compiled.name)
+            return False
+        self.metrics.increment(
+            "upstream_retries", route=compiled.name, upstream=compiled.upstream.name
+        )
+        return True
+
+    async def _attempt(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        body: Optional[bytes],
+        deadline: Deadline,
+        headers: Optional[dict[str, str]] = None,
+    ) -> httpx.Response:
+        breaker = compiled.breaker
+        if breaker is None:
+            return await self._send(compiled, request, params, body, deadline, headers)
+        breaker.acquire()
+        started_at = monotonic()
+        try:
+            result = await self._send(
+                compiled, request, params, body, deadline, headers
+            )
+        except httpx.TransportError:
+            breaker.record_failure(monotonic() - started_at)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        if result.status_code >= 500:
+            breaker.record_failure(monotonic() - started_at)
+        else:
+            breaker.record_success(monotonic() - started_at)
+        return result
+
+    async def _send(
+        self,
+        compiled: CompiledRoute,
+        request: Request,
+        params: dict[str, Any],
+        body: Optional[bytes],
+        deadline: Deadline,
+        headers: Optional[dict[str, str]] = None,
+    ) -> httpx.Response:
+        deadline.check()
+        remaining = deadline.remaining()
+        options = compiled.build_request(params, body)
+        options["priority"] = compiled.priority
+        options["headers"] = forward_request_headers(
+            request.headers, compiled.excluded_headers
+        )
+        if headers:
+            options["headers"].update(headers)
+        options["headers"][DEADLINE_HEADER] = str(int(remaining * 1000))
+        options["timeout"] = compiled.build_timeout(remaining)
+        path = compiled.build_upstream_path(params)
+        if compiled.hedge is None:
+            return await compiled.upstream.request(
+                compiled.method, path, stream=compiled.upstream_stream, **options
+            )
+        started_at = monotonic()
+        result = await self._hedged(compiled, path, options)
+        compiled.latency.record(monotonic() - started_at)
+        return result
+
+    async def _hedged(
+        self, compiled: CompiledRoute, path: str, options: dict[str, Any]
+    ) -> httpx.Response:
+        """Sends a second attempt to another replica when the first one is
+        slower than the route usually is. The first answer wins and the
+        other attempt is cancelled, or closed if it also answered."""
+        upstream = compiled.upstream
+
+        def attempt(instance) -> asyncio.Future:
+            return asyncio.ensure_future(
+                upstream.request(
+                    compiled.method,
+                    path,
+                    stream=compiled.upstream_stream,
+                    instance=instance,
+                    **options,
+                )
+            )
+
+        primary_instance = upstream.pick()
+        attempts = [attempt(primary_instance)]
+        winner = attempts[0]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=compiled.hedge_delay())
+            if done:
+                return winner.result()
+            hedge_instance = upstream.pick(exclude=(primary_instance,))
+            if hedge_instance is None or not self.retry_budget.try_acquire():
+                return await winner
+            self.metrics.increment("hedged_requests", route=compiled.name)
+            attempts.append(attempt(hedge_instance))
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in attempts:
+                    if task in done and task.exception() is None:
+                        winner = task
+                        if task is not attempts[0]:
+                            self.metrics.increment("hedge_wins", route=compiled.name)
+                        return task.result()
+            # Both attempts failed, report the first one's error.
+            return attempts[0].result()
+        finally:
+            for task in attempts:
+                task.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+            for task in attempts:
+                if task is winner or task.cancelled() or task.exception():
+                    continue
+                await task.result().aclose()
+
+    def request_deadline(self, request: Request, timeout: float) -> Deadline:
+        """``timeout`` from now, shortened by the caller's own deadline."""
+        deadline = Deadline(timeout)
+        caller_timeout = request.headers.get(DEADLINE_HEADER)
+        if caller_timeout is not None:
+            try:
+                deadline.shorten(int(caller_timeout) / 1000)
+            except ValueError:
+                pass
+        return deadline
+
+    def _build_endpoint(self, compiled: CompiledRoute):
+        async def endpoint(request: Request, **params):
+            return await self.dispatch(compiled, request, params)
+
+        endpoint.__name__ = compiled.name
+        endpoint.raw_body_model = compiled.route.body
+        endpoint.__signature__ = self._build_signature(compiled.route)
+        return endpoint
+
+    @staticmethod
+    def _build_signature(route: ProxyRoute) -> inspect.Signature:
+        parameters = [
+            inspect.Parameter(
+                "request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request
+            )
+        ]
+        for name, annotation in route.path_params.items():
+            parameters.append(
+                inspect.Parameter(
+                    name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation
+                )
+            )
+        for name, (annotation, default) in route.query_params.items():
+            parameters.append(
+                inspect.Parameter(
+                    name,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=annotation,
+                    default=inspect.Parameter.empty if default is ... else default,
+                )
+            )
+        if route.normalize and route.method.upper() == "GET":
+            parameters.append(
+                inspect.Parameter(
+                    NORMALIZE_PARAM,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=bool,
+                    default=Query(
+                        False,
+                        description="Entidades repetidas uma só vez, em `included`",
+                    ),
+                )
+            )
+        if route.fields and route.method.upper() == "GET":
+            parameters.append(
+                inspect.Parameter(
+                    FIELDS_PARAM,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=Optional[str],
+                    default=Query(
+                        None,
+                        description="Campos a manter na resposta, separados por "
+                        "vírgula, com caminhos aninhados separados por ponto",
+                    ),
+                )
+            )
+        return inspect.Signature(parameters)
+
+
+proxy_engine = ProxyEngine(
+    upstream_clients,
+    retry=RetryOptions.from_env(),
+    timeout=TimeoutOptions.from_env(),
+    cache=InMemoryCacheService(
+        max_entries=int(os.getenv("GATEWAY_CACHE_MAX_ENTRIES", "1000")),
+        max_bytes=int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        max_entry_bytes=int(
+            os.getenv("GATEWAY_CACHE_MAX_ENTRY_BYTES", str(SHARED_BODY_LIMIT))
+        ),
+    ),
+    compression=CompressionOptions.from_env(),
+)
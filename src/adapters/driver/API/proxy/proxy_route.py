@@ -0,0 +1,86 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.core.helpers.enums.body_validation import BodyValidation
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.options.cache_options import CacheOptions
+from src.core.helpers.options.circuit_breaker_options import CircuitBreakerOptions
+from src.core.helpers.options.hedge_options import HedgeOptions
+from src.core.helpers.options.timeout_options import TimeoutOptions
+
+# Bytes of a streamed body buffered at most to share it between requests.
+SHARED_BODY_LIMIT = 1024 * 1024
+
+
+class ProxyRoute(BaseModel):
+    """A gateway endpoint that is forwarded to an upstream service.
+
+    ``path_params`` maps each path parameter to its type and ``query_params``
+    maps each query parameter to an ``(annotation, default)`` pair, using
+    ``...`` as default for required parameters. Query parameters listed in
+    ``body_from_query`` are sent upstream as a JSON body instead of a query
+    string. The upstream path template defaults to the gateway path.
+
+    The request body is forwarded as received. ``body`` documents its schema
+    and ``body_validation`` decides how much of it is checked beforehand.
+
+    Routes with ``stream`` enabled forward the upstream body chunk by chunk,
+    without decoding it, instead of buffering it in memory. GET routes with
+    ``coalesce`` share one upstream call between identical concurrent
+    requests; their body is buffered once for all of them instead. GET
+    routes with ``cache`` answer from the gateway cache while the upstream
+    response is fresh, which also buffers their body. Shared ``stream``
+    routes buffer at most ``shared_body_limit`` bytes: larger bodies are
+    neither shared nor cached, and each request streams its own call.
+
+    GET routes with ``fields`` accept a ``fields`` query parameter listing
+    the dotted paths to keep in the JSON response, like ``id,price.value``.
+    ``fields_hint`` names the upstream query parameter the projection is
+    also sent as, for services able to trim their response themselves.
+
+    GET routes with ``normalize`` answer with the entities nested in their
+    ``response_model`` moved to an ``included`` section, each one once, when
+    asked with the ``normalize`` query flag or the normalized media type in
+    Accept. Streamed routes buffer projected and normalized responses.
+
+    Every upstream has its own circuit breaker; ``circuit_breaker`` adds one
+    for the route alone, checked before the upstream one. Likewise
+    ``bulkhead`` caps the concurrent calls of the route within the cap of
+    its upstream. Under overload SHEDDABLE routes are turned away first,
+    then STANDARD ones, while CRITICAL routes keep being served.
+
+    Failed calls are retried when ``retry`` is set, which defaults to true
+    for GET, HEAD and OPTIONS, or when the request has an Idempotency-Key.
+    Routes with ``hedge`` send a second attempt to another replica when the
+    first one is slow. ``timeout`` replaces the engine timeouts for the route.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    name: str
+    method: str
+    path: str
+    upstream: str
+    upstream_path: Optional[str] = None
+    path_params: dict[str, Any] = Field(default_factory=dict)
+    query_params: dict[str, tuple[Any, Any]] = Field(default_factory=dict)
+    body_from_query: tuple[str, ...] = ()
+    body: Optional[type[BaseModel]] = None
+    body_validation: BodyValidation = BodyValidation.FULL
+    response_model: Any = None
+    status_code: Optional[int] = None
+    timeout: Optional[TimeoutOptions] = None
+    stream: bool = False
+    shared_body_limit: int = Field(default=SHARED_BODY_LIMIT, gt=0)
+    coalesce: bool = False
+    cache: Optional[CacheOptions] = None
+    fields: bool = False
+    fields_hint: Optional[str] = None
+    normalize: bool = False
+    circuit_breaker: Optional[CircuitBreakerOptions] = None
+    bulkhead: Optional[BulkheadOptions] = None
+    priority: PriorityClass = PriorityClass.STANDARD
+    retry: Optional[bool] = None
+    hedge: Optional[HedgeOptions] = None
@@ -1,64 +1,37 @@
-import os
 from typing import List, Union
-from fastapi import APIRouter, HTTPException, Request, Response
-from loguru import logger
-import requests
 
+from src.adapters.driver.API.proxy.proxy_engine import proxy_engine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
+from src.core.helpers.enums.priority_class import PriorityClass
 from src.core.domain.aggregates.pedido_aggregate import PedidoAggregate
 
-router = APIRouter(
+QUEUE_ROUTES = [
+    ProxyRoute(
+        name="get_queue",
+        method="GET",
+        path="/",
+        upstream="queue",
+        response_model=Union[List[PedidoAggregate], None],
+    ),
+    ProxyRoute(
+        name="update_queue_item_status",
+        method="PUT",
+        path="/",
+        upstream="queue",
+        query_params={
+            "pedido_id": (int, ...),
+            "new_status_number": (int, ...),
+        },
+        body_from_query=("pedido_id", "new_status_number"),
+        # Setting the same status twice leaves the queue as after the first.
+        retry=True,
+        response_model=PedidoAggregate,
+        priority=PriorityClass.CRITICAL,
+    ),
+]
+
+router = proxy_engine.build_router(
+    QUEUE_ROUTES,
     prefix="/queue",
     tags=["Fila de Pedidos"],
 )
-
-QUEUE_BASE_URL = os.getenv("QUEUE_BASE_URL", "http://localhost:8001/queue")
-
-
-@router.get("/")
-async def get_queue(
-    request: Request,
-) -> Union[List[PedidoAggregate], None]:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.get(
-            f"{QUEUE_BASE_URL}/",
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.put("/")
-async def update_queue_item_status(
-    request: Request, pedido_id: int, new_status_number: int
-) -> PedidoAggregate:
-    try:
-        forwarded_headers = {key: value for key, value in request.headers.items()}
-        result = requests.put(
-            f"{QUEUE_BASE_URL}/",
-            json={
-                "pedido_id": pedido_id,
-                "new_status_number": new_status_number,
-            },
-            headers=forwarded_headers,
-        )
-        return Response(
-            content=result.content,
-            status_code=result.status_code,
-            headers=result.headers,
-        )
-    except (ValueError, AttributeError) as e:
-        logger.exception(e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,34 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, field_validator
+
+QueryValue = Union[str, int, float, bool, List[Union[str, int, float, bool]]]
+
+
+class BatchSubRequestSchema(BaseModel):
+    id: Optional[str] = None
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str
+    query: Dict[str, QueryValue] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+    @field_validator("path")
+    def validate_path(cls, path):
+        if not path.startswith("/") or path.startswith("//"):
+            raise ValueError("O caminho deve ser relativo ao gateway.")
+        return path
+
+
+class BatchSchema(BaseModel):
+    requests: List[BatchSubRequestSchema] = Field(min_length=1)
+
+
+class BatchSubResponseSchema(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponseSchema(BaseModel):
+    responses: List[BatchSubResponseSchema]
@@ -0,0 +1,20 @@
+from typing import List, Union
+
+from pydantic import BaseModel
+
+from src.core.domain.aggregates.pagamento_aggregate import PagamentoAggregate
+from src.core.domain.aggregates.pedido_aggregate import PedidoAggregate
+from src.core.domain.aggregates.produto_aggregate import ProdutoAggregate
+
+
+class DegradedPartSchema(BaseModel):
+    part: str
+    id: Union[int, str]
+    reason: str
+
+
+class PedidoFullSchema(BaseModel):
+    pedido: PedidoAggregate
+    payments: List[PagamentoAggregate]
+    products: List[ProdutoAggregate]
+    degraded: List[DegradedPartSchema]
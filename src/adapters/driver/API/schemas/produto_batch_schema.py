@@ -0,0 +1,16 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.core.domain.aggregates.produto_aggregate import ProdutoAggregate
+
+
+class ProdutoBatchItemSchema(BaseModel):
+    id: int
+    found: bool
+    item: Optional[ProdutoAggregate] = None
+    error: Optional[str] = None
+
+
+class ProdutoBatchSchema(BaseModel):
+    items: List[ProdutoBatchItemSchema]
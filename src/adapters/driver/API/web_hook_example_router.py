@@ -1,7 +1,7 @@
-import json
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 from src.adapters.driver.API.schemas.web_hook_example_schema import WebHookExampleSchema
+from src.core.helpers.services.json_codec import json_codec
 
 router = APIRouter(
     prefix="/example/webhook",
@@ -14,7 +14,7 @@ async def initiate_payment(event: WebHookExampleSchema) -> None:
     try:
         logger.info("Received webhook event")
         logger.info(event)
-        body = json.loads(event.message)
+        body = json_codec.loads(event.message)
         logger.success("extracted body")
         logger.success(body)
 
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class BalancingAlgorithm(Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_OUTSTANDING = "least_outstanding"
+    P2C_EWMA = "p2c_ewma"
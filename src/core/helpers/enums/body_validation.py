@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class BodyValidation(Enum):
+    OFF = "off"
+    STRUCTURAL = "structural"
+    FULL = "full"
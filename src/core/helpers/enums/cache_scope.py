@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class CacheScope(Enum):
+    """Who may be served a cached response."""
+
+    PUBLIC = "public"
+    PRIVATE = "private"
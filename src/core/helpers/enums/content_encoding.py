@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class ContentEncoding(Enum):
+    """Response compressions, preferred first when the client accepts
+    several of them equally."""
+
+    ZSTD = "zstd"
+    BROTLI = "br"
+    GZIP = "gzip"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class LimitAlgorithm(Enum):
+    AIMD = "aimd"
+    GRADIENT = "gradient"
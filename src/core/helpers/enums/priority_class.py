@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class PriorityClass(Enum):
+    """Importance of a route under overload, most important first."""
+
+    CRITICAL = "critical"
+    STANDARD = "standard"
+    SHEDDABLE = "sheddable"
@@ -0,0 +1,14 @@
+import random
+from typing import Optional
+
+
+def decorrelated_jitter(
+    previous: float,
+    base: float,
+    cap: float,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """Next backoff delay, random between ``base`` and three times the
+    previous delay, capped at ``cap``."""
+    upper = max(base, previous * 3)
+    return min(cap, (rng or random).uniform(base, upper))
@@ -0,0 +1,28 @@
+import hashlib
+from typing import Optional
+
+
+def strong_etag(content: bytes) -> str:
+    """Strong validator of a body: equal bodies always get equal tags."""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Evaluates If-None-Match, which uses the weak comparison of RFC 9110."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == target for tag in if_none_match.split(",")
+    )
+
+
+def variant_etag(etag: str, suffix: str) -> str:
+    """Tag of another representation of the same body, such as a
+    compressed one, which must not share the strong tag of the original."""
+    weak = etag.startswith("W/")
+    opaque = etag.removeprefix("W/")
+    tag = f'{opaque[:-1]}-{suffix}"' if opaque.endswith('"') else f"{opaque}-{suffix}"
+    return f"W/{tag}" if weak else tag
@@ -0,0 +1,29 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def json_default(value: Any) -> Any:
+    """JSON form of the values the JSON libraries do not know, matching
+    FastAPI's encoder: decimals with a fractional part become floats and
+    whole ones ints, enums their value, dates ISO 8601 strings, bytes text
+    and pydantic models what they dump in JSON mode. Exceptions, found in
+    the context of validation errors, become their message."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, BaseException):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
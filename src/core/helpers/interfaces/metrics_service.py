@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+
+
+class MetricsService(ABC):
+    @abstractmethod
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+    @abstractmethod
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, name: str, **labels: str) -> float:
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> dict:
+        pass
@@ -0,0 +1,49 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from src.core.helpers.enums.limit_algorithm import LimitAlgorithm
+
+
+class AdaptiveLimitOptions(BaseModel):
+    """Concurrency limit adjusted from the observed round trip times.
+
+    The baseline is the lowest RTT seen in the last ``baseline_window``
+    seconds. Every ``batch_size`` calls the mean RTT of the batch is
+    compared to it: AIMD adds one slot while the mean stays within
+    ``tolerance`` times the baseline and multiplies the limit by
+    ``backoff_ratio`` otherwise; GRADIENT scales the limit by the ratio
+    between both, plus a small queue allowance. Both back off when a call
+    is dropped (timeout, connection error, 503 or 504).
+    """
+
+    algorithm: LimitAlgorithm = LimitAlgorithm.GRADIENT
+    initial_limit: int = Field(default=20, gt=0)
+    min_limit: int = Field(default=1, gt=0)
+    max_limit: int = Field(default=200, gt=0)
+    tolerance: float = Field(default=1.5, ge=1)
+    backoff_ratio: float = Field(default=0.9, gt=0, lt=1)
+    smoothing: float = Field(default=0.2, gt=0, le=1)
+    batch_size: int = Field(default=10, gt=0)
+    baseline_window: int = Field(default=30, gt=0)
+
+    @classmethod
+    def from_env(cls, env_prefix: str) -> Optional["AdaptiveLimitOptions"]:
+        """Reads ``<PREFIX>_ADAPTIVE_LIMIT`` (``aimd``, ``gradient`` or
+        ``off``) and the limits, falling back to ``UPSTREAM_*``. Returns None
+        when it is ``off``."""
+
+        def read(setting: str, default: str) -> str:
+            return os.getenv(
+                f"{env_prefix}_{setting}", os.getenv(f"UPSTREAM_{setting}", default)
+            )
+
+        algorithm = read("ADAPTIVE_LIMIT", LimitAlgorithm.GRADIENT.value)
+        if algorithm == "off":
+            return None
+        return cls(
+            algorithm=LimitAlgorithm(algorithm),
+            initial_limit=int(read("INITIAL_LIMIT", "20")),
+            max_limit=int(read("MAX_LIMIT", "200")),
+        )
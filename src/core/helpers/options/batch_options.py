@@ -0,0 +1,24 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class BatchOptions(BaseModel):
+    """Limits of the batch endpoints.
+
+    A batch carries at most ``max_requests`` sub-requests or ids, runs at
+    most ``concurrency`` upstream calls at a time and must be answered within
+    ``timeout`` seconds; what is still running then is answered as timed out.
+    """
+
+    max_requests: int = Field(default=50, gt=0)
+    concurrency: int = Field(default=8, gt=0)
+    timeout: float = Field(default=10.0, gt=0)
+
+    @classmethod
+    def from_env(cls) -> "BatchOptions":
+        return cls(
+            max_requests=int(os.getenv("GATEWAY_BATCH_MAX_REQUESTS", "50")),
+            concurrency=int(os.getenv("GATEWAY_BATCH_CONCURRENCY", "8")),
+            timeout=float(os.getenv("GATEWAY_BATCH_TIMEOUT", "10")),
+        )
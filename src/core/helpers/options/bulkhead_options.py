@@ -0,0 +1,31 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class BulkheadOptions(BaseModel):
+    """Concurrency cap of one upstream or route.
+
+    Calls above ``max_concurrent`` wait in a queue of at most ``max_queue``
+    calls, for at most ``queue_timeout`` seconds, before being rejected.
+    """
+
+    max_concurrent: int = Field(default=100, gt=0)
+    max_queue: int = Field(default=100, ge=0)
+    queue_timeout: float = Field(default=1.0, gt=0)
+
+    @classmethod
+    def from_env(cls, env_prefix: str) -> "BulkheadOptions":
+        """Reads ``<PREFIX>_MAX_CONCURRENT``, ``<PREFIX>_MAX_QUEUE`` and
+        ``<PREFIX>_QUEUE_TIMEOUT``, falling back to ``UPSTREAM_*``."""
+
+        def read(setting: str, default: str) -> str:
+            return os.getenv(
+                f"{env_prefix}_{setting}", os.getenv(f"UPSTREAM_{setting}", default)
+            )
+
+        return cls(
+            max_concurrent=int(read("MAX_CONCURRENT", "100")),
+            max_queue=int(read("MAX_QUEUE", "100")),
+            queue_timeout=float(read("QUEUE_TIMEOUT", "1")),
+        )
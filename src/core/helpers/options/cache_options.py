@@ -0,0 +1,57 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from src.core.helpers.enums.cache_scope import CacheScope
+
+
+class CacheOptions(BaseModel):
+    """Response cache of one GET route.
+
+    Successful responses are kept for ``ttl`` seconds. PUBLIC entries are
+    shared by every caller, PRIVATE entries only by callers sending the
+    same Authorization header.
+
+    For ``stale_while_revalidate`` seconds after expiring an entry is still
+    served while it is refreshed in the background, and for
+    ``stale_if_error`` seconds it is served when the upstream fails.
+    ``early_expiration`` scales how early hot entries may be refreshed
+    before they expire; 0 disables it.
+    """
+
+    ttl: int = Field(gt=0)
+    scope: CacheScope = CacheScope.PUBLIC
+    stale_while_revalidate: int = Field(default=0, ge=0)
+    stale_if_error: int = Field(default=0, ge=0)
+    early_expiration: float = Field(default=1.0, ge=0)
+
+    @property
+    def retention(self) -> int:
+        """Seconds an entry is kept, counting the stale windows."""
+        return self.ttl + max(self.stale_while_revalidate, self.stale_if_error)
+
+    @classmethod
+    def from_env(
+        cls, env_prefix: str, ttl: int, scope: CacheScope = CacheScope.PUBLIC
+    ) -> Optional["CacheOptions"]:
+        """Reads ``<PREFIX>_CACHE_TTL``, returning None when it is 0, and
+        ``<PREFIX>_CACHE_STALE_WHILE_REVALIDATE``,
+        ``<PREFIX>_CACHE_STALE_IF_ERROR`` and
+        ``<PREFIX>_CACHE_EARLY_EXPIRATION``, falling back to ``UPSTREAM_*``."""
+
+        def read(setting: str, default: str) -> str:
+            return os.getenv(
+                f"{env_prefix}_{setting}", os.getenv(f"UPSTREAM_{setting}", default)
+            )
+
+        ttl = int(os.getenv(f"{env_prefix}_CACHE_TTL", str(ttl)))
+        if ttl <= 0:
+            return None
+        return cls(
+            ttl=ttl,
+            scope=scope,
+            stale_while_revalidate=int(read("CACHE_STALE_WHILE_REVALIDATE", "30")),
+            stale_if_error=int(read("CACHE_STALE_IF_ERROR", "300")),
+            early_expiration=float(read("CACHE_EARLY_EXPIRATION", "1")),
+        )
@@ -0,0 +1,42 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class CircuitBreakerOptions(BaseModel):
+    """Thresholds of a circuit breaker, evaluated over a rolling window.
+
+    The circuit opens once ``window`` seconds hold at least ``min_requests``
+    calls and either the failure rate reaches ``error_rate_threshold`` or the
+    rate of calls slower than ``slow_call_time`` reaches
+    ``slow_call_rate_threshold``. After ``open_time`` seconds it lets
+    ``half_open_calls`` trial calls through, closing again when all of them
+    succeed.
+    """
+
+    window: int = Field(default=10, gt=0)
+    min_requests: int = Field(default=20, gt=0)
+    error_rate_threshold: float = Field(default=0.5, gt=0, le=1)
+    slow_call_time: float = Field(default=5.0, gt=0)
+    slow_call_rate_threshold: float = Field(default=0.8, gt=0, le=1)
+    open_time: float = Field(default=30.0, gt=0)
+    half_open_calls: int = Field(default=3, gt=0)
+
+    @classmethod
+    def from_env(cls, env_prefix: str) -> "CircuitBreakerOptions":
+        """Reads ``<PREFIX>_CB_*``, falling back to ``UPSTREAM_CB_*``."""
+
+        def read(setting: str, default: str) -> str:
+            return os.getenv(
+                f"{env_prefix}_CB_{setting}",
+                os.getenv(f"UPSTREAM_CB_{setting}", default),
+            )
+
+        return cls(
+            window=int(read("WINDOW", "10")),
+            min_requests=int(read("MIN_REQUESTS", "20")),
+            error_rate_threshold=float(read("ERROR_RATE", "0.5")),
+            slow_call_time=float(read("SLOW_CALL_TIME", "5")),
+            slow_call_rate_threshold=float(read("SLOW_CALL_RATE", "0.8")),
+            open_time=float(read("OPEN_TIME", "30")),
+        )
@@ -0,0 +1,22 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class CompositionOptions(BaseModel):
+    """Deadlines of the endpoints composed from several routes.
+
+    The whole document must be ready within ``timeout`` seconds, and each
+    secondary part within ``part_timeout`` seconds. Parts missing their
+    deadline are left out and reported as degraded.
+    """
+
+    timeout: float = Field(default=5.0, gt=0)
+    part_timeout: float = Field(default=2.0, gt=0)
+
+    @classmethod
+    def from_env(cls) -> "CompositionOptions":
+        return cls(
+            timeout=float(os.getenv("GATEWAY_COMPOSITION_TIMEOUT", "5")),
+            part_timeout=float(os.getenv("GATEWAY_COMPOSITION_PART_TIMEOUT", "2")),
+        )
@@ -0,0 +1,31 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class CompressionOptions(BaseModel):
+    """Compression of gateway responses.
+
+    Only bodies of at least ``min_size`` bytes whose media type starts with
+    one of ``content_types``, or is a ``+json`` type, are compressed.
+    """
+
+    min_size: int = Field(default=1024, ge=0)
+    content_types: tuple[str, ...] = (
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/",
+    )
+    gzip_level: int = Field(default=6, ge=1, le=9)
+    brotli_quality: int = Field(default=4, ge=0, le=11)
+    zstd_level: int = Field(default=3, ge=1, le=22)
+
+    @classmethod
+    def from_env(cls) -> Optional["CompressionOptions"]:
+        """Returns None when ``GATEWAY_COMPRESSION`` is ``false``."""
+        if os.getenv("GATEWAY_COMPRESSION", "true").lower() == "false":
+            return None
+        return cls(min_size=int(os.getenv("GATEWAY_COMPRESSION_MIN_SIZE", "1024")))
@@ -0,0 +1,31 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class HedgeOptions(BaseModel):
+    """Hedging of slow idempotent calls.
+
+    When the first attempt has not answered after the ``percentile`` of the
+    last ``window`` latencies of the route, clamped between ``min_delay``
+    and ``max_delay``, a second attempt is sent to another replica. Until
+    ``min_samples`` latencies are known ``initial_delay`` is used instead.
+    """
+
+    percentile: float = Field(default=0.95, gt=0, lt=1)
+    window: int = Field(default=200, gt=0)
+    min_samples: int = Field(default=20, gt=0)
+    initial_delay: float = Field(default=0.1, gt=0)
+    min_delay: float = Field(default=0.01, ge=0)
+    max_delay: float = Field(default=1.0, gt=0)
+
+    @classmethod
+    def from_env(cls) -> Optional["HedgeOptions"]:
+        """Returns None when ``UPSTREAM_HEDGING`` is ``false``."""
+        if os.getenv("UPSTREAM_HEDGING", "true").lower() == "false":
+            return None
+        return cls(
+            percentile=float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "0.95")),
+            max_delay=float(os.getenv("UPSTREAM_HEDGE_MAX_DELAY", "1")),
+        )
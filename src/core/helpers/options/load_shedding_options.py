@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class LoadSheddingOptions(BaseModel):
+    """CoDel-style shedding on the wait of a bulkhead queue.
+
+    When the shortest wait seen over an ``interval`` stays above ``target``
+    seconds, the queue is standing rather than absorbing a burst: SHEDDABLE
+    calls that would have to wait are rejected. After ``escalation``
+    intervals in a row STANDARD calls are rejected too. CRITICAL calls are
+    never shed.
+    """
+
+    target: float = Field(default=0.005, gt=0)
+    interval: float = Field(default=0.1, gt=0)
+    escalation: int = Field(default=5, gt=0)
+    retry_after: int = Field(default=1, ge=0)
+
+    @classmethod
+    def from_env(cls) -> Optional["LoadSheddingOptions"]:
+        """Returns None when ``UPSTREAM_LOAD_SHEDDING`` is ``false``."""
+        if os.getenv("UPSTREAM_LOAD_SHEDDING", "true").lower() == "false":
+            return None
+        return cls(
+            target=float(os.getenv("UPSTREAM_SHED_TARGET", "0.005")),
+            interval=float(os.getenv("UPSTREAM_SHED_INTERVAL", "0.1")),
+        )
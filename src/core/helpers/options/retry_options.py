@@ -0,0 +1,33 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class RetryOptions(BaseModel):
+    """Retries of idempotent upstream calls.
+
+    Each call is tried at most ``max_attempts`` times, sleeping a
+    decorrelated jitter delay between ``base_delay`` and ``max_delay``
+    between attempts. Retries share a budget: over the last
+    ``budget_window`` seconds they may add ``budget_ratio`` of the
+    requests, plus ``min_retries_per_second`` so quiet services can retry.
+    """
+
+    max_attempts: int = Field(default=3, gt=0)
+    base_delay: float = Field(default=0.025, ge=0)
+    max_delay: float = Field(default=1.0, ge=0)
+    budget_ratio: float = Field(default=0.1, ge=0)
+    min_retries_per_second: float = Field(default=1.0, ge=0)
+    budget_window: int = Field(default=10, gt=0)
+
+    @classmethod
+    def from_env(cls) -> "RetryOptions":
+        return cls(
+            max_attempts=int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.025")),
+            max_delay=float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "1")),
+            budget_ratio=float(os.getenv("UPSTREAM_RETRY_BUDGET", "0.1")),
+            min_retries_per_second=float(
+                os.getenv("UPSTREAM_RETRY_MIN_PER_SECOND", "1")
+            ),
+        )
@@ -0,0 +1,23 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class TimeoutOptions(BaseModel):
+    """Timeouts of an upstream call, in seconds.
+
+    ``connect`` and ``read`` bound each attempt, ``total`` is the deadline of
+    the whole gateway request, retries and hedges included.
+    """
+
+    connect: float = Field(default=2.0, gt=0)
+    read: float = Field(default=10.0, gt=0)
+    total: float = Field(default=15.0, gt=0)
+
+    @classmethod
+    def from_env(cls) -> "TimeoutOptions":
+        return cls(
+            connect=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "2")),
+            read=float(os.getenv("UPSTREAM_READ_TIMEOUT", "10")),
+            total=float(os.getenv("UPSTREAM_TIMEOUT", "15")),
+        )
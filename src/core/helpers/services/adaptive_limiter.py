@@ -0,0 +1,105 @@
+import math
+from collections import deque
+from time import monotonic
+from typing import Callable, Optional
+
+from src.core.helpers.enums.limit_algorithm import LimitAlgorithm
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.adaptive_limit_options import AdaptiveLimitOptions
+from src.core.helpers.services.bulkhead import Bulkhead
+
+
+class AdaptiveLimiter:
+    """Drives the limit of a bulkhead from the RTT of the calls it admits.
+
+    Keeping the limit where the RTT stays near its no-load baseline leaves
+    the excess waiting in the bulkhead queue, where it times out quickly,
+    instead of piling up inside the upstream service.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options: AdaptiveLimitOptions,
+        bulkhead: Bulkhead,
+        metrics: Optional[MetricsService] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.name = name
+        self.options = options
+        self.bulkhead = bulkhead
+        self.metrics = metrics
+        self.clock = clock
+        self.limit = float(options.initial_limit)
+        # One [second, lowest rtt] bucket per second.
+        self._baseline: deque[list] = deque()
+        self._batch_rtt = 0.0
+        self._batch_samples = 0
+        self._batch_dropped = False
+        self._batch_in_flight = 0
+        self._apply()
+
+    def on_sample(self, rtt: float, in_flight: int, dropped: bool = False) -> None:
+        """Records one finished call; ``in_flight`` includes the call."""
+        if not dropped:
+            self._record_baseline(rtt)
+            self._batch_rtt += rtt
+            self._batch_samples += 1
+        self._batch_dropped = self._batch_dropped or dropped
+        self._batch_in_flight = max(self._batch_in_flight, in_flight)
+        if dropped or self._batch_samples >= self.options.batch_size:
+            self._update()
+
+    def baseline(self) -> float:
+        oldest = int(self.clock()) - self.options.baseline_window
+        while self._baseline and self._baseline[0][0] <= oldest:
+            self._baseline.popleft()
+        return min((rtt for _, rtt in self._baseline), default=0.0)
+
+    def _record_baseline(self, rtt: float) -> None:
+        second = int(self.clock())
+        if self._baseline and self._baseline[-1][0] == second:
+            self._baseline[-1][1] = min(self._baseline[-1][1], rtt)
+        else:
+            self._baseline.append([second, rtt])
+
+    def _update(self) -> None:
+        limit = self.limit
+        if self._batch_dropped:
+            limit *= self.options.backoff_ratio
+        elif self._batch_samples:
+            rtt = self._batch_rtt / self._batch_samples
+            baseline = self.baseline()
+            # A limit the traffic doesn't reach says nothing about capacity.
+            saturated = self._batch_in_flight * 2 >= limit
+            if self.options.algorithm is LimitAlgorithm.AIMD:
+                if rtt > baseline * self.options.tolerance:
+                    limit *= self.options.backoff_ratio
+                elif saturated:
+                    limit += 1
+            else:
+                gradient = max(
+                    0.5, min(1.0, self.options.tolerance * baseline / max(rtt, 1e-9))
+                )
+                # Room for a short queue, so the limit can probe upwards.
+                target = limit * gradient + max(1.0, math.log10(limit))
+                if not saturated:
+                    target = min(target, limit)
+                limit = (
+                    1 - self.options.smoothing
+                ) * limit + self.options.smoothing * target
+        self.limit = min(
+            float(self.options.max_limit), max(float(self.options.min_limit), limit)
+        )
+        self._batch_rtt = 0.0
+        self._batch_samples = 0
+        self._batch_dropped = False
+        self._batch_in_flight = 0
+        self._apply()
+
+    def _apply(self) -> None:
+        self.bulkhead.limit = int(self.limit)
+        if self.metrics is not None:
+            self.metrics.set_gauge(
+                "concurrency_limit", int(self.limit), upstream=self.name
+            )
@@ -0,0 +1,138 @@
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import Optional
+
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.services.load_shedder import LoadShedder
+
+
+class BulkheadFull(Exception):
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"Too many concurrent calls to {name}")
+        self.name = name
+        self.reason = reason
+
+
+class Bulkhead:
+    """Caps the concurrent calls to one upstream or route.
+
+    Calls over the limit wait in a bounded queue, so a slow service holds at
+    most its own slots instead of every gateway worker. Freed slots go to
+    the most important waiting class first, FIFO within a class, and the
+    optional ``shedder`` turns calls away before they queue. Every
+    successful ``acquire`` must be paired with a ``release``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options: BulkheadOptions,
+        metrics: Optional[MetricsService] = None,
+        shedder: Optional[LoadShedder] = None,
+    ):
+        self.name = name
+        self.options = options
+        self.metrics = metrics
+        self.shedder = shedder
+        self.in_flight = 0
+        self._limit = options.max_concurrent
+        # Waiters are (future, enqueued at) pairs, one queue per class.
+        self._waiters: dict[PriorityClass, deque[tuple]] = {
+            priority: deque() for priority in PriorityClass
+        }
+        self._queue_depth = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        self._limit = max(1, value)
+        self._wake()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue_depth
+
+    async def acquire(self, priority: PriorityClass = PriorityClass.STANDARD) -> None:
+        if self.in_flight < self._limit and not self._queue_depth:
+            self.in_flight += 1
+            if self.shedder is not None:
+                self.shedder.record_delay(0.0)
+            self._report()
+            return
+        if self.shedder is not None:
+            self.shedder.admit(priority, self._oldest_wait())
+        if self._queue_depth >= self.options.max_queue:
+            self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, monotonic())
+        self._waiters[priority].append(entry)
+        self._queue_depth += 1
+        self._report()
+        try:
+            async with asyncio.timeout(self.options.queue_timeout):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted while this call was being cancelled.
+                self.release()
+            elif entry in self._waiters[priority]:
+                self._waiters[priority].remove(entry)
+                self._queue_depth -= 1
+                self._report()
+            if isinstance(e, TimeoutError):
+                if self.shedder is not None:
+                    self.shedder.record_delay(monotonic() - entry[1])
+                self._reject("queue_timeout")
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+        self._report()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self._limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self._queue_depth,
+        }
+
+    def _wake(self) -> None:
+        for waiters in self._waiters.values():
+            while waiters and self.in_flight < self._limit:
+                waiter, enqueued_at = waiters.popleft()
+                self._queue_depth -= 1
+                if waiter.done():
+                    continue
+                self.in_flight += 1
+                waiter.set_result(None)
+                if self.shedder is not None:
+                    self.shedder.record_delay(monotonic() - enqueued_at)
+
+    def _oldest_wait(self) -> float:
+        now = monotonic()
+        return max(
+            (now - waiters[0][1] for waiters in self._waiters.values() if waiters),
+            default=0.0,
+        )
+
+    def _reject(self, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.increment(
+                "bulkhead_rejections", bulkhead=self.name, reason=reason
+            )
+        raise BulkheadFull(self.name, reason)
+
+    def _report(self) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.set_gauge(
+            "bulkhead_queue_depth", self._queue_depth, bulkhead=self.name
+        )
+        self.metrics.set_gauge("bulkhead_in_flight", self.in_flight, bulkhead=self.name)
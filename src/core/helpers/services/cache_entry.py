@@ -0,0 +1,50 @@
+import math
+import random
+import sys
+from typing import Any, Callable
+
+
+class CacheEntry:
+    """A cached value with its freshness lifetime.
+
+    ``compute_time`` is how long producing the value took. It drives the
+    probabilistic early expiration (XFetch): the closer the entry is to
+    expiring and the slower it is to recompute, the likelier a read treats
+    it as expired already, so a hot key is refreshed by one reader ahead of
+    time instead of by every reader at once when it expires.
+    """
+
+    __slots__ = ("value", "stored_at", "expires_at", "compute_time")
+
+    def __init__(
+        self, value: Any, stored_at: float, ttl: float, compute_time: float = 0.0
+    ):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = stored_at + ttl
+        self.compute_time = compute_time
+
+    def __deepcopy__(self, memo) -> "CacheEntry":
+        return self
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self.value)
+
+    def age(self, now: float) -> float:
+        return max(0.0, now - self.stored_at)
+
+    def is_fresh(
+        self,
+        now: float,
+        early_expiration: float = 0.0,
+        rand: Callable[[], float] = random.random,
+    ) -> bool:
+        if early_expiration <= 0:
+            return now < self.expires_at
+        # 1 - rand() is in (0, 1], so the log is always defined.
+        gap = -self.compute_time * early_expiration * math.log(1.0 - rand())
+        return now + gap < self.expires_at
+
+    def is_usable(self, now: float, stale_window: float) -> bool:
+        """Whether the entry may still be served stale."""
+        return now < self.expires_at + stale_window
@@ -0,0 +1,135 @@
+from collections import deque
+from time import monotonic
+from typing import Callable, Optional
+
+from loguru import logger
+
+from src.core.helpers.enums.circuit_state import CircuitState
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.circuit_breaker_options import CircuitBreakerOptions
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker over a rolling window.
+
+    Callers ``acquire`` before each call and then report it with
+    ``record_success``, ``record_failure`` or, when it was abandoned without
+    an outcome, ``release``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options: CircuitBreakerOptions,
+        metrics: Optional[MetricsService] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.name = name
+        self.options = options
+        self.metrics = metrics
+        self.clock = clock
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        # One [second, calls, failures, slow calls] bucket per second.
+        self._buckets: deque[list] = deque()
+        self._trial_calls = 0
+        self._trial_successes = 0
+
+    def acquire(self) -> None:
+        if self.state is CircuitState.OPEN:
+            if self.retry_after() > 0:
+                raise CircuitOpenError(self.name, self.retry_after())
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state is CircuitState.HALF_OPEN:
+            if self._trial_calls >= self.options.half_open_calls:
+                raise CircuitOpenError(self.name, self.options.open_time)
+            self._trial_calls += 1
+
+    def release(self) -> None:
+        if self.state is CircuitState.HALF_OPEN and self._trial_calls:
+            self._trial_calls -= 1
+
+    def record_success(self, latency: float) -> None:
+        if latency >= self.options.slow_call_time:
+            self._record(failure=False, slow=True)
+            return
+        if self.state is CircuitState.HALF_OPEN:
+            self._trial_successes += 1
+            if self._trial_successes >= self.options.half_open_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+        self._record(failure=False, slow=False)
+
+    def record_failure(self, latency: float) -> None:
+        self._record(failure=True, slow=latency >= self.options.slow_call_time)
+
+    def retry_after(self) -> float:
+        if self.state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.options.open_time - self.clock())
+
+    def snapshot(self) -> dict:
+        calls, failures, slow = self._totals()
+        return {
+            "state": self.state.value,
+            "retry_after": round(self.retry_after(), 3),
+            "calls": calls,
+            "failures": failures,
+            "slow_calls": slow,
+        }
+
+    def _record(self, failure: bool, slow: bool) -> None:
+        if self.state is CircuitState.HALF_OPEN:
+            # A single bad trial call is enough to keep the circuit open.
+            if failure or slow:
+                self._transition(CircuitState.OPEN)
+            return
+        if self.state is CircuitState.OPEN:
+            return
+        second = int(self.clock())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += failure
+        bucket[3] += slow
+        calls, failures, slow_calls = self._totals()
+        if calls < self.options.min_requests:
+            return
+        if (
+            failures / calls >= self.options.error_rate_threshold
+            or slow_calls / calls >= self.options.slow_call_rate_threshold
+        ):
+            self._transition(CircuitState.OPEN)
+
+    def _totals(self) -> tuple[int, int, int]:
+        oldest = int(self.clock()) - self.options.window
+        while self._buckets and self._buckets[0][0] <= oldest:
+            self._buckets.popleft()
+        calls = failures = slow = 0
+        for _, bucket_calls, bucket_failures, bucket_slow in self._buckets:
+            calls += bucket_calls
+            failures += bucket_failures
+            slow += bucket_slow
+        return calls, failures, slow
+
+    def _transition(self, state: CircuitState) -> None:
+        self.state = state
+        self._trial_calls = 0
+        self._trial_successes = 0
+        if state is CircuitState.OPEN:
+            self.opened_at = self.clock()
+        if state is not CircuitState.HALF_OPEN:
+            self._buckets.clear()
+        if self.metrics is not None:
+            self.metrics.increment(
+                "circuit_breaker_transitions", breaker=self.name, state=state.value
+            )
+        logger.warning(f"Circuit {self.name} is {state.value}")
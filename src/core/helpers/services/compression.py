@@ -0,0 +1,90 @@
+import zlib
+from typing import Optional
+
+from src.core.helpers.enums.content_encoding import ContentEncoding
+from src.core.helpers.options.compression_options import CompressionOptions
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self.compressor.process(chunk)
+
+    def flush(self) -> bytes:
+        return self.compressor.finish()
+
+
+class Compression:
+    """Negotiates and applies the compression of response bodies.
+
+    gzip is always available, brotli and zstd only when the ``brotli`` and
+    ``zstandard`` packages are installed.
+    """
+
+    def __init__(self, options: CompressionOptions):
+        self.options = options
+        self.encodings = tuple(
+            encoding
+            for encoding in ContentEncoding
+            if encoding is ContentEncoding.GZIP
+            or (encoding is ContentEncoding.BROTLI and brotli is not None)
+            or (encoding is ContentEncoding.ZSTD and zstandard is not None)
+        )
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[ContentEncoding]:
+        """The available encoding the client weights the most, None when it
+        accepts none of them."""
+        if not accept_encoding:
+            return None
+        weights = {}
+        for item in accept_encoding.split(","):
+            name, _, parameters = item.partition(";")
+            weight = 1.0
+            parameters = parameters.strip()
+            if parameters.startswith("q="):
+                try:
+                    weight = float(parameters[2:])
+                except ValueError:
+                    weight = 0.0
+            weights[name.strip().lower()] = weight
+        selected, selected_weight = None, 0.0
+        for encoding in self.encodings:
+            weight = weights.get(encoding.value, weights.get("*", 0.0))
+            if weight > selected_weight:
+                selected, selected_weight = encoding, weight
+        return selected
+
+    def compressible(self, content_type: Optional[str], size: Optional[int]) -> bool:
+        """Whether a body of this type and size, None when unknown yet, is
+        worth compressing."""
+        if not content_type or (size is not None and size < self.options.min_size):
+            return False
+        media_type = content_type.partition(";")[0].strip().lower()
+        if media_type.endswith("+json"):
+            return True
+        return media_type.startswith(self.options.content_types)
+
+    def compressor(self, encoding: ContentEncoding):
+        """Incremental compressor with ``compress(chunk)`` and ``flush()``."""
+        if encoding is ContentEncoding.GZIP:
+            # wbits 31 writes the gzip framing, with no timestamp in it.
+            return zlib.compressobj(self.options.gzip_level, zlib.DEFLATED, 31)
+        if encoding is ContentEncoding.BROTLI:
+            return _BrotliCompressor(self.options.brotli_quality)
+        return zstandard.ZstdCompressor(level=self.options.zstd_level).compressobj()
+
+    def compress(self, body: bytes, encoding: ContentEncoding) -> bytes:
+        compressor = self.compressor(encoding)
+        return compressor.compress(body) + compressor.flush()
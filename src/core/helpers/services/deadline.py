@@ -0,0 +1,29 @@
+from time import monotonic
+from typing import Callable
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """Point in time after which the result of a request is useless."""
+
+    __slots__ = ("expires_at", "clock")
+
+    def __init__(self, timeout: float, clock: Callable[[], float] = monotonic):
+        self.clock = clock
+        self.expires_at = clock() + timeout
+
+    def shorten(self, timeout: float) -> None:
+        self.expires_at = min(self.expires_at, self.clock() + timeout)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.clock() >= self.expires_at
+
+    def check(self) -> None:
+        if self.expired():
+            raise DeadlineExceeded("Deadline exceeded")
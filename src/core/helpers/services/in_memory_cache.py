@@ -1,37 +1,81 @@
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime, timedelta
+import sys
 from time import sleep
 import threading
+from typing import Optional
 
+from loguru import logger
 import schedule
 
 from src.core.helpers.interfaces.chace_service import CacheService
 
 
 class InMemoryCacheService(CacheService):
-    def __init__(self, start_cleaner_deamon: bool = True, cleaner_interval: int = 10):
-        self.cache = {}
+    """Cache kept in process memory, holding at most ``max_entries`` entries
+    and ``max_bytes`` bytes, and evicting the least recently used ones beyond
+    that. Values over ``max_entry_bytes`` are not stored.
+
+    Values are weighed with ``sys.getsizeof``, so those holding more than
+    their own object, like cached responses, report it in ``__sizeof__``.
+    They are weighed again on each read, as they may grow once stored.
+
+    The cleaner thread removes expired entries while the event loop reads
+    and writes them, so every access goes through a lock.
+    """
+
+    def __init__(
+        self,
+        start_cleaner_deamon: bool = True,
+        cleaner_interval: int = 10,
+        max_entries: int = 1000,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+    ):
+        self.cache: OrderedDict = OrderedDict()
+        self.sizes: dict[str, int] = {}
+        self.total_bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.lock = threading.Lock()
         self.exit_event: threading.Event = None
         if start_cleaner_deamon:
             self.start_cleaner(cleaner_interval)
 
     def set(self, key: str, value: any, ttl: int = 300) -> None:
         expiration = datetime.now() + timedelta(seconds=ttl) if ttl else None
-        self.cache[key] = (value, expiration)
+        size = sys.getsizeof(value)
+        with self.lock:
+            if self.max_entry_bytes is not None and size > self.max_entry_bytes:
+                self._remove(key)
+                return
+            self.cache[key] = (value, expiration)
+            self._weigh(key, size)
 
     def get(self, key: str) -> any:
-        value, expiration = self.cache.get(key, (None, None))
-        if expiration and datetime.now() > expiration:
-            self.delete(key)
-            return None
+        with self.lock:
+            value, expiration = self.cache.get(key, (None, None))
+            if expiration and datetime.now() > expiration:
+                self._remove(key)
+                return None
+            if key in self.cache:
+                self._weigh(key, sys.getsizeof(value))
         return deepcopy(value)
 
     def delete(self, key: str) -> None:
-        if key in self.cache:
-            del self.cache[key]
+        with self.lock:
+            self._remove(key)
 
     def clear(self) -> None:
-        self.cache.clear()
+        with self.lock:
+            self.cache.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.cache)
 
     def start_cleaner(self, interval: int = 10):
         self._start_cache_cleaner(interval)
@@ -46,17 +90,42 @@ class InMemoryCacheService(CacheService):
         self.exit_event = threading.Event()
 
         def run_schedule():
-            while True:
-                schedule.run_pending()
+            while not self.exit_event.is_set():
+                try:
+                    schedule.run_pending()
+                except Exception as e:
+                    # A failed run must not stop the cleanups to come.
+                    logger.exception(e)
                 sleep(1)
 
-        threading.Thread(target=run_schedule, daemon=True)
+        threading.Thread(target=run_schedule, daemon=True).start()
 
     def _clean_expired_entries(self):
         """Remove expired cache entries."""
         now = datetime.now()
-        expired_keys = [
-            key for key, (_, expiry) in self.cache.items() if expiry and now > expiry
-        ]
-        for key in expired_keys:
-            self.delete(key)
+        with self.lock:
+            expired_keys = [
+                key
+                for key, (_, expiry) in list(self.cache.items())
+                if expiry and now > expiry
+            ]
+            for key in expired_keys:
+                self._remove(key)
+
+    def _weigh(self, key: str, size: int) -> None:
+        """Records the size of the entry just used and evicts the least
+        recently used ones over the bounds. Called with the lock held."""
+        self.total_bytes += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries or (
+            self.max_bytes is not None
+            and self.total_bytes > self.max_bytes
+            and len(self.cache) > 1
+        ):
+            self._remove(next(iter(self.cache)))
+
+    def _remove(self, key: str) -> None:
+        """Called with the lock held."""
+        self.cache.pop(key, None)
+        self.total_bytes -= self.sizes.pop(key, 0)
@@ -0,0 +1,37 @@
+from src.core.helpers.interfaces.metrics_service import MetricsService
+
+
+class InMemoryMetricsService(MetricsService):
+    def __init__(self):
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self.gauges[self._key(name, labels)] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        key = self._key(name, labels)
+        return self.counters.get(key, self.gauges.get(key, 0))
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": self._group(self.counters),
+            "gauges": self._group(self.gauges),
+        }
+
+    @staticmethod
+    def _key(name: str, labels: dict[str, str]) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    @staticmethod
+    def _group(values: dict[tuple, float]) -> dict[str, list[dict]]:
+        grouped: dict[str, list[dict]] = {}
+        for (name, labels), value in sorted(values.items()):
+            grouped.setdefault(name, []).append(
+                {"labels": dict(labels), "value": value}
+            )
+        return grouped
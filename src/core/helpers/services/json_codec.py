@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Any
+
+from src.core.helpers.functions.json_default import json_default
+from src.core.helpers.interfaces.json_codec import JsonCodec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson, several times faster than the standard library."""
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+
+class StdlibJsonCodec(JsonCodec):
+    """The standard library json module, used when orjson is missing."""
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(
+            value, default=json_default, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+def build_json_codec(name: str = "auto") -> JsonCodec:
+    """``orjson``, ``json`` or ``auto``, which picks orjson when installed."""
+    if name == "json" or (name == "auto" and orjson is None):
+        return StdlibJsonCodec()
+    if orjson is None:
+        raise ValueError("The orjson package is not installed")
+    return OrjsonCodec()
+
+
+json_codec = build_json_codec(os.getenv("GATEWAY_JSON_CODEC", "auto"))
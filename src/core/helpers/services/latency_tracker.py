@@ -0,0 +1,28 @@
+from collections import deque
+
+
+class LatencyTracker:
+    """Percentiles over the last ``window`` latency samples."""
+
+    def __init__(self, window: int = 200, refresh_every: int = 10):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.refresh_every = refresh_every
+        self._sorted: list[float] = []
+        self._since_refresh = 0
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._since_refresh += 1
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        # Sorting on every call would cost more than the hedge saves.
+        if self._since_refresh >= self.refresh_every or not self._sorted:
+            self._sorted = sorted(self.samples)
+            self._since_refresh = 0
+        index = min(len(self._sorted) - 1, int(fraction * len(self._sorted)))
+        return self._sorted[index]
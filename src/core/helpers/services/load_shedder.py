@@ -0,0 +1,86 @@
+import math
+from time import monotonic
+from typing import Callable, Optional
+
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.interfaces.metrics_service import MetricsService
+from src.core.helpers.options.load_shedding_options import LoadSheddingOptions
+
+# Classes given up first as the overload persists.
+SHED_ORDER = (PriorityClass.SHEDDABLE, PriorityClass.STANDARD)
+
+
+class LoadShed(Exception):
+    def __init__(self, name: str, priority: PriorityClass, retry_after: int):
+        super().__init__(f"{name} is overloaded, {priority.value} calls are shed")
+        self.name = name
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class LoadShedder:
+    """Decides, from queue waits, which priority classes are shed."""
+
+    def __init__(
+        self,
+        name: str,
+        options: LoadSheddingOptions,
+        metrics: Optional[MetricsService] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.name = name
+        self.options = options
+        self.metrics = metrics
+        self.clock = clock
+        self.level = 0
+        self._interval_start = clock()
+        self._interval_min = math.inf
+        self._bad_intervals = 0
+
+    def record_delay(self, delay: float) -> None:
+        """Records how long a call waited before getting its slot."""
+        self._interval_min = min(self._interval_min, delay)
+
+    def admit(self, priority: PriorityClass, oldest_wait: float = 0.0) -> None:
+        """Raises LoadShed when ``priority`` is shed; ``oldest_wait`` is how
+        long the oldest call still in the queue has been waiting."""
+        self._roll(oldest_wait)
+        if priority in SHED_ORDER[: self.level]:
+            if self.metrics is not None:
+                self.metrics.increment(
+                    "requests_shed", upstream=self.name, priority=priority.value
+                )
+            raise LoadShed(self.name, priority, self.options.retry_after)
+
+    def _roll(self, oldest_wait: float) -> None:
+        now = self.clock()
+        intervals = int((now - self._interval_start) / self.options.interval)
+        if not intervals:
+            return
+        interval_min = self._interval_min
+        if interval_min == math.inf:
+            # Nothing left the queue, so only the waiting calls can tell.
+            interval_min = oldest_wait
+        self._evaluate(interval_min)
+        # Intervals without any call since, judged by the calls still waiting.
+        for _ in range(min(intervals - 1, self.options.escalation * len(SHED_ORDER))):
+            self._evaluate(oldest_wait)
+        self._interval_start = now
+        self._interval_min = math.inf
+
+    def _evaluate(self, interval_min: float) -> None:
+        if interval_min > self.options.target:
+            self._bad_intervals += 1
+        else:
+            self._bad_intervals = 0
+        level = (
+            0
+            if not self._bad_intervals
+            else min(
+                len(SHED_ORDER),
+                1 + (self._bad_intervals - 1) // self.options.escalation,
+            )
+        )
+        if level != self.level and self.metrics is not None:
+            self.metrics.set_gauge("load_shedding_level", level, upstream=self.name)
+        self.level = level
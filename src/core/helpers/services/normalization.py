@@ -0,0 +1,130 @@
+import re
+import types
+import typing
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel
+
+
+class _Node:
+    """Where the entities are in the documents of one model."""
+
+    __slots__ = ("type", "fields")
+
+    def __init__(self, type: Optional[str]):
+        self.type = type
+        self.fields: dict[str, _Node] = {}
+
+
+class Normalizer:
+    """Moves the entities nested in a JSON document to an ``included``
+    section, where each one appears once, and leaves a ``{"type", "id"}``
+    reference in their place.
+
+    Entities are the objects of models with an ``id`` field; their type is
+    the model name in snake case, without ``Partial`` and ``Entity``. The
+    document itself, or each item of a top level list, stays in ``data``.
+    Entities without an id are left inline.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, model: Any):
+        self._root = _node(model, {})
+
+    def __call__(self, document: Any) -> dict[str, Any]:
+        included: dict[str, dict[str, Any]] = {}
+        data = self._walk(document, self._root, included, inline=True)
+        return {"data": data, "included": included}
+
+    def _walk(
+        self,
+        value: Any,
+        node: _Node,
+        included: dict[str, dict[str, Any]],
+        inline: bool,
+    ) -> Any:
+        if isinstance(value, list):
+            return [self._walk(item, node, included, inline) for item in value]
+        if not isinstance(value, dict):
+            return value
+        reference = None
+        if not inline and node.type is not None and value.get("id") is not None:
+            reference = {"type": node.type, "id": value["id"]}
+            entities = included.setdefault(node.type, {})
+            key = str(value["id"])
+            if key in entities:
+                return reference
+            # Reserved before the walk, for entities nested in themselves.
+            entities[key] = None
+        walked = {
+            name: (
+                item
+                if name not in node.fields
+                else self._walk(item, node.fields[name], included, inline=False)
+            )
+            for name, item in value.items()
+        }
+        if reference is None:
+            return walked
+        included[node.type][str(value["id"])] = walked
+        return reference
+
+
+def compile_normalizer(model: Any) -> Optional[Normalizer]:
+    """The normalizer of the documents of ``model``, a response model
+    annotation, or None when they have no nested entities."""
+    normalizer = Normalizer(model)
+    if not _has_entities(normalizer._root, set()):
+        return None
+    return normalizer
+
+
+def _node(annotation: Any, nodes: dict[type, _Node]) -> _Node:
+    """The node of an annotation. Lists share the node of their items, which
+    the walk goes through one by one, and unions of several models are
+    walked without being moved."""
+    models = _models(annotation)
+    if len(models) == 1:
+        return _model_node(models[0], nodes)
+    node = _Node(None)
+    for model in models:
+        node.fields.update(_model_node(model, nodes).fields)
+    return node
+
+
+def _model_node(model: type[BaseModel], nodes: dict[type, _Node]) -> _Node:
+    node = nodes.get(model)
+    if node is None:
+        # Registered before its fields, for models nested in themselves.
+        node = nodes[model] = _Node(_entity_type(model))
+        for name, field in model.model_fields.items():
+            if _models(field.annotation):
+                node.fields[field.alias or name] = _node(field.annotation, nodes)
+    return node
+
+
+def _models(annotation: Any) -> list[type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation]
+    origin = typing.get_origin(annotation)
+    if origin in (Union, types.UnionType, list, tuple, set, frozenset):
+        return [model for arg in typing.get_args(annotation) for model in _models(arg)]
+    return []
+
+
+def _entity_type(model: type[BaseModel]) -> Optional[str]:
+    if "id" not in model.model_fields:
+        return None
+    name = model.__name__.removeprefix("Partial").removesuffix("Entity")
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _has_entities(node: _Node, seen: set[int]) -> bool:
+    if id(node) in seen:
+        return False
+    seen.add(id(node))
+    return any(
+        child.type is not None or _has_entities(child, seen)
+        for child in node.fields.values()
+    )
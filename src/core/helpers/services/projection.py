@@ -0,0 +1,84 @@
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+# Paths of a projection as a tree; None keeps the whole value of a field.
+FieldTree = dict[str, Optional["FieldTree"]]
+
+
+class Projection:
+    """Keeps only the listed fields of a JSON document.
+
+    ``fields`` is a comma separated list of dotted paths, like
+    ``id,name,price.value``. Lists are projected item by item and a path
+    naming a whole object keeps it untouched, whatever its nested paths.
+    The document walk is compiled once, so applying it only touches the
+    kept fields.
+    """
+
+    __slots__ = ("fields", "_project")
+
+    def __init__(self, fields: str):
+        tree = _parse(fields)
+        self.fields = _render(tree)
+        self._project = _compile(tree)
+
+    def __call__(self, document: Any) -> Any:
+        return self._project(document)
+
+
+@lru_cache(maxsize=256)
+def compile_projection(fields: str) -> Projection:
+    """The projection of ``fields``, compiled once per distinct value."""
+    return Projection(fields)
+
+
+def _parse(fields: str) -> FieldTree:
+    tree: FieldTree = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        names = path.split(".")
+        if not all(names):
+            raise ValueError(f"Invalid field path: {path!r}")
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    if not tree:
+        raise ValueError("No fields to keep")
+    return tree
+
+
+def _render(tree: FieldTree, prefix: str = "") -> str:
+    paths = []
+    for name in sorted(tree):
+        subtree = tree[name]
+        if subtree is None:
+            paths.append(prefix + name)
+        else:
+            paths.append(_render(subtree, f"{prefix}{name}."))
+    return ",".join(paths)
+
+
+def _compile(tree: FieldTree) -> Callable[[Any], Any]:
+    children = [
+        (name, None if subtree is None else _compile(subtree))
+        for name, subtree in tree.items()
+    ]
+
+    def project(value: Any) -> Any:
+        if isinstance(value, list):
+            return [project(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        return {
+            name: value[name] if child is None else child(value[name])
+            for name, child in children
+            if name in value
+        }
+
+    return project
@@ -0,0 +1,49 @@
+from collections import deque
+from time import monotonic
+from typing import Callable
+
+from src.core.helpers.options.retry_options import RetryOptions
+
+
+class RetryBudget:
+    """Caps retries to a share of the requests seen in a rolling window."""
+
+    def __init__(self, options: RetryOptions, clock: Callable[[], float] = monotonic):
+        self.options = options
+        self.clock = clock
+        # One [second, requests, retries] bucket per second.
+        self._buckets: deque[list] = deque()
+
+    def record_request(self) -> None:
+        self._bucket()[1] += 1
+
+    def try_acquire(self) -> bool:
+        requests, retries = self._totals()
+        allowed = (
+            self.options.budget_ratio * requests
+            + self.options.min_retries_per_second * self.options.budget_window
+        )
+        if retries + 1 > allowed:
+            return False
+        self._bucket()[2] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        requests, retries = self._totals()
+        return {"requests": requests, "retries": retries}
+
+    def _bucket(self) -> list:
+        second = int(self.clock())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        return self._buckets[-1]
+
+    def _totals(self) -> tuple[int, int]:
+        oldest = int(self.clock()) - self.options.budget_window
+        while self._buckets and self._buckets[0][0] <= oldest:
+            self._buckets.popleft()
+        requests = retries = 0
+        for _, bucket_requests, bucket_retries in self._buckets:
+            requests += bucket_requests
+            retries += bucket_retries
+        return requests, retries
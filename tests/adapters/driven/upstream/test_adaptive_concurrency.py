@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.core.helpers.enums.limit_algorithm import LimitAlgorithm
+from src.core.helpers.options.adaptive_limit_options import AdaptiveLimitOptions
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+
+
+class StubUpstream:
+    """Upstream serving ``capacity`` calls at a time in ``latency`` seconds;
+    calls above the capacity slow every call down, as in a saturated
+    service."""
+
+    def __init__(self, latency: float, capacity: int):
+        self.latency = latency
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency * max(1, self.in_flight / self.capacity))
+        finally:
+            self.in_flight -= 1
+        return httpx.Response(200)
+
+
+class TestAdaptiveConcurrency:
+    def run_load(self, upstreams: UpstreamClients, clients: int, calls: int):
+        async def worker():
+            for _ in range(calls):
+                await upstreams.get("pedido").get("/index")
+
+        async def scenario():
+            await upstreams.start()
+            try:
+                await asyncio.gather(*(worker() for _ in range(clients)))
+            finally:
+                await upstreams.close()
+
+        asyncio.run(scenario())
+
+    @pytest.mark.parametrize("algorithm", list(LimitAlgorithm))
+    def test_limit_should_settle_near_upstream_capacity(self, algorithm):
+        stub = StubUpstream(latency=0.005, capacity=4)
+        upstreams = UpstreamClients(
+            [
+                UpstreamOptions(
+                    name="pedido",
+                    base_urls=["http://pedido.local/pedido"],
+                    bulkhead=BulkheadOptions(max_queue=1000, queue_timeout=30),
+                    adaptive_limit=AdaptiveLimitOptions(
+                        algorithm=algorithm, initial_limit=40
+                    ),
+                )
+            ],
+            transport=httpx.MockTransport(stub.handler),
+        )
+
+        self.run_load(upstreams, clients=40, calls=15)
+        stub.peak = 0
+        self.run_load(upstreams, clients=40, calls=5)
+
+        assert 2 <= upstreams.get("pedido").bulkhead.limit <= 3 * stub.capacity
+        assert stub.peak <= 3 * stub.capacity
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.adapters.driven.upstream.health_checker import UpstreamHealthChecker
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import (
+    HealthCheckOptions,
+    UpstreamOptions,
+)
+
+
+class TestUpstreamHealthChecker:
+    @pytest.fixture
+    def down_hosts(self):
+        return set()
+
+    @pytest.fixture
+    def upstreams(self, down_hosts):
+        def handler(request: httpx.Request):
+            if request.url.host in down_hosts:
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(404)
+
+        return UpstreamClients(
+            [
+                UpstreamOptions(
+                    name="pedido",
+                    base_urls=["http://a.local/pedido", "http://b.local/pedido"],
+                ),
+                UpstreamOptions(name="queue", base_urls=["http://c.local/queue"]),
+            ],
+            transport=httpx.MockTransport(handler),
+        )
+
+    def check(self, upstreams: UpstreamClients, rounds: int):
+        checker = UpstreamHealthChecker(
+            [upstreams.get(name) for name in upstreams.names()],
+            HealthCheckOptions(unhealthy_threshold=2),
+        )
+
+        async def scenario():
+            await upstreams.start()
+            try:
+                for _ in range(rounds):
+                    await checker.check_all()
+            finally:
+                await upstreams.close()
+
+        asyncio.run(scenario())
+
+    def test_replica_should_be_unhealthy_after_threshold(
+        self, upstreams: UpstreamClients, down_hosts
+    ):
+        down_hosts.add("b.local")
+
+        self.check(upstreams, 1)
+        assert upstreams.get("pedido").instances[1].healthy
+
+        self.check(upstreams, 1)
+        assert not upstreams.get("pedido").instances[1].healthy
+        assert upstreams.get("pedido").instances[0].healthy
+
+    def test_replica_should_recover_when_probe_succeeds(
+        self, upstreams: UpstreamClients, down_hosts
+    ):
+        down_hosts.add("b.local")
+        self.check(upstreams, 2)
+
+        down_hosts.clear()
+        self.check(upstreams, 1)
+
+        assert upstreams.get("pedido").instances[1].healthy
+
+    def test_health_should_report_each_upstream(
+        self, upstreams: UpstreamClients, down_hosts
+    ):
+        down_hosts.add("c.local")
+
+        self.check(upstreams, 2)
+        health = upstreams.health()
+
+        assert health["pedido"]["available"]
+        assert not health["queue"]["available"]
+        assert health["queue"]["instances"][0]["base_url"] == "http://c.local/queue"
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from src.adapters.driven.upstream.load_balancers import (
+    LeastOutstandingBalancer,
+    PowerOfTwoChoicesBalancer,
+    RoundRobinBalancer,
+    build_load_balancer,
+)
+from src.adapters.driven.upstream.upstream_client import UpstreamInstance
+from src.core.helpers.enums.balancing_algorithm import BalancingAlgorithm
+
+
+class TestLoadBalancers:
+    @pytest.fixture
+    def instances(self):
+        return [
+            UpstreamInstance("http://pedido-1"),
+            UpstreamInstance("http://pedido-2"),
+            UpstreamInstance("http://pedido-3"),
+        ]
+
+    def test_round_robin_should_cycle_through_instances(self, instances):
+        balancer = RoundRobinBalancer()
+
+        picked = [balancer.pick(instances).base_url for _ in range(4)]
+
+        assert picked == [
+            "http://pedido-1",
+            "http://pedido-2",
+            "http://pedido-3",
+            "http://pedido-1",
+        ]
+
+    def test_least_outstanding_should_pick_the_least_busy_instance(self, instances):
+        instances[0].outstanding = 4
+        instances[1].outstanding = 1
+        instances[2].outstanding = 2
+
+        assert LeastOutstandingBalancer().pick(instances) is instances[1]
+
+    def test_p2c_should_avoid_the_slow_instance(self, instances):
+        instances[0].ewma_latency = 2.0
+        instances[1].ewma_latency = 0.01
+        instances[2].ewma_latency = 0.02
+        balancer = PowerOfTwoChoicesBalancer(random.Random(42))
+
+        picked = [balancer.pick(instances) for _ in range(100)]
+
+        assert instances[0] not in picked
+
+    def test_p2c_should_weight_latency_by_outstanding_requests(self, instances):
+        instances[0].ewma_latency = 0.01
+        instances[0].outstanding = 10
+        instances[1].ewma_latency = 0.02
+        balancer = PowerOfTwoChoicesBalancer(random.Random(0))
+
+        picked = balancer.pick(instances[:2])
+
+        assert picked is instances[1]
+
+    @pytest.mark.parametrize(
+        "algorithm, expected",
+        [
+            (BalancingAlgorithm.ROUND_ROBIN, RoundRobinBalancer),
+            (BalancingAlgorithm.LEAST_OUTSTANDING, LeastOutstandingBalancer),
+            (BalancingAlgorithm.P2C_EWMA, PowerOfTwoChoicesBalancer),
+        ],
+    )
+    def test_build_load_balancer_should_match_algorithm(self, algorithm, expected):
+        assert isinstance(build_load_balancer(algorithm), expected)
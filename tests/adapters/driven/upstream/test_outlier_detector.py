@@ -0,0 +1,102 @@
+import asyncio
+from time import monotonic
+
+import httpx
+import pytest
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import (
+    OutlierDetectionOptions,
+    UpstreamOptions,
+)
+
+
+class TestOutlierDetector:
+    @pytest.fixture
+    def sent_requests(self):
+        return []
+
+    def build_upstreams(self, sent_requests, base_urls, failing_host=None):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            if request.url.host == failing_host:
+                return httpx.Response(502)
+            return httpx.Response(200)
+
+        return UpstreamClients(
+            [UpstreamOptions(name="pedido", base_urls=base_urls)],
+            transport=httpx.MockTransport(handler),
+            outlier_detection=OutlierDetectionOptions(consecutive_failures=2),
+        )
+
+    def run(self, upstreams: UpstreamClients, calls: int):
+        async def scenario():
+            await upstreams.start()
+            try:
+                for _ in range(calls):
+                    await upstreams.get("pedido").get("/index")
+            finally:
+                await upstreams.close()
+
+        asyncio.run(scenario())
+
+    def test_consecutive_failures_should_eject_the_replica(self, sent_requests):
+        upstreams = self.build_upstreams(
+            sent_requests,
+            ["http://a.local/pedido", "http://b.local/pedido"],
+            failing_host="b.local",
+        )
+
+        self.run(upstreams, 10)
+
+        hosts = [request.url.host for request in sent_requests]
+        assert hosts.count("b.local") == 2
+        assert not upstreams.get("pedido").instances[1].available()
+        assert (
+            upstreams.metrics.get(
+                "upstream_ejections", upstream="pedido", reason="failures"
+            )
+            == 1
+        )
+
+    def test_single_replica_should_never_be_ejected(self, sent_requests):
+        upstreams = self.build_upstreams(
+            sent_requests, ["http://a.local/pedido"], failing_host="a.local"
+        )
+
+        self.run(upstreams, 5)
+
+        assert len(sent_requests) == 5
+        assert upstreams.get("pedido").instances[0].available()
+
+    def test_ejection_time_should_grow_with_each_ejection(self, sent_requests):
+        upstreams = self.build_upstreams(
+            sent_requests, ["http://a.local/pedido", "http://b.local/pedido"]
+        )
+        client = upstreams.get("pedido")
+        instance = client.instances[0]
+
+        durations = []
+        for _ in range(3):
+            instance.ejected_until = 0.0
+            client.outliers.eject(instance, client.instances, reason="failures")
+            durations.append(round(instance.ejected_until - monotonic()))
+
+        assert durations == [30, 60, 120]
+
+    def test_latency_outlier_should_be_ejected(self, sent_requests):
+        upstreams = self.build_upstreams(
+            sent_requests,
+            [f"http://{host}.local/pedido" for host in ("a", "b", "c")],
+        )
+        client = upstreams.get("pedido")
+        for instance, latency in zip(client.instances, (0.02, 0.03, 0.5)):
+            instance.ewma_latency = latency
+
+        client.outliers.check_latency(client.instances)
+
+        assert [instance.available() for instance in client.instances] == [
+            True,
+            True,
+            False,
+        ]
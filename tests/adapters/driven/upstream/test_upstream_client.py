@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.adapters.driven.upstream.proxy_headers import (
+    filter_response_headers,
+    forward_request_headers,
+)
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.core.helpers.enums.balancing_algorithm import BalancingAlgorithm
+
+
+class TestUpstreamClients:
+    @pytest.fixture
+    def sent_requests(self):
+        return []
+
+    @pytest.fixture
+    def upstreams(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(200, json={"ok": True})
+
+        return UpstreamClients(
+            [UpstreamOptions(name="pedido", base_urls=["http://pedido.local/pedido"])],
+            transport=httpx.MockTransport(handler),
+        )
+
+    def test_request_should_join_base_url_and_drop_none_params(
+        self, upstreams: UpstreamClients, sent_requests
+    ):
+        async def scenario():
+            await upstreams.start()
+            try:
+                return await upstreams.get("pedido").get(
+                    "/index", params={"status": 1, "min_value": None}
+                )
+            finally:
+                await upstreams.close()
+
+        result = asyncio.run(scenario())
+
+        assert result.status_code == 200
+        assert str(sent_requests[0].url) == "http://pedido.local/pedido/index?status=1"
+
+    def test_request_should_fail_when_client_is_not_started(
+        self, upstreams: UpstreamClients
+    ):
+        with pytest.raises(RuntimeError):
+            asyncio.run(upstreams.get("pedido").get("/index"))
+
+    def test_request_should_spread_calls_across_replicas(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(200)
+
+        upstreams = UpstreamClients(
+            [
+                UpstreamOptions(
+                    name="pedido",
+                    base_urls=["http://pedido-1/pedido", "http://pedido-2/pedido"],
+                )
+            ],
+            transport=httpx.MockTransport(handler),
+        )
+
+        async def scenario():
+            await upstreams.start()
+            try:
+                for _ in range(4):
+                    await upstreams.get("pedido").get("/index")
+            finally:
+                await upstreams.close()
+
+        asyncio.run(scenario())
+
+        assert [request.url.host for request in sent_requests] == [
+            "pedido-1",
+            "pedido-2",
+            "pedido-1",
+            "pedido-2",
+        ]
+
+    def test_options_from_env_should_read_replicas_and_algorithm(self, monkeypatch):
+        monkeypatch.setenv(
+            "PEDIDO_BASE_URL", "http://pedido-1/pedido, http://pedido-2/pedido"
+        )
+        monkeypatch.setenv("PEDIDO_LB_ALGORITHM", "p2c_ewma")
+
+        options = UpstreamOptions.from_env("pedido", "PEDIDO", "http://default")
+
+        assert options.base_urls == ["http://pedido-1/pedido", "http://pedido-2/pedido"]
+        assert options.balancing == BalancingAlgorithm.P2C_EWMA
+
+    def test_forward_request_headers_should_drop_hop_by_hop_headers(self):
+        headers = {
+            "Authorization": "Bearer token",
+            "Host": "gateway",
+            "Content-Length": "10",
+            "Connection": "keep-alive",
+        }
+
+        assert forward_request_headers(headers) == {"Authorization": "Bearer token"}
+
+    def test_filter_response_headers_should_drop_encoding_headers(self):
+        headers = {
+            "content-type": "application/json",
+            "content-encoding": "gzip",
+            "content-length": "10",
+        }
+
+        assert filter_response_headers(headers) == {"content-type": "application/json"}
@@ -0,0 +1,75 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.adapters.driver.API.middleware.compression_middleware import (
+    CompressionMiddleware,
+)
+from src.core.helpers.options.compression_options import CompressionOptions
+from src.core.helpers.services.compression import Compression
+
+ROWS = [b'{"id": %d, "name": "lanche"}' % index for index in range(200)]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        compression=Compression(CompressionOptions(min_size=100)),
+    )
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for row in ROWS:
+                yield row
+
+        return StreamingResponse(rows(), media_type="application/json")
+
+    @app.get("/encoded")
+    async def encoded():
+        return StreamingResponse(
+            iter([gzip.compress(b"".join(ROWS))]),
+            media_type="application/json",
+            headers={"content-encoding": "gzip"},
+        )
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse({"status": "ok"})
+
+    return app
+
+
+class TestCompressionMiddleware:
+    def test_should_compress_streamed_bodies_chunk_by_chunk(self):
+        with TestClient(build_app()) as client:
+            with client.stream(
+                "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+            ) as result:
+                raw_body = b"".join(result.iter_raw())
+
+        assert result.headers["content-encoding"] == "gzip"
+        assert result.headers["vary"] == "Accept-Encoding"
+        assert "content-length" not in result.headers
+        assert gzip.decompress(raw_body) == b"".join(ROWS)
+
+    def test_should_pass_already_encoded_bodies_through(self):
+        with TestClient(build_app()) as client:
+            with client.stream(
+                "GET", "/encoded", headers={"Accept-Encoding": "gzip"}
+            ) as result:
+                raw_body = b"".join(result.iter_raw())
+
+        assert raw_body == gzip.compress(b"".join(ROWS))
+
+    def test_should_not_compress_small_or_unaccepted_bodies(self):
+        with TestClient(build_app()) as client:
+            small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+            identity = client.get("/stream", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in identity.headers
+        assert identity.content == b"".join(ROWS)
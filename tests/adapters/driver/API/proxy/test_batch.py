@@ -0,0 +1,199 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.adapters.driver.API.batch_router import run_batch
+from src.adapters.driver.API.proxy.batch import SUB_REQUEST_SCOPE_KEY
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
+from src.adapters.driver.API.schemas.batch_schema import BatchSchema
+from src.core.helpers.options.batch_options import BatchOptions
+from src.core.helpers.options.retry_options import RetryOptions
+
+
+def build_app(handler, options: BatchOptions) -> FastAPI:
+    engine = ProxyEngine(
+        UpstreamClients(
+            [UpstreamOptions(name="produto", base_urls=["http://produto.local/p"])],
+            transport=httpx.MockTransport(handler),
+        ),
+        retry=RetryOptions(max_attempts=1),
+    )
+    routes = [
+        ProxyRoute(
+            name="get_item",
+            method="GET",
+            path="/{item_id}",
+            upstream="produto",
+            path_params={"item_id": int},
+        ),
+        ProxyRoute(
+            name="create_item",
+            method="POST",
+            path="/",
+            upstream="produto",
+        ),
+    ]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await engine.start()
+        yield
+        await engine.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(engine.build_router(routes, prefix="/produto"), prefix="/dev")
+
+    @app.post("/dev/batch")
+    async def batch(request: Request, batch: BatchSchema):
+        return GatewayJSONResponse(
+            {"responses": await run_batch(engine, request, batch, options)}
+        )
+
+    app.state.engine = engine
+    return app
+
+
+def run(app: FastAPI, requests: list) -> httpx.Response:
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+            ) as client:
+                return await client.post(
+                    "/dev/batch",
+                    json={"requests": requests},
+                    headers={"Authorization": "Bearer a"},
+                )
+
+    return asyncio.run(scenario())
+
+
+class TestBatch:
+    def test_should_run_sub_requests_concurrently_up_to_the_cap(self):
+        sent = []
+        running = 0
+        peak = 0
+
+        async def handler(request: httpx.Request):
+            nonlocal running, peak
+            sent.append(
+                (request.method, request.url.path, request.headers["authorization"])
+            )
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            if request.method == "POST":
+                return httpx.Response(201, json={"created": True})
+            return httpx.Response(200, json={"path": request.url.path})
+
+        app = build_app(handler, BatchOptions(concurrency=2))
+
+        result = run(
+            app,
+            [
+                {"id": "a", "path": "/produto/1"},
+                {"id": "b", "path": "/produto/2"},
+                {"id": "c", "path": "/produto/1"},
+                {"id": "d", "path": "/produto/3"},
+                {"id": "e", "method": "POST", "path": "/produto/", "body": {"x": 1}},
+                {"id": "f", "path": "/produto/abc"},
+            ],
+        )
+
+        assert result.status_code == 200
+        responses = result.json()["responses"]
+        assert [response["id"] for response in responses] == list("abcdef")
+        assert [response["status"] for response in responses] == [
+            200,
+            200,
+            200,
+            200,
+            201,
+            422,
+        ]
+        assert responses[0]["body"] == {"path": "/p/1"}
+        assert responses[2]["body"] == {"path": "/p/1"}
+        assert responses[4]["body"] == {"created": True}
+        assert sorted(sent) == [
+            ("GET", "/p/1", "Bearer a"),
+            ("GET", "/p/2", "Bearer a"),
+            ("GET", "/p/3", "Bearer a"),
+            ("POST", "/p/", "Bearer a"),
+        ]
+        assert peak == 2
+        assert app.state.engine.metrics.get("batch_deduplicated") == 1
+
+    def test_should_answer_unfinished_sub_requests_with_504(self):
+        async def handler(request: httpx.Request):
+            if request.url.path == "/p/2":
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={})
+
+        app = build_app(handler, BatchOptions(timeout=0.1))
+
+        result = run(app, [{"path": "/produto/1"}, {"path": "/produto/2"}])
+
+        assert [response["status"] for response in result.json()["responses"]] == [
+            200,
+            504,
+        ]
+
+    def test_should_refuse_nested_batches(self):
+        sent = []
+
+        def handler(request: httpx.Request):
+            sent.append(request)
+            return httpx.Response(200, json={})
+
+        app = build_app(handler, BatchOptions())
+        nested = {"requests": [{"path": "/produto/1"}]}
+
+        result = run(
+            app,
+            [
+                {"method": "POST", "path": "/batch", "body": nested},
+                {"method": "POST", "path": "/produto/../batch", "body": nested},
+                {"method": "POST", "path": "/produto/./../batch/", "body": nested},
+            ],
+        )
+
+        responses = result.json()["responses"]
+        assert [response["status"] for response in responses] == [400] * 3
+        assert responses[2]["body"] == {"detail": "Nested batches are refused"}
+        assert sent == []
+
+    def test_should_refuse_batches_sent_by_a_batch(self):
+        app = build_app(lambda request: httpx.Response(200), BatchOptions())
+        request = Request(
+            {
+                "type": "http",
+                "method": "POST",
+                "path": "/dev/batch",
+                "headers": [],
+                "app": app,
+                SUB_REQUEST_SCOPE_KEY: True,
+            }
+        )
+        batch = BatchSchema(requests=[{"path": "/produto/1"}])
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(run_batch(app.state.engine, request, batch, BatchOptions()))
+
+        assert error.value.status_code == 400
+
+    def test_should_refuse_batches_over_the_limit(self):
+        app = build_app(
+            lambda request: httpx.Response(200), BatchOptions(max_requests=1)
+        )
+
+        result = run(app, [{"path": "/produto/1"}, {"path": "/produto/2"}])
+
+        assert result.status_code == 400
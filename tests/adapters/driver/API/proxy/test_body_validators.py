@@ -0,0 +1,44 @@
+import pytest
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel
+
+from src.adapters.driver.API.proxy.body_validators import compile_body_validator
+from src.core.helpers.enums.body_validation import BodyValidation
+
+
+class ExampleBody(BaseModel):
+    pedido_id: int
+    note: str = ""
+
+
+class TestBodyValidators:
+    def test_off_should_not_build_a_validator(self):
+        assert compile_body_validator(ExampleBody, BodyValidation.OFF) is None
+
+    def test_structural_should_accept_body_with_required_fields(self):
+        validator = compile_body_validator(ExampleBody, BodyValidation.STRUCTURAL)
+
+        validator(b'{"pedido_id": "not checked"}')
+
+    def test_structural_should_reject_missing_required_fields(self):
+        validator = compile_body_validator(ExampleBody, BodyValidation.STRUCTURAL)
+
+        with pytest.raises(RequestValidationError) as error:
+            validator(b'{"note": "sem pedido"}')
+
+        assert error.value.errors()[0]["loc"] == ("body", "pedido_id")
+
+    @pytest.mark.parametrize("body", [b"not json", b"[1, 2]"])
+    def test_structural_should_reject_non_object_bodies(self, body):
+        validator = compile_body_validator(ExampleBody, BodyValidation.STRUCTURAL)
+
+        with pytest.raises(RequestValidationError):
+            validator(body)
+
+    def test_full_should_reject_invalid_field_types(self):
+        validator = compile_body_validator(ExampleBody, BodyValidation.FULL)
+
+        with pytest.raises(RequestValidationError) as error:
+            validator(b'{"pedido_id": "abc"}')
+
+        assert error.value.errors()[0]["loc"] == ("body", "pedido_id")
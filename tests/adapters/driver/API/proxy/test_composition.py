@@ -0,0 +1,200 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+
+import httpx
+from fastapi import FastAPI, Request
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.adapters.driver.API.json_response import GatewayJSONResponse
+from src.adapters.driver.API.pedido_router import compose_pedido
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
+from src.core.helpers.options.composition_options import CompositionOptions
+from src.core.helpers.options.retry_options import RetryOptions
+
+PEDIDO = {
+    "purchase": {
+        "id": 1,
+        "selected_products": [
+            {"id": 10, "product": {"id": 1}, "added_components": [{"id": 2}]},
+            {"id": 11, "product": {"id": 3}, "added_components": None},
+            {"id": 12, "product": {"id": 1}},
+        ],
+    },
+    "payments": [{"id": 7}],
+}
+
+
+def build_app(handler, options: CompositionOptions) -> FastAPI:
+    engine = ProxyEngine(
+        UpstreamClients(
+            [
+                UpstreamOptions(name=name, base_urls=[f"http://{name}.local/{name}"])
+                for name in ("pedido", "payment", "produto")
+            ],
+            transport=httpx.MockTransport(handler),
+        ),
+        retry=RetryOptions(max_attempts=1),
+    )
+    routes = [
+        ProxyRoute(
+            name="get_pedido",
+            method="GET",
+            path="/pedido/{pedido_id}",
+            upstream="pedido",
+            upstream_path="/{pedido_id}",
+            path_params={"pedido_id": int},
+        ),
+        ProxyRoute(
+            name="get_payment",
+            method="GET",
+            path="/payment/{payment_id}",
+            upstream="payment",
+            upstream_path="/{payment_id}",
+            path_params={"payment_id": str},
+        ),
+        ProxyRoute(
+            name="get_item",
+            method="GET",
+            path="/produto/{item_id}",
+            upstream="produto",
+            upstream_path="/{item_id}",
+            path_params={"item_id": int},
+        ),
+    ]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await engine.start()
+        yield
+        await engine.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(engine.build_router(routes))
+
+    @app.get("/pedido/{pedido_id}/full")
+    async def get_pedido_full(request: Request, pedido_id: int):
+        return GatewayJSONResponse(
+            await compose_pedido(engine, request, pedido_id, options)
+        )
+
+    app.state.engine = engine
+    return app
+
+
+def run(app: FastAPI, path: str) -> httpx.Response:
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+            ) as client:
+                return await client.get(path, headers={"Authorization": "Bearer a"})
+
+    return asyncio.run(scenario())
+
+
+class TestComposition:
+    def test_should_fan_out_concurrently_and_degrade_slow_parts(self):
+        sent = []
+
+        async def handler(request: httpx.Request):
+            sent.append((request.url.path, request.headers.get("authorization")))
+            path = request.url.path
+            if path == "/pedido/5":
+                return httpx.Response(200, json=PEDIDO)
+            if path == "/produto/2":
+                await asyncio.sleep(1)
+            if path == "/produto/3":
+                return httpx.Response(404, json={"detail": "Not found"})
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"path": path})
+
+        app = build_app(handler, CompositionOptions(timeout=5, part_timeout=0.2))
+
+        started_at = monotonic()
+        result = run(app, "/pedido/5/full")
+        elapsed = monotonic() - started_at
+
+        assert result.status_code == 200
+        body = result.json()
+        assert body["pedido"] == PEDIDO
+        assert body["payments"] == [{"path": "/payment/7"}]
+        assert body["products"] == [{"path": "/produto/1"}]
+        assert sorted(body["degraded"], key=lambda part: part["id"]) == [
+            {"part": "product", "id": 2, "reason": "timeout"},
+            {"part": "product", "id": 3, "reason": "not_found"},
+        ]
+        assert elapsed < 0.9
+        assert sorted(path for path, _ in sent) == [
+            "/payment/7",
+            "/pedido/5",
+            "/produto/1",
+            "/produto/2",
+            "/produto/3",
+        ]
+        assert {authorization for _, authorization in sent} == {"Bearer a"}
+        assert (
+            app.state.engine.metrics.get(
+                "composition_degraded_parts",
+                route="get_pedido_full",
+                part="product",
+                reason="timeout",
+            )
+            == 1
+        )
+
+    def test_should_fail_when_the_order_cannot_be_fetched(self):
+        def handler(request: httpx.Request):
+            return httpx.Response(404, json={"detail": "Pedido not found"})
+
+        app = build_app(handler, CompositionOptions())
+
+        result = run(app, "/pedido/5/full")
+
+        assert result.status_code == 404
+        assert result.json() == {"detail": "Pedido not found"}
+
+    def test_should_skip_missing_ids_and_degrade_invalid_parts(self):
+        pedido = {
+            "purchase": {
+                "selected_products": [
+                    {"id": 10, "product": None, "added_components": [{"id": 2}]},
+                    {"id": 11, "product": {"id": 1}},
+                ],
+            },
+            "payments": [{"id": None}, {"id": 7}],
+        }
+
+        def handler(request: httpx.Request):
+            path = request.url.path
+            if path == "/pedido/5":
+                return httpx.Response(200, json=pedido)
+            if path == "/payment/7":
+                return httpx.Response(
+                    200, content=b"{", headers={"content-type": "application/json"}
+                )
+            return httpx.Response(200, json={"path": path})
+
+        app = build_app(handler, CompositionOptions())
+
+        result = run(app, "/pedido/5/full")
+
+        assert result.status_code == 200
+        body = result.json()
+        assert body["payments"] == []
+        assert body["products"] == [{"path": "/produto/2"}, {"path": "/produto/1"}]
+        assert body["degraded"] == [{"part": "payment", "id": 7, "reason": "error"}]
+
+    def test_should_answer_502_when_the_order_is_not_valid_json(self):
+        def handler(request: httpx.Request):
+            return httpx.Response(
+                200, content=b"<html>", headers={"content-type": "application/json"}
+            )
+
+        app = build_app(handler, CompositionOptions())
+
+        result = run(app, "/pedido/5/full")
+
+        assert result.status_code == 502
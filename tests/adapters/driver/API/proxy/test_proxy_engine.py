@@ -0,0 +1,1496 @@
+import asyncio
+from contextlib import asynccontextmanager
+import gzip
+import json
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.adapters.driver.API.proxy.proxy_route import ProxyRoute
+from src.core.domain.aggregates.produto_aggregate import ProdutoAggregate
+from src.core.helpers.enums.cache_scope import CacheScope
+from src.core.helpers.enums.content_encoding import ContentEncoding
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.options.cache_options import CacheOptions
+from src.core.helpers.options.circuit_breaker_options import CircuitBreakerOptions
+from src.core.helpers.options.compression_options import CompressionOptions
+from src.core.helpers.options.load_shedding_options import LoadSheddingOptions
+from src.core.helpers.options.hedge_options import HedgeOptions
+from src.core.helpers.options.retry_options import RetryOptions
+from src.core.helpers.options.timeout_options import TimeoutOptions
+from src.core.helpers.services.in_memory_cache import InMemoryCacheService
+from tests.test_resources.fake_clock import FakeClock
+
+
+class RawStream(httpx.AsyncByteStream):
+    """Upstream body handed over unread, as real transports do."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def __aiter__(self):
+        yield self.content
+
+
+class ExampleBody(BaseModel):
+    name: str
+
+
+def build_app(engine: ProxyEngine, routes: list[ProxyRoute]) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await engine.start()
+        yield
+        await engine.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(engine.build_router(routes, prefix="/pedido"))
+    return app
+
+
+class TestProxyEngine:
+    @pytest.fixture
+    def sent_requests(self):
+        return []
+
+    @pytest.fixture
+    def upstream_handler(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(
+                200, json={"path": request.url.path}, headers={"x-upstream": "1"}
+            )
+
+        return handler
+
+    @pytest.fixture
+    def engine(self, upstream_handler):
+        upstreams = UpstreamClients(
+            [UpstreamOptions(name="pedido", base_urls=["http://pedido.local/pedido"])],
+            transport=httpx.MockTransport(upstream_handler),
+        )
+        return ProxyEngine(upstreams)
+
+    @pytest.fixture
+    def routes(self):
+        return [
+            ProxyRoute(
+                name="list_pedidos",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                query_params={"status": (Optional[int], None)},
+            ),
+            ProxyRoute(
+                name="get_pedido",
+                method="GET",
+                path="/{pedido_id}",
+                upstream="pedido",
+                upstream_path="/detail/{pedido_id}",
+                path_params={"pedido_id": int},
+            ),
+            ProxyRoute(
+                name="create_pedido",
+                method="POST",
+                path="/make",
+                upstream="pedido",
+                body=ExampleBody,
+            ),
+            ProxyRoute(
+                name="update_status",
+                method="PUT",
+                path="/status",
+                upstream="pedido",
+                query_params={"pedido_id": (int, ...)},
+                body_from_query=("pedido_id",),
+            ),
+        ]
+
+    @pytest.fixture
+    def client(self, engine: ProxyEngine, routes):
+        with TestClient(build_app(engine, routes)) as client:
+            yield client
+
+    def test_should_forward_query_params_without_none_values(
+        self, client: TestClient, sent_requests
+    ):
+        result = client.get("/pedido/index")
+
+        assert result.status_code == 200
+        assert result.headers["x-upstream"] == "1"
+        assert str(sent_requests[0].url) == "http://pedido.local/pedido/index"
+
+    def test_should_render_upstream_path_template(
+        self, client: TestClient, sent_requests
+    ):
+        result = client.get("/pedido/42")
+
+        assert result.json() == {"path": "/pedido/detail/42"}
+
+    def test_should_forward_body_bytes_untouched(
+        self, client: TestClient, sent_requests
+    ):
+        body = b'{ "name": "lanche",  "extra": true }'
+
+        client.post(
+            "/pedido/make", content=body, headers={"content-type": "application/json"}
+        )
+
+        assert sent_requests[0].content == body
+
+    def test_should_reject_invalid_body_before_calling_upstream(
+        self, client: TestClient, sent_requests
+    ):
+        result = client.post("/pedido/make", json={"other": "lanche"})
+
+        assert result.status_code == 422
+        assert sent_requests == []
+
+    def test_should_send_query_params_as_body_when_configured(
+        self, client: TestClient, sent_requests
+    ):
+        client.put("/pedido/status?pedido_id=3")
+
+        assert sent_requests[0].url.query == b""
+        assert sent_requests[0].content == b'{"pedido_id":3}'
+
+    def test_should_stream_undecoded_body_with_upstream_status_and_headers(self):
+        compressed = gzip.compress(b'[{"id": 1}]')
+
+        def handler(request: httpx.Request):
+            return httpx.Response(
+                206,
+                headers={"content-encoding": "gzip", "x-upstream": "1"},
+                stream=httpx.ByteStream(compressed),
+            )
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_pedidos",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                stream=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            with client.stream("GET", "/pedido/index") as result:
+                raw_body = b"".join(result.iter_raw())
+
+        assert result.status_code == 206
+        assert result.headers["x-upstream"] == "1"
+        assert result.headers["content-encoding"] == "gzip"
+        assert raw_body == compressed
+
+    def test_should_cancel_upstream_call_when_client_disconnects(self, routes):
+        upstream_cancelled = []
+
+        async def slow_handler(request: httpx.Request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream_cancelled.append(request.url.path)
+                raise
+            return httpx.Response(200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(slow_handler),
+            )
+        )
+        app = build_app(engine, routes)
+        sent_messages = []
+
+        async def scenario():
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await asyncio.sleep(0.05)
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent_messages.append(message)
+
+            await engine.start()
+            try:
+                await app(
+                    {
+                        "type": "http",
+                        "method": "GET",
+                        "path": "/pedido/index",
+                        "query_string": b"",
+                        "headers": [],
+                    },
+                    receive,
+                    send,
+                )
+            finally:
+                await engine.close()
+
+        asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+        assert upstream_cancelled == ["/pedido/index"]
+        assert sent_messages[0]["status"] == 499
+        assert engine.metrics.get("client_disconnects", route="list_pedidos") == 1
+
+    def test_should_document_route_table_in_openapi(self, client: TestClient):
+        operation = client.get("/openapi.json").json()["paths"]["/pedido/{pedido_id}"]
+
+        assert operation["get"]["operationId"] == "get_pedido_pedido__pedido_id__get"
+        assert operation["get"]["parameters"][0]["name"] == "pedido_id"
+
+    def test_should_return_500_when_upstream_is_unreachable(self, routes):
+        def failing_handler(request: httpx.Request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(failing_handler),
+            )
+        )
+
+        with TestClient(build_app(engine, routes)) as client:
+            result = client.get("/pedido/index")
+
+        assert result.status_code == 500
+
+    def test_should_fail_fast_with_503_while_circuit_is_open(
+        self, routes, sent_requests
+    ):
+        def failing_handler(request: httpx.Request):
+            sent_requests.append(request)
+            raise httpx.ConnectError("connection refused", request=request)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido",
+                        base_urls=["http://pedido.local/pedido"],
+                        circuit_breaker=CircuitBreakerOptions(min_requests=2),
+                    )
+                ],
+                transport=httpx.MockTransport(failing_handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+        )
+
+        with TestClient(build_app(engine, routes)) as client:
+            failures = [client.get("/pedido/index") for _ in range(2)]
+            result = client.get("/pedido/index")
+
+        assert [failure.status_code for failure in failures] == [500, 500]
+        assert result.status_code == 503
+        assert result.headers["retry-after"] == "30"
+        assert len(sent_requests) == 2
+        assert engine.circuit_breakers()["upstreams"]["pedido"]["state"] == "open"
+        assert engine.metrics.get("circuit_breaker_rejections", breaker="pedido") == 1
+
+    def test_route_breaker_should_not_affect_other_routes(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(502 if request.url.path.endswith("/flaky") else 200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+        )
+        routes = [
+            ProxyRoute(
+                name="flaky",
+                method="GET",
+                path="/flaky",
+                upstream="pedido",
+                circuit_breaker=CircuitBreakerOptions(min_requests=1),
+            ),
+            ProxyRoute(name="index", method="GET", path="/index", upstream="pedido"),
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            statuses = [client.get("/pedido/flaky").status_code for _ in range(2)]
+            other = client.get("/pedido/index")
+
+        assert statuses == [502, 503]
+        assert other.status_code == 200
+        assert engine.circuit_breakers()["routes"]["flaky"]["state"] == "open"
+
+    def test_should_retry_idempotent_calls_on_transport_errors(
+        self, routes, sent_requests
+    ):
+        def flaky_handler(request: httpx.Request):
+            sent_requests.append(request)
+            if len(sent_requests) == 1:
+                raise httpx.ReadError("connection reset", request=request)
+            return httpx.Response(200, json=[])
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(flaky_handler),
+            ),
+            retry=RetryOptions(base_delay=0, max_delay=0),
+        )
+
+        with TestClient(build_app(engine, routes)) as client:
+            result = client.get("/pedido/index")
+
+        assert result.status_code == 200
+        assert len(sent_requests) == 2
+        assert (
+            engine.metrics.get(
+                "upstream_retries", route="list_pedidos", upstream="pedido"
+            )
+            == 1
+        )
+
+    def test_should_retry_post_only_with_idempotency_key(self, routes, sent_requests):
+        def unavailable_handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(503)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(unavailable_handler),
+            ),
+            retry=RetryOptions(base_delay=0, max_delay=0),
+        )
+
+        with TestClient(build_app(engine, routes)) as client:
+            client.post("/pedido/make", json={"name": "x"})
+            without_key = len(sent_requests)
+            result = client.post(
+                "/pedido/make", json={"name": "x"}, headers={"Idempotency-Key": "k1"}
+            )
+
+        assert without_key == 1
+        assert result.status_code == 503
+        assert len(sent_requests) == 1 + 3
+
+    def test_should_stop_retrying_when_budget_is_exhausted(self, routes, sent_requests):
+        def failing_handler(request: httpx.Request):
+            sent_requests.append(request)
+            raise httpx.ConnectError("connection refused", request=request)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(failing_handler),
+            ),
+            retry=RetryOptions(
+                base_delay=0, max_delay=0, budget_ratio=0, min_retries_per_second=0.1
+            ),
+        )
+
+        with TestClient(build_app(engine, routes)) as client:
+            results = [client.get("/pedido/index") for _ in range(2)]
+
+        assert [result.status_code for result in results] == [500, 500]
+        assert len(sent_requests) == 2 + 1
+        assert engine.metrics.get("retry_budget_exhausted", route="list_pedidos") >= 1
+
+    def test_should_hedge_slow_call_to_another_replica(self, sent_requests):
+        cancelled = []
+
+        async def handler(request: httpx.Request):
+            sent_requests.append(request.url.host)
+            if request.url.host == "slow.local":
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(request.url.host)
+                    raise
+            return httpx.Response(200, json={"host": request.url.host})
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido",
+                        base_urls=[
+                            "http://slow.local/pedido",
+                            "http://fast.local/pedido",
+                        ],
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="get_pedido",
+                method="GET",
+                path="/{pedido_id}",
+                upstream="pedido",
+                path_params={"pedido_id": int},
+                hedge=HedgeOptions(initial_delay=0.05),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            result = client.get("/pedido/1")
+
+        assert result.json() == {"host": "fast.local"}
+        assert sent_requests == ["slow.local", "fast.local"]
+        assert cancelled == ["slow.local"]
+        assert engine.metrics.get("hedged_requests", route="get_pedido") == 1
+        assert engine.metrics.get("hedge_wins", route="get_pedido") == 1
+
+    def test_should_not_hedge_fast_calls(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request.url.host)
+            return httpx.Response(200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido",
+                        base_urls=["http://a.local/pedido", "http://b.local/pedido"],
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_categories",
+                method="GET",
+                path="/categories",
+                upstream="pedido",
+                hedge=HedgeOptions(initial_delay=1),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            client.get("/pedido/categories")
+
+        assert len(sent_requests) == 1
+        assert engine.routes["list_categories"].latency.samples
+
+    def test_should_forward_remaining_deadline(self, client: TestClient, sent_requests):
+        client.get("/pedido/index", headers={"X-Request-Timeout-Ms": "3000"})
+
+        forwarded = sent_requests[0].headers.get_list("x-request-timeout-ms")
+        assert len(forwarded) == 1
+        assert 2000 < int(forwarded[0]) <= 3000
+
+    def test_should_reject_expired_request_before_upstream_io(
+        self, client: TestClient, engine: ProxyEngine, sent_requests
+    ):
+        result = client.get("/pedido/index", headers={"X-Request-Timeout-Ms": "0"})
+
+        assert result.status_code == 504
+        assert sent_requests == []
+        assert engine.metrics.get("deadline_exceeded", route="list_pedidos") == 1
+
+    def test_should_answer_504_when_upstream_is_too_slow(self, sent_requests):
+        async def slow_handler(request: httpx.Request):
+            sent_requests.append(request)
+            await asyncio.sleep(5)
+            return httpx.Response(200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(slow_handler),
+            ),
+            timeout=TimeoutOptions(total=0.1),
+        )
+        routes = [
+            ProxyRoute(name="get_queue", method="GET", path="/", upstream="pedido")
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            result = client.get("/pedido/")
+
+        assert result.status_code == 504
+        assert (
+            engine.metrics.get(
+                "upstream_timeouts", route="get_queue", upstream="pedido"
+            )
+            == 1
+        )
+
+    def test_saturated_upstream_should_not_starve_others(self, sent_requests):
+        async def handler(request: httpx.Request):
+            sent_requests.append(request.url.host)
+            if request.url.host == "pedido.local":
+                await asyncio.sleep(0.3)
+            return httpx.Response(200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido",
+                        base_urls=["http://pedido.local/pedido"],
+                        bulkhead=BulkheadOptions(
+                            max_concurrent=1, max_queue=0, queue_timeout=0.1
+                        ),
+                    ),
+                    UpstreamOptions(
+                        name="produto", base_urls=["http://produto.local/produto"]
+                    ),
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+        )
+        routes = [
+            ProxyRoute(name="pedido", method="GET", path="/pedido", upstream="pedido"),
+            ProxyRoute(
+                name="produto", method="GET", path="/produto", upstream="produto"
+            ),
+        ]
+        app = build_app(engine, routes)
+
+        async def scenario():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+                ) as client:
+                    return await asyncio.gather(
+                        client.get("/pedido/pedido"),
+                        client.get("/pedido/pedido"),
+                        client.get("/pedido/produto"),
+                    )
+
+        slow, rejected, other = asyncio.run(scenario())
+
+        assert slow.status_code == 200
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "1"
+        assert other.status_code == 200
+        assert (
+            engine.metrics.get(
+                "bulkhead_rejections", bulkhead="pedido", reason="queue_full"
+            )
+            == 1
+        )
+
+    def test_overload_should_shed_low_priority_routes_only(self, sent_requests):
+        async def handler(request: httpx.Request):
+            sent_requests.append(request.url.path)
+            await asyncio.sleep(0.2)
+            return httpx.Response(200)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido",
+                        base_urls=["http://pedido.local/pedido"],
+                        bulkhead=BulkheadOptions(max_concurrent=1, queue_timeout=5),
+                        load_shedding=LoadSheddingOptions(interval=0.05),
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+        )
+        routes = [
+            ProxyRoute(
+                name="list_pedidos",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                priority=PriorityClass.SHEDDABLE,
+            ),
+            ProxyRoute(
+                name="create_pedido",
+                method="POST",
+                path="/make",
+                upstream="pedido",
+                priority=PriorityClass.CRITICAL,
+            ),
+        ]
+        app = build_app(engine, routes)
+
+        async def scenario():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+                ) as client:
+                    first = asyncio.ensure_future(client.get("/pedido/index"))
+                    queued = asyncio.ensure_future(client.get("/pedido/index"))
+                    # Lets the queue stand for more than one interval.
+                    await asyncio.sleep(0.1)
+                    return await asyncio.gather(
+                        first,
+                        queued,
+                        client.get("/pedido/index"),
+                        client.post("/pedido/make"),
+                    )
+
+        first, queued, shed, critical = asyncio.run(scenario())
+
+        assert [first.status_code, queued.status_code] == [200, 200]
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "1"
+        assert critical.status_code == 200
+        assert (
+            engine.metrics.get("requests_shed", upstream="pedido", priority="sheddable")
+            == 1
+        )
+
+    def test_identical_concurrent_gets_should_share_one_upstream_call(
+        self, sent_requests
+    ):
+        async def handler(request: httpx.Request):
+            sent_requests.append(str(request.url))
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json=["lanche"])
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                query_params={
+                    "name": (Optional[str], None),
+                    "category": (Optional[int], None),
+                },
+                coalesce=True,
+                stream=True,
+            )
+        ]
+        app = build_app(engine, routes)
+
+        async def scenario():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+                ) as client:
+                    return await asyncio.gather(
+                        client.get("/pedido/index?category=1&name=x"),
+                        client.get("/pedido/index?name=x&category=1"),
+                        client.get("/pedido/index?name=x&category=1"),
+                        client.get(
+                            "/pedido/index?name=x&category=1",
+                            headers={"Authorization": "Bearer other"},
+                        ),
+                    )
+
+        results = asyncio.run(scenario())
+
+        assert [result.json() for result in results] == [["lanche"]] * 4
+        assert len(sent_requests) == 2
+        assert (
+            engine.metrics.get(
+                "coalescing_requests", route="list_itens", role="follower"
+            )
+            == 2
+        )
+        assert engine.metrics.get("coalescing_ratio", route="list_itens") == 0.5
+
+    def test_coalesced_requests_should_time_out_independently(self, sent_requests):
+        async def handler(request: httpx.Request):
+            sent_requests.append(request)
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, json=["lanche"])
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                coalesce=True,
+            )
+        ]
+        app = build_app(engine, routes)
+
+        async def scenario():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+                ) as client:
+                    leader = asyncio.ensure_future(
+                        client.get(
+                            "/pedido/index", headers={"X-Request-Timeout-Ms": "100"}
+                        )
+                    )
+                    await asyncio.sleep(0.01)
+                    return await asyncio.gather(leader, client.get("/pedido/index"))
+
+        leader, follower = asyncio.run(scenario())
+
+        assert leader.status_code == 504
+        assert follower.status_code == 200
+        assert follower.json() == ["lanche"]
+        assert len(sent_requests) == 1
+        assert int(sent_requests[0].headers["x-request-timeout-ms"]) > 1000
+
+    def test_should_cache_responses_under_normalized_keys(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            status = 404 if request.url.params.get("category") == "0" else 200
+            return httpx.Response(status, json={"query": str(request.url.query)})
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                query_params={
+                    "name": (Optional[str], None),
+                    "category": (Optional[int], None),
+                },
+                cache=CacheOptions(ttl=60),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            miss = client.get("/pedido/index?category=1&name=x")
+            hit = client.get("/pedido/index?name=x&category=1&unknown=2")
+            other = client.get("/pedido/index?category=1")
+            not_found = [client.get("/pedido/index?category=0") for _ in range(2)]
+
+        assert miss.headers["x-cache"] == "MISS"
+        assert hit.headers["x-cache"] == "HIT"
+        assert hit.json() == miss.json()
+        assert other.headers["x-cache"] == "MISS"
+        assert [result.status_code for result in not_found] == [404, 404]
+        assert len(sent_requests) == 4
+        assert (
+            engine.metrics.get("cache_lookups", route="list_itens", result="hit") == 1
+        )
+        assert (
+            engine.metrics.get("cache_lookups", route="list_itens", result="miss") == 4
+        )
+
+    def test_private_cache_should_be_scoped_per_authorization(
+        self, upstream_handler, sent_requests
+    ):
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(upstream_handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="get_pedido",
+                method="GET",
+                path="/{pedido_id}",
+                upstream="pedido",
+                path_params={"pedido_id": int},
+                cache=CacheOptions(ttl=60, scope=CacheScope.PRIVATE),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            results = [
+                client.get("/pedido/1", headers={"Authorization": token})
+                for token in ("Bearer a", "Bearer b", "Bearer a")
+            ]
+            other_pedido = client.get(
+                "/pedido/2", headers={"Authorization": "Bearer a"}
+            )
+
+        assert [result.headers["x-cache"] for result in results] == [
+            "MISS",
+            "MISS",
+            "HIT",
+        ]
+        assert other_pedido.headers["x-cache"] == "MISS"
+        assert len(sent_requests) == 3
+
+    def test_should_serve_stale_entries_while_revalidating_and_on_errors(
+        self, sent_requests
+    ):
+        upstream = {"version": 1, "status": 200}
+
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(upstream["status"], json=upstream["version"])
+
+        clock = FakeClock()
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            retry=RetryOptions(max_attempts=1),
+            clock=clock,
+        )
+        routes = [
+            ProxyRoute(
+                name="list_categories",
+                method="GET",
+                path="/categories",
+                upstream="pedido",
+                cache=CacheOptions(
+                    ttl=10,
+                    stale_while_revalidate=5,
+                    stale_if_error=60,
+                    early_expiration=0,
+                ),
+            )
+        ]
+        app = build_app(engine, routes)
+
+        async def scenario():
+            results = []
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+                ) as client:
+
+                    async def get(advance: float):
+                        clock.now += advance
+                        results.append(await client.get("/pedido/categories"))
+                        await asyncio.sleep(0.01)
+
+                    await get(0)
+                    upstream["version"] = 2
+                    await get(12)
+                    await get(0)
+                    upstream["status"] = 503
+                    await get(30)
+                    await get(100)
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert [result.headers.get("x-cache") for result in results] == [
+            "MISS",
+            "STALE",
+            "HIT",
+            "STALE",
+            "MISS",
+        ]
+        assert [result.json() for result in results[:4]] == [1, 1, 2, 2]
+        assert results[1].headers["age"] == "12"
+        assert results[4].status_code == 503
+        assert engine.metrics.get("cache_stale_on_error", route="list_categories") == 1
+        assert len(sent_requests) == 4
+
+    def test_should_answer_304_when_body_matches_if_none_match(
+        self, client: TestClient, sent_requests
+    ):
+        first = client.get("/pedido/42")
+        etag = first.headers["etag"]
+        second = client.get("/pedido/42", headers={"If-None-Match": etag})
+        other = client.get("/pedido/43", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+        assert other.status_code == 200
+        assert other.headers["etag"] != etag
+
+    def test_should_revalidate_cached_entries_with_upstream_validators(
+        self, sent_requests
+    ):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"'})
+            return httpx.Response(200, json=["lanche"], headers={"etag": '"v1"'})
+
+        clock = FakeClock()
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            clock=clock,
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                cache=CacheOptions(ttl=10, early_expiration=0),
+                coalesce=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            miss = client.get("/pedido/index", headers={"If-None-Match": '"v1"'})
+            hit = client.get("/pedido/index", headers={"If-None-Match": '"v1"'})
+            clock.now += 20
+            revalidated = client.get("/pedido/index")
+
+        assert miss.status_code == 304
+        assert hit.status_code == 304
+        assert hit.headers["x-cache"] == "HIT"
+        assert revalidated.status_code == 200
+        assert revalidated.json() == ["lanche"]
+        assert "if-none-match" not in sent_requests[0].headers
+        assert sent_requests[1].headers["if-none-match"] == '"v1"'
+        assert (
+            engine.metrics.get(
+                "cache_revalidations", route="list_itens", result="not_modified"
+            )
+            == 1
+        )
+
+    def test_cached_entries_should_be_compressed_once_per_encoding(self, sent_requests):
+        listing = [{"id": index, "name": "lanche"} for index in range(200)]
+
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(200, json=listing)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            compression=CompressionOptions(),
+        )
+        compressed = []
+        compress = engine.compression.compress
+
+        def counting_compress(body, encoding):
+            compressed.append(encoding)
+            return compress(body, encoding)
+
+        engine.compression.compress = counting_compress
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                cache=CacheOptions(ttl=60),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            results = [
+                client.get(
+                    "/pedido/index", headers={"Accept-Encoding": "gzip;q=1, br;q=0.5"}
+                )
+                for _ in range(3)
+            ]
+            identity = client.get(
+                "/pedido/index", headers={"Accept-Encoding": "identity"}
+            )
+
+        assert [result.headers["content-encoding"] for result in results] == [
+            "gzip"
+        ] * 3
+        assert [result.json() for result in results] == [listing] * 3
+        assert results[0].headers["etag"].endswith('-gzip"')
+        assert results[0].headers["vary"] == "Accept-Encoding"
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] != results[0].headers["etag"]
+        assert compressed == [ContentEncoding.GZIP]
+        # The HTTP client asks for the encodings it can decode itself.
+        assert sent_requests[0].headers["accept-encoding"] != "gzip;q=1, br;q=0.5"
+
+    def test_unshared_routes_should_pass_upstream_encodings_through(
+        self, sent_requests
+    ):
+        item = {"id": 1, "name": "X"}
+        encoded = gzip.compress(json.dumps(item).encode())
+
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            if "gzip" not in request.headers.get("accept-encoding", ""):
+                return httpx.Response(200, json=item)
+            return httpx.Response(
+                200,
+                headers={
+                    "content-type": "application/json",
+                    "content-encoding": "gzip",
+                    "etag": '"v1-gzip"',
+                },
+                stream=RawStream(encoded),
+            )
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            compression=CompressionOptions(min_size=1),
+        )
+        compressed = []
+        compress = engine.compression.compress
+
+        def counting_compress(body, encoding):
+            compressed.append(encoding)
+            return compress(body, encoding)
+
+        engine.compression.compress = counting_compress
+        routes = [
+            ProxyRoute(
+                name="get_item",
+                method="GET",
+                path="/{item_id}",
+                upstream="pedido",
+                path_params={"item_id": int},
+                fields=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            passed = client.get("/pedido/1", headers={"Accept-Encoding": "gzip"})
+            trimmed = client.get(
+                "/pedido/1?fields=id", headers={"Accept-Encoding": "br"}
+            )
+
+        assert passed.headers["content-encoding"] == "gzip"
+        assert passed.headers["etag"] == '"v1-gzip"'
+        assert passed.json() == item
+        assert trimmed.json() == {"id": 1}
+        assert compressed == []
+        assert sent_requests[0].headers["accept-encoding"] == "gzip"
+        # Projected bodies are asked for in an encoding the gateway decodes.
+        assert sent_requests[1].headers["accept-encoding"] == "gzip, deflate"
+
+    def test_should_trim_responses_to_the_requested_fields(self, sent_requests):
+        item = {"id": 1, "name": "X", "price": {"value": 2, "currency": {"id": 3}}}
+
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(200, json=item)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                fields=True,
+                fields_hint="only",
+            ),
+            ProxyRoute(
+                name="get_item",
+                method="GET",
+                path="/{item_id}",
+                upstream="pedido",
+                path_params={"item_id": int},
+                cache=CacheOptions(ttl=60),
+                fields=True,
+            ),
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            full = client.get("/pedido/1")
+            trimmed = client.get("/pedido/1?fields=id,price.value")
+            again = client.get(
+                "/pedido/1?fields=id,price.value",
+                headers={"If-None-Match": trimmed.headers["etag"]},
+            )
+            invalid = client.get("/pedido/1?fields=price..value")
+            hinted = client.get("/pedido/index?fields=price.value,id")
+
+        assert full.json() == item
+        assert trimmed.json() == {"id": 1, "price": {"value": 2}}
+        assert trimmed.headers["etag"] != full.headers["etag"]
+        assert again.status_code == 304
+        assert invalid.status_code == 400
+        assert hinted.json() == {"id": 1, "price": {"value": 2}}
+        # The cached route shares one upstream call between projections.
+        assert [request.url.path for request in sent_requests] == [
+            "/pedido/1",
+            "/pedido/index",
+        ]
+        assert sent_requests[0].url.params.get("fields") is None
+        assert sent_requests[1].url.params["only"] == "id,price.value"
+
+    def test_should_answer_502_when_projecting_invalid_upstream_json(self):
+        def handler(request: httpx.Request):
+            return httpx.Response(
+                200, content=b'{"id": 1,', headers={"content-type": "application/json"}
+            )
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="get_item",
+                method="GET",
+                path="/{item_id}",
+                upstream="pedido",
+                path_params={"item_id": int},
+                fields=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            plain = client.get("/pedido/1")
+            trimmed = client.get("/pedido/1?fields=id")
+
+        assert plain.status_code == 200
+        assert plain.content == b'{"id": 1,'
+        assert trimmed.status_code == 502
+
+    def test_should_normalize_streamed_responses_on_request(self, sent_requests):
+        category = {"id": 2, "name": "Lanches"}
+        listing = [
+            {"product": {"id": product_id, "category": category}}
+            for product_id in (1, 3)
+        ]
+
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(200, json=listing)
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                response_model=Optional[list[ProdutoAggregate]],
+                stream=True,
+                normalize=True,
+            )
+        ]
+        normalized = {
+            "data": [
+                {"product": {"type": "produto", "id": 1}},
+                {"product": {"type": "produto", "id": 3}},
+            ],
+            "included": {
+                "produto": {
+                    "1": {"id": 1, "category": {"type": "categoria", "id": 2}},
+                    "3": {"id": 3, "category": {"type": "categoria", "id": 2}},
+                },
+                "categoria": {"2": category},
+            },
+        }
+
+        with TestClient(build_app(engine, routes)) as client:
+            plain = client.get("/pedido/index", headers={"Accept-Encoding": "br"})
+            by_flag = client.get("/pedido/index?normalize=true")
+            by_accept = client.get(
+                "/pedido/index",
+                headers={"Accept": "application/vnd.fastfood.normalized+json"},
+            )
+
+        assert plain.json() == listing
+        assert by_flag.json() == normalized
+        assert by_accept.json() == normalized
+        assert by_accept.headers["content-type"] == (
+            "application/vnd.fastfood.normalized+json"
+        )
+        assert by_accept.headers["vary"] == "Accept"
+        # Plain requests are still streamed with the caller's encodings.
+        assert sent_requests[0].headers["accept-encoding"] == "br"
+        assert sent_requests[2].headers["accept-encoding"] == "gzip, deflate"
+
+    def test_should_answer_502_when_normalizing_invalid_upstream_json(self):
+        def handler(request: httpx.Request):
+            return httpx.Response(
+                200, content=b"[{", headers={"content-type": "application/json"}
+            )
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                response_model=Optional[list[ProdutoAggregate]],
+                normalize=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            by_flag = client.get("/pedido/index?normalize=true")
+            by_accept = client.get(
+                "/pedido/index",
+                headers={"Accept": "application/vnd.fastfood.normalized+json"},
+            )
+            invalid_flag = client.get("/pedido/index?normalize=maybe")
+
+        assert by_flag.status_code == 502
+        assert by_accept.status_code == 502
+        assert invalid_flag.status_code == 422
+
+    def test_shared_stream_routes_should_stream_bodies_over_the_limit(
+        self, sent_requests
+    ):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            size = int(request.url.params["size"])
+            return httpx.Response(200, json=[{"id": n} for n in range(size)])
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                query_params={"size": (int, ...)},
+                stream=True,
+                coalesce=True,
+                cache=CacheOptions(ttl=60),
+                shared_body_limit=100,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            small = [client.get("/pedido/index?size=2") for _ in range(2)]
+            large = [
+                client.get("/pedido/index?size=50", headers={"Accept-Encoding": "br"})
+                for _ in range(2)
+            ]
+
+        assert [result.headers["x-cache"] for result in small] == ["MISS", "HIT"]
+        assert [result.json() for result in large] == [
+            [{"id": n} for n in range(50)]
+        ] * 2
+        assert all("x-cache" not in result.headers for result in large)
+        assert "content-encoding" not in large[0].headers
+        # Each large request tries the shared call, then streams its own.
+        assert len(sent_requests) == 5
+        assert all(
+            request.headers["accept-encoding"] != "br" for request in sent_requests
+        )
+        assert engine.metrics.get("shared_body_too_large", route="list_itens") == 2
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"cache-control": "private, max-age=60"},
+            {"vary": "Accept, Authorization"},
+            {"vary": "*"},
+        ],
+    )
+    def test_public_cache_should_not_store_per_caller_responses(
+        self, sent_requests, headers
+    ):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            return httpx.Response(
+                200,
+                json={"authorization": request.headers["authorization"]},
+                headers=headers,
+            )
+
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            )
+        )
+        routes = [
+            ProxyRoute(
+                name="list_itens",
+                method="GET",
+                path="/index",
+                upstream="pedido",
+                cache=CacheOptions(ttl=60, scope=CacheScope.PUBLIC),
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            admin = client.get("/pedido/index", headers={"Authorization": "admin"})
+            kiosk = client.get("/pedido/index", headers={"Authorization": "kiosk"})
+
+        assert admin.json() == {"authorization": "admin"}
+        assert kiosk.json() == {"authorization": "kiosk"}
+        assert kiosk.headers["x-cache"] == "MISS"
+        assert len(sent_requests) == 2
+
+    def test_cache_should_weigh_responses_with_their_variants(self, sent_requests):
+        def handler(request: httpx.Request):
+            sent_requests.append(request)
+            size = 100 if request.url.path == "/pedido/small" else 5000
+            return httpx.Response(200, json=[{"id": n} for n in range(size)])
+
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_entry_bytes=10_000)
+        engine = ProxyEngine(
+            UpstreamClients(
+                [
+                    UpstreamOptions(
+                        name="pedido", base_urls=["http://pedido.local/pedido"]
+                    )
+                ],
+                transport=httpx.MockTransport(handler),
+            ),
+            cache=cache,
+            compression=CompressionOptions(min_size=1),
+        )
+        routes = [
+            ProxyRoute(
+                name="get_list",
+                method="GET",
+                path="/{name}",
+                upstream="pedido",
+                path_params={"name": str},
+                cache=CacheOptions(ttl=60),
+                fields=True,
+            )
+        ]
+
+        with TestClient(build_app(engine, routes)) as client:
+            client.get("/pedido/small")
+            stored = cache.total_bytes
+            client.get("/pedido/small?fields=id", headers={"Accept-Encoding": "gzip"})
+            client.get("/pedido/small")
+            grown = cache.total_bytes
+            large = [client.get("/pedido/large") for _ in range(2)]
+
+        assert grown > stored
+        assert [result.headers["x-cache"] for result in large] == ["MISS"] * 2
+        assert len(cache) == 1
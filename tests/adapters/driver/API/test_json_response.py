@@ -0,0 +1,66 @@
+from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+
+from src.adapters.driver.API.json_response import (
+    GatewayJSONResponse,
+    request_validation_exception_handler,
+)
+
+
+class ExampleBody(BaseModel):
+    pedido_id: int
+
+    @field_validator("pedido_id")
+    @classmethod
+    def positive(cls, value: int) -> int:
+        if value <= 0:
+            raise ValueError("pedido_id must be positive")
+        return value
+
+
+def build_client(monkeypatch, rendered):
+    render = GatewayJSONResponse.render
+
+    def spy(self, content):
+        rendered.append(content)
+        return render(self, content)
+
+    monkeypatch.setattr(GatewayJSONResponse, "render", spy)
+    app = FastAPI()
+    app.add_exception_handler(
+        RequestValidationError, request_validation_exception_handler
+    )
+
+    @app.post("/pedido")
+    async def create_pedido(body: ExampleBody):
+        return body
+
+    return TestClient(app)
+
+
+class TestRequestValidationExceptionHandler:
+    def test_should_render_validation_errors_with_the_gateway_codec(self, monkeypatch):
+        rendered = []
+        client = build_client(monkeypatch, rendered)
+
+        response = client.post("/pedido", json={"pedido_id": -1})
+
+        assert response.status_code == 422
+        assert len(rendered) == 1
+        error = response.json()["detail"][0]
+        assert error["loc"] == ["body", "pedido_id"]
+        assert error["ctx"] == {"error": "pedido_id must be positive"}
+
+    def test_should_render_undecodable_bodies(self, monkeypatch):
+        client = build_client(monkeypatch, [])
+
+        response = client.post(
+            "/pedido",
+            content=b"{invalid",
+            headers={"content-type": "application/json"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.adapters.driven.upstream.upstream_client import UpstreamClients
+from src.adapters.driven.upstream.upstream_options import UpstreamOptions
+from src.adapters.driver.API.produto_router import build_router
+from src.adapters.driver.API.proxy.proxy_engine import ProxyEngine
+from src.core.helpers.options.batch_options import BatchOptions
+from src.core.helpers.options.retry_options import RetryOptions
+
+TOKEN_A = {"Authorization": "Bearer a"}
+TOKEN_B = {"Authorization": "Bearer b"}
+
+
+@pytest.fixture
+def upstream():
+    sent = []
+    state = {"running": 0, "peak": 0}
+
+    async def handler(request: httpx.Request):
+        sent.append(request.url.path)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.02)
+        state["running"] -= 1
+        item_id = int(request.url.path.rsplit("/", 1)[1])
+        if item_id == 4:
+            return httpx.Response(404, json={"detail": "Not found"})
+        if item_id == 6:
+            return httpx.Response(
+                200, content=b"<html>", headers={"content-type": "application/json"}
+            )
+        return httpx.Response(200, json={"id": item_id})
+
+    return sent, state, handler
+
+
+def build_app(handler) -> FastAPI:
+    engine = ProxyEngine(
+        UpstreamClients(
+            [UpstreamOptions(name="produto", base_urls=["http://produto.local/p"])],
+            transport=httpx.MockTransport(handler),
+        ),
+        retry=RetryOptions(max_attempts=1),
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await engine.start()
+        yield
+        await engine.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(
+        build_router(engine, BatchOptions(max_requests=5, concurrency=2))
+    )
+    return app
+
+
+def run(app: FastAPI, requests):
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+            ) as client:
+                return [
+                    await client.get(url, headers=headers) for url, headers in requests
+                ]
+
+    return asyncio.run(scenario())
+
+
+class TestGetItemsBatch:
+    def test_should_fetch_only_cache_misses_in_order(self, upstream):
+        sent, state, handler = upstream
+
+        _, batch, single = run(
+            build_app(handler),
+            [
+                ("/produto/2", TOKEN_A),
+                ("/produto/batch?ids=3,2,4&ids=1,3", TOKEN_A),
+                ("/produto/1", TOKEN_A),
+            ],
+        )
+
+        assert batch.status_code == 200
+        assert batch.json()["items"] == [
+            {"id": 3, "found": True, "item": {"id": 3}},
+            {"id": 2, "found": True, "item": {"id": 2}},
+            {"id": 4, "found": False},
+            {"id": 1, "found": True, "item": {"id": 1}},
+            {"id": 3, "found": True, "item": {"id": 3}},
+        ]
+        assert sorted(sent) == ["/p/1", "/p/2", "/p/3", "/p/4"]
+        assert state["peak"] == 2
+        assert single.headers["x-cache"] == "HIT"
+
+    def test_should_not_share_cached_items_between_callers(self, upstream):
+        sent, _, handler = upstream
+
+        first, second = run(
+            build_app(handler),
+            [
+                ("/produto/batch?ids=1", TOKEN_A),
+                ("/produto/batch?ids=1", TOKEN_B),
+            ],
+        )
+
+        assert first.status_code == second.status_code == 200
+        assert sent == ["/p/1", "/p/1"]
+
+    def test_should_report_invalid_payloads_per_item(self, upstream):
+        _, _, handler = upstream
+
+        (response,) = run(build_app(handler), [("/produto/batch?ids=6,1", TOKEN_A)])
+
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"id": 6, "found": False, "error": "invalid_payload"},
+            {"id": 1, "found": True, "item": {"id": 1}},
+        ]
+
+    @pytest.mark.parametrize(
+        "query, status_code",
+        [
+            ("", 422),
+            ("?ids=", 422),
+            ("?ids=1,,2", 422),
+            ("?ids=1,dois", 422),
+            ("?ids=1,2,3&ids=4,5,6", 400),
+        ],
+    )
+    def test_should_reject_invalid_ids(self, upstream, query, status_code):
+        sent, _, handler = upstream
+
+        (response,) = run(build_app(handler), [(f"/produto/batch{query}", TOKEN_A)])
+
+        assert response.status_code == status_code
+        assert sent == []
@@ -0,0 +1,18 @@
+from src.core.helpers.functions.etag import etag_matches, strong_etag
+
+
+class TestEtag:
+    def test_equal_bodies_should_get_equal_strong_tags(self):
+        etag = strong_etag(b'[{"id": 1}]')
+
+        assert etag == strong_etag(b'[{"id": 1}]')
+        assert etag != strong_etag(b'[{"id": 2}]')
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_if_none_match_should_use_weak_comparison(self):
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches('"a"', 'W/"a"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"a"')
+        assert not etag_matches('"a"', None)
@@ -0,0 +1,78 @@
+import pytest
+
+from src.core.helpers.enums.limit_algorithm import LimitAlgorithm
+from src.core.helpers.options.adaptive_limit_options import AdaptiveLimitOptions
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.services.adaptive_limiter import AdaptiveLimiter
+from src.core.helpers.services.bulkhead import Bulkhead
+from tests.test_resources.fake_clock import FakeClock
+
+
+class TestAdaptiveLimiter:
+    @pytest.fixture
+    def bulkhead(self):
+        return Bulkhead("pedido", BulkheadOptions())
+
+    def build(self, bulkhead, algorithm, clock=None) -> AdaptiveLimiter:
+        return AdaptiveLimiter(
+            "pedido",
+            AdaptiveLimitOptions(
+                algorithm=algorithm, initial_limit=10, batch_size=5, smoothing=1
+            ),
+            bulkhead,
+            clock=clock or FakeClock(),
+        )
+
+    def feed(self, limiter: AdaptiveLimiter, rtt: float, in_flight: int, times=5):
+        for _ in range(times):
+            limiter.on_sample(rtt, in_flight)
+
+    def test_aimd_should_grow_while_latency_stays_at_baseline(self, bulkhead):
+        limiter = self.build(bulkhead, LimitAlgorithm.AIMD)
+
+        self.feed(limiter, 0.01, in_flight=10, times=15)
+
+        assert bulkhead.limit == 13
+
+    def test_aimd_should_not_grow_when_the_limit_is_not_used(self, bulkhead):
+        limiter = self.build(bulkhead, LimitAlgorithm.AIMD)
+
+        self.feed(limiter, 0.01, in_flight=2, times=15)
+
+        assert bulkhead.limit == 10
+
+    def test_aimd_should_back_off_when_latency_rises(self, bulkhead):
+        limiter = self.build(bulkhead, LimitAlgorithm.AIMD)
+        self.feed(limiter, 0.01, in_flight=10)
+
+        self.feed(limiter, 0.05, in_flight=11)
+
+        assert limiter.limit == pytest.approx(11 * 0.9)
+
+    def test_should_back_off_on_dropped_calls(self, bulkhead):
+        limiter = self.build(bulkhead, LimitAlgorithm.GRADIENT)
+
+        limiter.on_sample(5, in_flight=10, dropped=True)
+
+        assert limiter.limit == pytest.approx(9)
+
+    def test_gradient_should_shrink_toward_baseline_latency(self, bulkhead):
+        limiter = self.build(bulkhead, LimitAlgorithm.GRADIENT)
+        self.feed(limiter, 0.01, in_flight=10)
+        grown = limiter.limit
+
+        for _ in range(5):
+            self.feed(limiter, 0.1, in_flight=10)
+
+        assert grown > 10
+        assert bulkhead.limit < 10
+
+    def test_baseline_should_forget_old_samples(self, bulkhead):
+        clock = FakeClock()
+        limiter = self.build(bulkhead, LimitAlgorithm.GRADIENT, clock)
+        self.feed(limiter, 0.01, in_flight=1)
+
+        clock.now += 31
+        self.feed(limiter, 0.05, in_flight=1)
+
+        assert limiter.baseline() == 0.05
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.options.bulkhead_options import BulkheadOptions
+from src.core.helpers.services.bulkhead import Bulkhead, BulkheadFull
+from src.core.helpers.services.in_memory_metrics import InMemoryMetricsService
+
+
+class TestBulkhead:
+    @pytest.fixture
+    def metrics(self):
+        return InMemoryMetricsService()
+
+    def build(self, metrics, **options) -> Bulkhead:
+        return Bulkhead("pedido", BulkheadOptions(**options), metrics)
+
+    def test_should_queue_calls_over_the_limit(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1, max_queue=1)
+
+        async def scenario():
+            await bulkhead.acquire()
+            waiting = asyncio.ensure_future(bulkhead.acquire())
+            await asyncio.sleep(0)
+            depth = metrics.get("bulkhead_queue_depth", bulkhead="pedido")
+            bulkhead.release()
+            await waiting
+            return depth
+
+        assert asyncio.run(scenario()) == 1
+        assert bulkhead.in_flight == 1
+        assert bulkhead.queue_depth == 0
+
+    def test_should_reject_when_queue_is_full(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1, max_queue=0)
+
+        async def scenario():
+            await bulkhead.acquire()
+            await bulkhead.acquire()
+
+        with pytest.raises(BulkheadFull):
+            asyncio.run(scenario())
+        assert (
+            metrics.get("bulkhead_rejections", bulkhead="pedido", reason="queue_full")
+            == 1
+        )
+
+    def test_should_reject_after_queue_timeout(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1, queue_timeout=0.01)
+
+        async def scenario():
+            await bulkhead.acquire()
+            await bulkhead.acquire()
+
+        with pytest.raises(BulkheadFull):
+            asyncio.run(scenario())
+        assert bulkhead.queue_depth == 0
+        assert (
+            metrics.get(
+                "bulkhead_rejections", bulkhead="pedido", reason="queue_timeout"
+            )
+            == 1
+        )
+
+    def test_raising_the_limit_should_admit_waiting_calls(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1)
+
+        async def scenario():
+            await bulkhead.acquire()
+            waiting = asyncio.ensure_future(bulkhead.acquire())
+            await asyncio.sleep(0)
+            bulkhead.limit = 2
+            await waiting
+
+        asyncio.run(scenario())
+
+        assert bulkhead.in_flight == 2
+
+    def test_cancelled_waiter_should_leave_the_queue(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1)
+
+        async def scenario():
+            await bulkhead.acquire()
+            waiting = asyncio.ensure_future(bulkhead.acquire())
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            bulkhead.release()
+
+        asyncio.run(scenario())
+
+        assert bulkhead.in_flight == 0
+        assert bulkhead.queue_depth == 0
+
+    def test_freed_slots_should_go_to_critical_calls_first(self, metrics):
+        bulkhead = self.build(metrics, max_concurrent=1)
+        admitted = []
+
+        async def call(priority: PriorityClass):
+            await bulkhead.acquire(priority)
+            admitted.append(priority)
+
+        async def scenario():
+            await bulkhead.acquire()
+            waiting = [
+                asyncio.ensure_future(call(PriorityClass.SHEDDABLE)),
+                asyncio.ensure_future(call(PriorityClass.CRITICAL)),
+            ]
+            await asyncio.sleep(0)
+            bulkhead.release()
+            await asyncio.sleep(0)
+            bulkhead.release()
+            await asyncio.gather(*waiting)
+
+        asyncio.run(scenario())
+
+        assert admitted == [PriorityClass.CRITICAL, PriorityClass.SHEDDABLE]
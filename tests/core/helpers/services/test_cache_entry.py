@@ -0,0 +1,37 @@
+from src.core.helpers.services.cache_entry import CacheEntry
+
+
+class TestCacheEntry:
+    def test_entry_should_be_fresh_until_ttl(self):
+        entry = CacheEntry("menu", stored_at=1000.0, ttl=60)
+
+        assert entry.is_fresh(1059.0)
+        assert not entry.is_fresh(1060.0)
+        assert entry.age(1030.0) == 30.0
+
+    def test_stale_entry_should_be_usable_within_window(self):
+        entry = CacheEntry("menu", stored_at=1000.0, ttl=60)
+
+        assert entry.is_usable(1089.0, stale_window=30)
+        assert not entry.is_usable(1090.0, stale_window=30)
+
+    def test_early_expiration_should_grow_closer_to_expiry(self):
+        entry = CacheEntry("menu", stored_at=1000.0, ttl=60, compute_time=2.0)
+
+        def expired_share(now: float) -> float:
+            draws = [index / 100 for index in range(100)]
+            return sum(
+                not entry.is_fresh(now, early_expiration=1.0, rand=lambda: draw)
+                for draw in draws
+            ) / len(draws)
+
+        assert expired_share(1000.0) == 0
+        assert 0 < expired_share(1055.0) < expired_share(1059.0) < 1
+        assert expired_share(1060.0) == 1
+
+    def test_slow_values_should_expire_earlier(self):
+        fast = CacheEntry("categories", stored_at=1000.0, ttl=60, compute_time=0.01)
+        slow = CacheEntry("menu", stored_at=1000.0, ttl=60, compute_time=5.0)
+
+        assert fast.is_fresh(1055.0, early_expiration=1.0, rand=lambda: 0.9)
+        assert not slow.is_fresh(1055.0, early_expiration=1.0, rand=lambda: 0.9)
@@ -0,0 +1,109 @@
+import pytest
+
+from src.core.helpers.enums.circuit_state import CircuitState
+from src.core.helpers.options.circuit_breaker_options import CircuitBreakerOptions
+from src.core.helpers.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.core.helpers.services.in_memory_metrics import InMemoryMetricsService
+from tests.test_resources.fake_clock import FakeClock
+
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def metrics(self):
+        return InMemoryMetricsService()
+
+    @pytest.fixture
+    def breaker(self, clock, metrics):
+        return CircuitBreaker(
+            "payment",
+            CircuitBreakerOptions(
+                min_requests=4, open_time=30, half_open_calls=2, slow_call_time=1
+            ),
+            metrics,
+            clock=clock,
+        )
+
+    def fail(self, breaker: CircuitBreaker, times: int):
+        for _ in range(times):
+            breaker.acquire()
+            breaker.record_failure(0.01)
+
+    def test_should_stay_closed_below_min_requests(self, breaker: CircuitBreaker):
+        self.fail(breaker, 3)
+
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_should_open_when_error_rate_is_reached(self, breaker: CircuitBreaker):
+        breaker.acquire()
+        breaker.record_success(0.01)
+        self.fail(breaker, 3)
+
+        assert breaker.state is CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.acquire()
+        assert error.value.retry_after == 30
+
+    def test_should_open_when_calls_are_slow(self, breaker: CircuitBreaker):
+        for _ in range(4):
+            breaker.acquire()
+            breaker.record_success(2)
+
+        assert breaker.state is CircuitState.OPEN
+
+    def test_should_forget_calls_outside_the_window(
+        self, breaker: CircuitBreaker, clock: FakeClock
+    ):
+        self.fail(breaker, 3)
+        clock.now += 11
+        self.fail(breaker, 1)
+
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_should_close_after_successful_trial_calls(
+        self, breaker: CircuitBreaker, clock: FakeClock, metrics
+    ):
+        self.fail(breaker, 4)
+        clock.now += 30
+
+        breaker.acquire()
+        breaker.acquire()
+        assert breaker.state is CircuitState.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        breaker.record_success(0.01)
+        breaker.record_success(0.01)
+
+        assert breaker.state is CircuitState.CLOSED
+        assert (
+            metrics.get(
+                "circuit_breaker_transitions", breaker="payment", state="closed"
+            )
+            == 1
+        )
+
+    def test_should_reopen_when_a_trial_call_fails(
+        self, breaker: CircuitBreaker, clock: FakeClock
+    ):
+        self.fail(breaker, 4)
+        clock.now += 30
+
+        self.fail(breaker, 1)
+
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.retry_after() == 30
+
+    def test_release_should_free_a_trial_slot(
+        self, breaker: CircuitBreaker, clock: FakeClock
+    ):
+        self.fail(breaker, 4)
+        clock.now += 30
+        breaker.acquire()
+        breaker.acquire()
+
+        breaker.release()
+
+        breaker.acquire()
@@ -0,0 +1,39 @@
+import gzip
+
+from src.core.helpers.enums.content_encoding import ContentEncoding
+from src.core.helpers.options.compression_options import CompressionOptions
+from src.core.helpers.services.compression import Compression
+
+
+class TestCompression:
+    def test_should_negotiate_highest_weighted_available_encoding(self):
+        compression = Compression(CompressionOptions())
+        compression.encodings = (ContentEncoding.BROTLI, ContentEncoding.GZIP)
+
+        assert compression.negotiate("gzip, br") == ContentEncoding.BROTLI
+        assert compression.negotiate("gzip;q=1.0, br;q=0.5") == ContentEncoding.GZIP
+        assert compression.negotiate("zstd, gzip;q=0.1") == ContentEncoding.GZIP
+        assert compression.negotiate("*;q=0.5, br;q=0") == ContentEncoding.GZIP
+        assert compression.negotiate("identity") is None
+        assert compression.negotiate("gzip;q=0") is None
+        assert compression.negotiate(None) is None
+
+    def test_should_only_compress_allowed_types_above_threshold(self):
+        compression = Compression(CompressionOptions(min_size=100))
+
+        assert compression.compressible("application/json; charset=utf-8", 100)
+        assert compression.compressible("text/html", None)
+        assert compression.compressible("application/vnd.fastfood.normalized+json", 100)
+        assert not compression.compressible("application/json", 99)
+        assert not compression.compressible("image/png", 1000)
+        assert not compression.compressible(None, 1000)
+
+    def test_gzip_output_should_be_deterministic(self):
+        compression = Compression(CompressionOptions())
+        body = b'[{"id": 1, "name": "lanche"}]' * 100
+
+        compressed = compression.compress(body, ContentEncoding.GZIP)
+
+        assert gzip.decompress(compressed) == body
+        assert compressed == compression.compress(body, ContentEncoding.GZIP)
+        assert len(compressed) < len(body)
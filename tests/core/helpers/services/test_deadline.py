@@ -0,0 +1,37 @@
+import pytest
+
+from src.core.helpers.services.deadline import Deadline, DeadlineExceeded
+from tests.test_resources.fake_clock import FakeClock
+
+
+class TestDeadline:
+    def test_remaining_should_count_down_to_zero(self):
+        clock = FakeClock()
+        deadline = Deadline(2, clock=clock)
+
+        clock.now += 1.5
+        assert deadline.remaining() == 0.5
+
+        clock.now += 1
+        assert deadline.remaining() == 0
+        assert deadline.expired()
+
+    def test_shorten_should_only_move_the_deadline_earlier(self):
+        clock = FakeClock()
+        deadline = Deadline(2, clock=clock)
+
+        deadline.shorten(5)
+        assert deadline.remaining() == 2
+
+        deadline.shorten(1)
+        assert deadline.remaining() == 1
+
+    def test_check_should_raise_once_expired(self):
+        clock = FakeClock()
+        deadline = Deadline(1, clock=clock)
+        deadline.check()
+
+        clock.now += 1
+
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
@@ -0,0 +1,85 @@
+import sys
+import threading
+from time import sleep
+
+from src.core.helpers.services.in_memory_cache import InMemoryCacheService
+
+
+class TestInMemoryCacheService:
+    def test_should_evict_least_recently_used_entries_over_the_bound(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_entries=2)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_cleaner_should_survive_concurrent_writes(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_entries=10_000)
+        stop = threading.Event()
+        errors = []
+
+        def clean():
+            while not stop.is_set():
+                try:
+                    cache._clean_expired_entries()
+                except Exception as e:
+                    errors.append(e)
+
+        cleaner = threading.Thread(target=clean)
+        cleaner.start()
+        try:
+            for n in range(20_000):
+                cache.set(str(n), n, ttl=0 if n % 2 else 1)
+        finally:
+            stop.set()
+            cleaner.join()
+
+        assert errors == []
+
+    def test_should_remove_expired_entries(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False)
+        cache.set("expired", 1, ttl=1)
+        cache.set("kept", 2, ttl=60)
+        sleep(1.1)
+
+        cache._clean_expired_entries()
+
+        assert list(cache.cache) == ["kept"]
+
+    def test_should_evict_least_recently_used_entries_over_the_byte_bound(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_bytes=500)
+
+        cache.set("a", b"a" * 200)
+        cache.set("b", b"b" * 200)
+        cache.get("a")
+        cache.set("c", b"c" * 200)
+
+        assert list(cache.cache) == ["a", "c"]
+        assert cache.total_bytes == sum(map(sys.getsizeof, [b"a" * 200] * 2))
+
+    def test_should_weigh_entries_again_when_read(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_bytes=1000)
+        growing = bytearray(100)
+        cache.set("growing", growing)
+        cache.set("other", b"o" * 100)
+
+        growing.extend(bytes(800))
+        cache.get("growing")
+
+        assert list(cache.cache) == ["growing"]
+        assert cache.total_bytes == sys.getsizeof(growing)
+
+    def test_should_not_store_entries_over_the_entry_bound(self):
+        cache = InMemoryCacheService(start_cleaner_deamon=False, max_entry_bytes=100)
+        cache.set("key", b"small")
+
+        cache.set("key", b"x" * 200)
+
+        assert cache.get("key") is None
+        assert cache.total_bytes == 0
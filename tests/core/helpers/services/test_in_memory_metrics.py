@@ -0,0 +1,25 @@
+from src.core.helpers.services.in_memory_metrics import InMemoryMetricsService
+
+
+class TestInMemoryMetricsService:
+    def test_increment_should_count_per_label_set(self):
+        metrics = InMemoryMetricsService()
+
+        metrics.increment("client_disconnects", route="get_pedido")
+        metrics.increment("client_disconnects", route="get_pedido")
+        metrics.increment("client_disconnects", route="get_queue")
+
+        assert metrics.get("client_disconnects", route="get_pedido") == 2
+        assert metrics.get("client_disconnects", route="get_queue") == 1
+
+    def test_snapshot_should_group_values_by_name(self):
+        metrics = InMemoryMetricsService()
+        metrics.increment("client_disconnects", route="get_pedido")
+        metrics.set_gauge("in_flight", 3, upstream="pedido")
+
+        assert metrics.snapshot() == {
+            "counters": {
+                "client_disconnects": [{"labels": {"route": "get_pedido"}, "value": 1}]
+            },
+            "gauges": {"in_flight": [{"labels": {"upstream": "pedido"}, "value": 3}]},
+        }
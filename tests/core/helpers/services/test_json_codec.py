@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from src.core.helpers.enums.compra_status import CompraStatus
+from src.core.helpers.enums.pagamento_status import PagamentoStatus
+from src.core.helpers.services.json_codec import (
+    OrjsonCodec,
+    StdlibJsonCodec,
+    build_json_codec,
+    orjson,
+)
+
+CODECS = [StdlibJsonCodec()] + ([OrjsonCodec()] if orjson is not None else [])
+
+
+class Preco(BaseModel):
+    value: Decimal
+    currency: str
+
+
+PEDIDO = {
+    "id": 1,
+    "status": CompraStatus.PAGO,
+    "pagamento": PagamentoStatus.PROCESSANDO,
+    "created_at": datetime(2024, 10, 1, 12, 30, 15, 250000),
+    "total": Decimal("25.90"),
+    "quantity": Decimal("3"),
+    "preco": Preco(value=Decimal("12.5"), currency="BRL"),
+    "tags": {"lanche"},
+    "nome": "Pão de queijo",
+}
+
+
+class TestJsonCodec:
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+    def test_should_encode_like_fastapi_encoder(self, codec):
+        expected = json.loads(json.dumps(jsonable_encoder(PEDIDO)))
+
+        assert codec.loads(codec.dumps(PEDIDO)) == expected
+        assert expected["status"] == 2
+        assert expected["total"] == 25.9
+        assert expected["quantity"] == 3
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+    def test_should_reject_unknown_types(self, codec):
+        with pytest.raises(TypeError):
+            codec.dumps({"value": object()})
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+    def test_should_raise_value_error_on_invalid_json(self, codec):
+        with pytest.raises(ValueError):
+            codec.loads(b"{invalid")
+
+    def test_should_fall_back_to_stdlib(self):
+        assert isinstance(build_json_codec("json"), StdlibJsonCodec)
@@ -0,0 +1,24 @@
+from src.core.helpers.services.latency_tracker import LatencyTracker
+
+
+class TestLatencyTracker:
+    def test_percentile_should_follow_recorded_samples(self):
+        tracker = LatencyTracker(window=100, refresh_every=1)
+        for latency in range(1, 101):
+            tracker.record(latency / 1000)
+
+        assert tracker.percentile(0.5) == 0.051
+        assert tracker.percentile(0.95) == 0.096
+
+    def test_should_keep_only_the_last_window(self):
+        tracker = LatencyTracker(window=10, refresh_every=1)
+        for _ in range(10):
+            tracker.record(1.0)
+        for _ in range(10):
+            tracker.record(0.01)
+
+        assert len(tracker) == 10
+        assert tracker.percentile(0.95) == 0.01
+
+    def test_percentile_should_be_zero_without_samples(self):
+        assert LatencyTracker().percentile(0.95) == 0.0
@@ -0,0 +1,68 @@
+import pytest
+
+from src.core.helpers.enums.priority_class import PriorityClass
+from src.core.helpers.options.load_shedding_options import LoadSheddingOptions
+from src.core.helpers.services.in_memory_metrics import InMemoryMetricsService
+from src.core.helpers.services.load_shedder import LoadShed, LoadShedder
+from tests.test_resources.fake_clock import FakeClock
+
+
+class TestLoadShedder:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def metrics(self):
+        return InMemoryMetricsService()
+
+    @pytest.fixture
+    def shedder(self, clock, metrics):
+        return LoadShedder(
+            "produto",
+            LoadSheddingOptions(target=0.005, interval=0.1, escalation=2),
+            metrics,
+            clock=clock,
+        )
+
+    def interval(self, shedder: LoadShedder, clock: FakeClock, delays: list[float]):
+        for delay in delays:
+            shedder.record_delay(delay)
+        clock.now += 0.1
+        shedder.admit(PriorityClass.CRITICAL)
+
+    def test_short_bursts_should_not_shed(self, shedder, clock):
+        self.interval(shedder, clock, [0.05, 0.0, 0.2])
+
+        shedder.admit(PriorityClass.SHEDDABLE)
+
+    def test_standing_queue_should_shed_sheddable_first(self, shedder, clock, metrics):
+        self.interval(shedder, clock, [0.05, 0.02])
+
+        with pytest.raises(LoadShed):
+            shedder.admit(PriorityClass.SHEDDABLE)
+        shedder.admit(PriorityClass.STANDARD)
+        assert (
+            metrics.get("requests_shed", upstream="produto", priority="sheddable") == 1
+        )
+
+    def test_persistent_queue_should_escalate_but_keep_critical(self, shedder, clock):
+        for _ in range(3):
+            self.interval(shedder, clock, [0.05])
+
+        with pytest.raises(LoadShed):
+            shedder.admit(PriorityClass.STANDARD)
+        shedder.admit(PriorityClass.CRITICAL)
+
+    def test_waiting_calls_should_count_when_none_leave_the_queue(self, shedder, clock):
+        clock.now += 0.1
+
+        with pytest.raises(LoadShed):
+            shedder.admit(PriorityClass.SHEDDABLE, oldest_wait=0.5)
+
+    def test_should_stop_shedding_once_the_queue_drains(self, shedder, clock):
+        self.interval(shedder, clock, [0.05])
+        self.interval(shedder, clock, [0.0])
+
+        shedder.admit(PriorityClass.SHEDDABLE)
+        assert shedder.level == 0
@@ -0,0 +1,85 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.core.helpers.services.normalization import compile_normalizer
+
+
+class CurrencyEntity(BaseModel):
+    id: int
+    code: str
+
+
+class PrecoValueObject(BaseModel):
+    value: float
+    currency: CurrencyEntity
+
+
+class ProdutoEntity(BaseModel):
+    id: Optional[int] = None
+    name: str
+    price: PrecoValueObject
+    components: Optional[List["ProdutoEntity"]] = None
+
+
+class ProdutoAggregate(BaseModel):
+    product: ProdutoEntity
+    sold_amount: int = 0
+
+
+REAL = {"id": 1, "code": "BRL"}
+
+
+def produto(id, components=None):
+    return {
+        "id": id,
+        "name": f"produto {id}",
+        "price": {"value": 1.0, "currency": REAL},
+        "components": components,
+    }
+
+
+class TestNormalization:
+    def test_should_include_each_nested_entity_once(self):
+        normalizer = compile_normalizer(Optional[List[ProdutoAggregate]])
+        pao = produto(3)
+
+        normalized = normalizer(
+            [
+                {"product": produto(1, [pao]), "sold_amount": 2},
+                {"product": produto(2, [pao, {**pao, "id": None}])},
+            ]
+        )
+
+        assert normalized["data"] == [
+            {"product": {"type": "produto", "id": 1}, "sold_amount": 2},
+            {"product": {"type": "produto", "id": 2}},
+        ]
+        assert normalized["included"]["currency"] == {"1": REAL}
+        assert normalized["included"]["produto"]["3"] == {
+            "id": 3,
+            "name": "produto 3",
+            "price": {"value": 1.0, "currency": {"type": "currency", "id": 1}},
+            "components": None,
+        }
+        assert normalized["included"]["produto"]["2"]["components"] == [
+            {"type": "produto", "id": 3},
+            {
+                **pao,
+                "id": None,
+                "price": {"value": 1.0, "currency": {"type": "currency", "id": 1}},
+            },
+        ]
+
+    def test_top_level_entities_should_stay_in_data(self):
+        normalizer = compile_normalizer(ProdutoEntity)
+
+        normalized = normalizer(produto(1))
+
+        assert normalized["data"]["id"] == 1
+        assert normalized["data"]["price"]["currency"] == {"type": "currency", "id": 1}
+        assert "produto" not in normalized["included"]
+
+    def test_models_without_nested_entities_should_not_be_normalized(self):
+        assert compile_normalizer(List[CurrencyEntity]) is None
+        assert compile_normalizer(None) is None
@@ -0,0 +1,46 @@
+import pytest
+
+from src.core.helpers.services.projection import Projection, compile_projection
+
+PRODUTO = {
+    "id": 1,
+    "name": "X-Burger",
+    "orders": 120,
+    "price": {"value": 25.9, "currency": {"id": 1, "symbol": "R$"}},
+    "category": {"id": 2, "name": "Lanches", "description": "..."},
+    "components": [{"id": 3, "name": "Pão", "price": {"value": 1}}],
+}
+
+
+class TestProjection:
+    def test_should_keep_only_listed_paths(self):
+        projection = Projection("id, name,price.value,category.name")
+
+        assert projection(PRODUTO) == {
+            "id": 1,
+            "name": "X-Burger",
+            "price": {"value": 25.9},
+            "category": {"name": "Lanches"},
+        }
+
+    def test_should_project_lists_item_by_item(self):
+        projection = Projection("id,components.name")
+
+        assert projection([PRODUTO, {"id": 4, "components": None}]) == [
+            {"id": 1, "components": [{"name": "Pão"}]},
+            {"id": 4, "components": None},
+        ]
+
+    def test_whole_fields_should_win_over_nested_paths(self):
+        projection = Projection("price.value,price,category.name")
+
+        assert projection(PRODUTO)["price"] == PRODUTO["price"]
+        assert projection.fields == "category.name,price"
+
+    @pytest.mark.parametrize("fields", ["", " , ", "price..value", ".id"])
+    def test_should_reject_invalid_fields(self, fields):
+        with pytest.raises(ValueError):
+            Projection(fields)
+
+    def test_should_compile_each_fields_value_once(self):
+        assert compile_projection("id,name") is compile_projection("id,name")
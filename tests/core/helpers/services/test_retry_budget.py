@@ -0,0 +1,54 @@
+import random
+
+from src.core.helpers.functions.decorrelated_jitter import decorrelated_jitter
+from src.core.helpers.options.retry_options import RetryOptions
+from src.core.helpers.services.retry_budget import RetryBudget
+from tests.test_resources.fake_clock import FakeClock
+
+
+class TestRetryBudget:
+    def test_should_allow_retries_up_to_the_ratio_of_requests(self):
+        budget = RetryBudget(
+            RetryOptions(budget_ratio=0.1, min_retries_per_second=0), clock=FakeClock()
+        )
+        for _ in range(20):
+            budget.record_request()
+
+        allowed = [budget.try_acquire() for _ in range(3)]
+
+        assert allowed == [True, True, False]
+
+    def test_should_keep_a_minimum_for_quiet_services(self):
+        budget = RetryBudget(
+            RetryOptions(budget_ratio=0.1, min_retries_per_second=0.2),
+            clock=FakeClock(),
+        )
+
+        allowed = [budget.try_acquire() for _ in range(3)]
+
+        assert allowed == [True, True, False]
+
+    def test_should_forget_retries_outside_the_window(self):
+        clock = FakeClock()
+        budget = RetryBudget(
+            RetryOptions(budget_ratio=0, min_retries_per_second=0.1), clock=clock
+        )
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+        clock.now += 11
+
+        assert budget.try_acquire()
+
+
+class TestDecorrelatedJitter:
+    def test_should_stay_between_base_and_cap(self):
+        rng = random.Random(7)
+        delay = 0.0
+        delays = []
+        for _ in range(50):
+            delay = decorrelated_jitter(delay, 0.01, 0.5, rng)
+            delays.append(delay)
+
+        assert all(0.01 <= delay <= 0.5 for delay in delays)
+        assert max(delays) == 0.5
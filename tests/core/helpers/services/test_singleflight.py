@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.core.helpers.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_should_share_one_execution(self):
+        singleflight = SingleFlight()
+        executions = []
+
+        async def fetch():
+            executions.append(1)
+            await asyncio.sleep(0.01)
+            return "categories"
+
+        async def scenario():
+            return await asyncio.gather(
+                *(singleflight.do("key", fetch) for _ in range(5))
+            )
+
+        results = asyncio.run(scenario())
+
+        assert len(executions) == 1
+        assert [result for result, _ in results] == ["categories"] * 5
+        assert [shared for _, shared in results] == [False] + [True] * 4
+        assert len(singleflight) == 0
+
+    def test_errors_should_reach_every_caller_and_not_be_kept(self):
+        singleflight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ConnectionError("down")
+
+        async def scenario():
+            results = await asyncio.gather(
+                singleflight.do("key", fetch),
+                singleflight.do("key", fetch),
+                return_exceptions=True,
+            )
+            with pytest.raises(ConnectionError):
+                await singleflight.do("key", fetch)
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len(calls) == 2
+
+    def test_follower_timeout_should_not_cancel_the_call(self):
+        singleflight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "methods"
+
+        async def follower():
+            await asyncio.sleep(0)
+            async with asyncio.timeout(0.01):
+                return await singleflight.do("key", fetch)
+
+        async def scenario():
+            return await asyncio.gather(
+                singleflight.do("key", fetch), follower(), return_exceptions=True
+            )
+
+        leader, follower_result = asyncio.run(scenario())
+
+        assert leader == ("methods", False)
+        assert isinstance(follower_result, TimeoutError)
+
+    def test_call_should_be_cancelled_when_every_caller_left(self):
+        singleflight = SingleFlight()
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        async def scenario():
+            caller = asyncio.ensure_future(singleflight.do("key", fetch))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+
+        assert cancelled == [1]
+        assert len(singleflight) == 0